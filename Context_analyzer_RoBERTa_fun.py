@@ -13,24 +13,53 @@ import pandas as pd
 import numpy as np
 import time
 import json
-from transformers import pipeline
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.preprocessing import normalize
 import matplotlib.pyplot as plt
 import seaborn as sns
 import re
-import sqlite3
 from datetime import datetime
-from collections import defaultdict
 
 from vizualization import vizualization
+from sentiment_model_registry import get_model_registry
+from sentiment_inference import (
+    classify_texts_batched, simulate_3_class_label, truncate_text,
+    display_text, truncation_policy_id, positive_probabilities
+)
+from sentiment_cache import SentimentResultCache
+from keyword_matcher import get_keyword_matcher
+from review_vectors import build_job_vectors, load_job_vectors, save_review_rows
+from review_store import (
+    connect_review_store, insert_blocks, has_job_blocks, job_source_files,
+    REVIEW_STORE_PATH, DEFAULT_JOB_ID
+)
+from sharded_inference import get_sharded_classifier, resolve_worker_layout
+from inference_scheduler import get_inference_scheduler
+from sentiment_cascade import LexiconCascade
+from streaming_analysis import (
+    ResultSpill, StreamingAggregates, SentimentSampler, JsonArrayWriter,
+    SENTIMENTS, PYARROW_AVAILABLE
+)
 
 # Set style for better plots
 plt.style.use('default')
 sns.set_palette("husl")
 
 
+# Visit date patterns, compiled once and shared by the scalar and vectorized extractors
+VISIT_DATE_PATTERN = re.compile(r'Date of visit:\s*(\w+)\s+(\d{1,2}),?\s+(\d{4})', re.IGNORECASE)
+ISO_DATE_PATTERN = re.compile(r'(\d{4})-(\d{2})-(\d{2})')
+ISO_DATE_EXTRACT_PATTERN = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+MONTH_NUMBERS = {
+    'january': '01', 'february': '02', 'march': '03', 'april': '04',
+    'may': '05', 'june': '06', 'july': '07', 'august': '08',
+    'september': '09', 'october': '10', 'november': '11', 'december': '12'
+}
+
+
 def extract_date_from_text(text):
     """
     Extract date from text in format 'Date of visit: October 1, 2025' or similar
@@ -42,8 +71,7 @@ def extract_date_from_text(text):
         str: Date in YYYY-MM-DD format or None if not found
     """
     # Pattern for "Date of visit: Month Day, Year"
-    pattern = r'Date of visit:\s*(\w+)\s+(\d{1,2}),?\s+(\d{4})'
-    match = re.search(pattern, text, re.IGNORECASE)
+    match = VISIT_DATE_PATTERN.search(text)
     
     if match:
         month_name = match.group(1)
@@ -51,25 +79,75 @@ def extract_date_from_text(text):
         year = match.group(3)
         
         # Convert month name to number
-        month_mapping = {
-            'january': '01', 'february': '02', 'march': '03', 'april': '04',
-            'may': '05', 'june': '06', 'july': '07', 'august': '08',
-            'september': '09', 'october': '10', 'november': '11', 'december': '12'
-        }
-        
-        month_num = month_mapping.get(month_name.lower())
+        month_num = MONTH_NUMBERS.get(month_name.lower())
         if month_num:
             return f"{year}-{month_num}-{day.zfill(2)}"
     
     # Try pattern "YYYY-MM-DD" directly (from data-visit-date attribute)
-    pattern_iso = r'(\d{4})-(\d{2})-(\d{2})'
-    match_iso = re.search(pattern_iso, text)
+    match_iso = ISO_DATE_PATTERN.search(text)
     if match_iso:
         return match_iso.group(0)
     
     return None
 
 
+def extract_dates_vectorized(texts):
+    """
+    Vectorized extract_date_from_text over a Series of texts
+    
+    Args:
+        texts: pandas Series of comment texts
+    
+    Returns:
+        Series: Dates in YYYY-MM-DD format (None where no date was found)
+    """
+    texts = texts.fillna('').astype(str)
+    
+    parts = texts.str.extract(VISIT_DATE_PATTERN)
+    month_num = parts[0].str.lower().map(MONTH_NUMBERS)
+    named_dates = parts[2] + '-' + month_num + '-' + parts[1].str.zfill(2)
+    
+    iso_dates = texts.str.extract(ISO_DATE_EXTRACT_PATTERN)[0]
+    dates = named_dates.fillna(iso_dates)
+    return dates.astype(object).where(dates.notna(), None)
+
+
+def build_sentiment_trends(results_df):
+    """
+    Count sentiments per visit date with a single groupby
+    
+    Args:
+        results_df: DataFrame with 'visit_date' and 'sentiment' columns
+    
+    Returns:
+        List of dicts (date, positive, negative, neutral, total) sorted by date
+    """
+    dated = results_df[results_df['visit_date'].notna()]
+    if dated.empty:
+        return []
+    
+    counts = (
+        dated.groupby(['visit_date', 'sentiment']).size()
+        .unstack(fill_value=0)
+        .reindex(columns=['POSITIVE', 'NEGATIVE', 'NEUTRAL'], fill_value=0)
+        .sort_index()
+    )
+    totals = counts.sum(axis=1)
+    
+    return [
+        {
+            'date': date,
+            'positive': int(positive),
+            'negative': int(negative),
+            'neutral': int(neutral),
+            'total': int(total)
+        }
+        for date, positive, negative, neutral, total in zip(
+            counts.index, counts['POSITIVE'], counts['NEGATIVE'], counts['NEUTRAL'], totals
+        )
+    ]
+
+
 def create_text_vectors(texts, method='tfidf', tfidf_max_features=1000, tfidf_min_df=4, tfidf_max_df=0.8):
     """Create vector representations of texts"""
     if method == 'tfidf':
@@ -84,9 +162,50 @@ def create_text_vectors(texts, method='tfidf', tfidf_max_features=1000, tfidf_mi
         return vectors, vectorizer
 
 
+def select_centroid_representatives(vectors, clusters, centers):
+    """
+    Pick the member closest to its centroid for every cluster at once
+    
+    Args:
+        vectors: L2-normalized (sparse) document vectors
+        clusters: Cluster id of every row
+        centers: Cluster centroids (n_clusters x features)
+    
+    Returns:
+        Tuple (cluster_ids, row_indices, cluster_sizes) for non-empty clusters
+    """
+    centers = normalize(np.asarray(centers))
+    # n x k similarity matrix stays small (k = number of representatives)
+    similarities = np.asarray(vectors @ centers.T)
+    own_similarity = similarities[np.arange(len(clusters)), clusters]
+    
+    # Sort by cluster, then by descending similarity; first row per cluster wins
+    order = np.lexsort((-own_similarity, clusters))
+    cluster_ids, first = np.unique(clusters[order], return_index=True)
+    sizes = np.bincount(clusters, minlength=len(centers))[cluster_ids]
+    return cluster_ids, order[first], sizes
+
+
 def find_representative_comments(sentiment_data, n_representatives=10, tfidf_max_features=1000, 
-                                 tfidf_min_df=4, tfidf_max_df=0.8):
-    """Find most representative comments using clustering and centroids"""
+                                 tfidf_min_df=4, tfidf_max_df=0.8, clustering_mode='auto',
+                                 scalable_threshold=5000, max_fit_samples=20000, vectors=None):
+    """
+    Find most representative comments using clustering and centroids
+    
+    Args:
+        sentiment_data: DataFrame of comments of one sentiment
+        n_representatives: Number of clusters / representatives
+        clustering_mode: 'kmeans' (dense KMeans), 'minibatch' (sparse mini-batch
+            k-means on L2-normalized TF-IDF) or 'auto' (minibatch above scalable_threshold)
+        scalable_threshold: Comment count at which 'auto' switches to minibatch
+        max_fit_samples: Fit minibatch k-means on at most this many comments and
+            assign the rest (None = fit on all)
+        vectors: Precomputed TF-IDF rows aligned with sentiment_data (e.g. a slice
+            of the job's vector store); computed from the text if None
+    
+    Returns:
+        DataFrame of representatives with cluster_id and cluster_size columns
+    """
     if len(sentiment_data) < n_representatives:
         # Add cluster columns even when not clustering
         result = sentiment_data.copy()
@@ -97,11 +216,35 @@ def find_representative_comments(sentiment_data, n_representatives=10, tfidf_max
     texts = sentiment_data['text'].tolist()
     
     # Create TF-IDF vectors
-    vectors, vectorizer = create_text_vectors(texts, tfidf_max_features=tfidf_max_features,
-                                             tfidf_min_df=tfidf_min_df, tfidf_max_df=tfidf_max_df)
+    if vectors is None:
+        vectors, vectorizer = create_text_vectors(texts, tfidf_max_features=tfidf_max_features,
+                                                 tfidf_min_df=tfidf_min_df, tfidf_max_df=tfidf_max_df)
     
-    # Use K-means clustering to find representative examples
     n_clusters = min(n_representatives, len(texts))
+    
+    if clustering_mode == 'auto':
+        clustering_mode = 'minibatch' if len(texts) >= scalable_threshold else 'kmeans'
+    
+    if clustering_mode == 'minibatch':
+        # Spherical-style k-means directly on sparse, L2-normalized vectors
+        vectors = normalize(vectors)
+        fit_vectors = vectors
+        if max_fit_samples and vectors.shape[0] > max_fit_samples:
+            rng = np.random.RandomState(42)
+            fit_vectors = vectors[rng.choice(vectors.shape[0], max_fit_samples, replace=False)]
+        
+        kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, n_init=3,
+                                 batch_size=min(2048, fit_vectors.shape[0]))
+        kmeans.fit(fit_vectors)
+        clusters = kmeans.predict(vectors)
+        
+        cluster_ids, rows, sizes = select_centroid_representatives(vectors, clusters, kmeans.cluster_centers_)
+        result = sentiment_data.iloc[rows].copy()
+        result['cluster_id'] = cluster_ids
+        result['cluster_size'] = sizes
+        return result
+    
+    # Use K-means clustering to find representative examples
     kmeans = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
     clusters = kmeans.fit_predict(vectors.toarray())
     
@@ -133,15 +276,14 @@ def find_representative_comments(sentiment_data, n_representatives=10, tfidf_max
     return pd.DataFrame(representatives)
 
 
-def extract_source_info_from_db(db_path):
+def extract_source_info_from_db(db_path, job_id=DEFAULT_JOB_ID):
     """Extract source website information from database"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get unique file paths to determine source
-        cursor.execute("SELECT DISTINCT file_path FROM comment_blocks LIMIT 5")
-        file_paths = [row[0] for row in cursor.fetchall()]
+        with connect_review_store(db_path) as conn:
+            # Get unique file paths to determine source
+            file_paths = job_source_files(conn, job_id)
+            if not file_paths:
+                file_paths = [row[0] for row in conn.execute("SELECT DISTINCT file_path FROM comment_blocks LIMIT 5")]
         
         # Extract website/source info from file paths
         sources = []
@@ -156,8 +298,6 @@ def extract_source_info_from_db(db_path):
                 clean_name = filename.replace('%20', ' ').replace('.html', '').replace('.htm', '')
                 sources.append(f"Web Source: {clean_name}")
         
-        conn.close()
-        
         if sources:
             return sources[0]  # Return the first/main source
         else:
@@ -170,24 +310,14 @@ def extract_source_info_from_db(db_path):
 def analyze_sentiment_enhanced(text, pipe, confidence_threshold=0.8):
     """Enhanced sentiment analysis with 3-class simulation"""
     # Truncate text if too long for the model (512 tokens max, ~400 chars safe)
-    if len(text) > 400:
-        text = text[:400] + "..."
+    text = truncate_text(text, 400)
     
     result = pipe(text)
     raw_label = result[0]['label']
     confidence = result[0]['score']
     
     # 3-class simulation with confidence thresholds
-    if raw_label == "POSITIVE":
-        if confidence > confidence_threshold:
-            readable_label = "POSITIVE"
-        else:
-            readable_label = "NEUTRAL"
-    else:  # NEGATIVE
-        if confidence > confidence_threshold:
-            readable_label = "NEGATIVE"
-        else:
-            readable_label = "NEUTRAL"
+    readable_label = simulate_3_class_label(raw_label, confidence, confidence_threshold)
     
     return {
         'text': text,
@@ -247,6 +377,48 @@ def compute_original_score(text, sentiment, key_positive_words, key_neutral_word
     return base_score + keyword_bonus
 
 
+def compute_original_scores(texts, sentiments, key_positive_words, key_neutral_words, key_negative_words, sentence_length):
+    """
+    Vectorized compute_original_score over whole columns
+    
+    Keyword lists are compiled once into alternation matchers, so each text is
+    lowercased and scanned a single time. Returns the same scores as applying
+    compute_original_score row by row.
+    
+    Args:
+        texts: Series of comment texts
+        sentiments: Series of sentiment labels aligned with texts
+        key_positive_words: List of positive keywords
+        key_neutral_words: List of neutral keywords
+        key_negative_words: List of negative keywords
+        sentence_length: Minimum sentence length threshold
+    
+    Returns:
+        Series: Original scores (unnormalized)
+    """
+    lowered = texts.str.lower()
+    word_counts = lowered.str.split().str.len()
+    
+    keyword_counts = pd.Series(0, index=texts.index, dtype=int)
+    for sentiment, keywords in (('POSITIVE', key_positive_words),
+                                ('NEGATIVE', key_negative_words),
+                                ('NEUTRAL', key_neutral_words)):
+        mask = sentiments == sentiment
+        if mask.any():
+            keyword_counts[mask] = get_keyword_matcher(keywords).count_series(lowered[mask])
+    
+    # Accumulate +0.1 like the scalar version so scores are bit-identical
+    max_count = int(keyword_counts.max()) if len(keyword_counts) else 0
+    bonus_table = np.zeros(max_count + 1)
+    bonus = 0.0
+    for n in range(1, max_count + 1):
+        bonus += 0.1
+        bonus_table[n] = bonus
+    
+    scores = (word_counts - sentence_length) * 0.05 + bonus_table[keyword_counts.to_numpy()]
+    return scores.where(word_counts > sentence_length, 0.0)
+
+
 def normalize_scores_by_sentiment(results_df):
     """
     Normalize original scores within each sentiment category to 0-1 range
@@ -352,13 +524,18 @@ def read_extracted_text_files(extracted_text_dir):
     return all_text_blocks
 
 
-def integrate_extracted_text_with_db(text_blocks, db_path):
+def integrate_extracted_text_with_db(text_blocks, db_path, job_id=DEFAULT_JOB_ID):
     """
     Integrate extracted text blocks with database
     
+    Replaces the job's rows in extracted_text_data with a single executemany
+    inside one transaction.
+    
     Args:
-        text_blocks: List of text block dictionaries
-        db_path: Path to database
+        text_blocks: List of block records (text, source_file, length and
+            optionally category, visit_date and rating)
+        db_path: Path to the review store
+        job_id: Job owning the blocks
     """
     if not text_blocks:
         return
@@ -366,35 +543,15 @@ def integrate_extracted_text_with_db(text_blocks, db_path):
     print(f"\n💾 Integrating {len(text_blocks)} text blocks with database...")
     
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Drop old table if it exists to ensure schema is updated
-        cursor.execute('DROP TABLE IF EXISTS extracted_text_data')
+        # Extract dates from all block texts in one vectorized pass; dates the extractor found win
+        visit_dates = extract_dates_vectorized(pd.Series([block['text'] for block in text_blocks]))
         
-        # Create extracted_text_data table with visit_date column
-        cursor.execute('''
-            CREATE TABLE extracted_text_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_file TEXT NOT NULL,
-                block_text TEXT NOT NULL,
-                block_length INTEGER,
-                visit_date TEXT,
-                extraction_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        for block in text_blocks:
-            # Extract date from block text
-            visit_date = extract_date_from_text(block['text'])
-            
-            cursor.execute('''
-                INSERT INTO extracted_text_data (source_file, block_text, block_length, visit_date)
-                VALUES (?, ?, ?, ?)
-            ''', (block['source_file'], block['text'], block['length'], visit_date))
-        
-        conn.commit()
-        conn.close()
+        with connect_review_store(db_path) as conn:
+            insert_blocks(conn, job_id, (
+                (block['source_file'], block['text'], block['length'],
+                 block.get('visit_date') or visit_date, block.get('category'), block.get('rating'))
+                for block, visit_date in zip(text_blocks, visit_dates)
+            ))
         
         print(f"✅ Integrated {len(text_blocks)} text blocks into database")
         
@@ -402,52 +559,541 @@ def integrate_extracted_text_with_db(text_blocks, db_path):
         print(f"❌ Error integrating text blocks: {e}")
 
 
-def load_combined_dataset(db_path, include_extracted_text=False):
+DATASET_SAMPLING_MODES = ('top', 'random', 'stratified')
+
+# Dataset sources: selected columns, filter, ranking of 'top' mode and stratification column
+DATASET_SOURCES = {
+    'extracted_text': {
+        'columns': """'extracted_text' as source, block_text as text, 0.5 as score,
+                       block_length as length, 0 as is_candidate, source_file as source_info,
+                       visit_date""",
+        'output': 'source, text, score, length, is_candidate, source_info, visit_date',
+        'table': 'extracted_text_data',
+        'where': 'job_id = ? AND block_length >= 30',
+        'order': 'visit_date, block_length DESC',
+        'stratify': 'source_file'
+    },
+    'comment': {
+        'columns': """'comment' as source, block_text as text, score, length, is_candidate,
+                       file_path as source_info""",
+        'output': 'source, text, score, length, is_candidate, source_info',
+        'table': 'comment_blocks',
+        'where': 'score >= 0.3 AND length >= 30',
+        'order': 'score DESC',
+        'stratify': 'file_path'
+    }
+}
+
+
+def sample_key_sql(seed=42):
+    """
+    Deterministic pseudo-random sort key computed inside SQLite
+    
+    Multiplicative hash of the rowid, XOR-ed with the seed ((a | b) - (a & b))
+    and mixed again, so sampling needs neither ORDER BY RANDOM() nor a Python
+    function call per row. Different seeds give different orders.
+    """
+    seed_mix = (int(seed) * 2654435761) % 4294967296
+    hashed = "((rowid * 2654435761) % 4294967296)"
+    return f"((({hashed} | {seed_mix}) - ({hashed} & {seed_mix})) * 668265261 % 4294967296)"
+
+
+def combined_dataset_query(conn, include_extracted_text=False, job_id=DEFAULT_JOB_ID, limit=None,
+                           sampling='top', samples_per_class=None, seed=42):
+    """
+    Build the SELECT used to load the analysis dataset
+    
+    Selection happens in SQLite, so only the analyzed rows reach pandas:
+    'top' keeps the best-ranked rows (extracted text by date and length,
+    comments by score), 'random' a deterministic hash sample and 'stratified'
+    at most samples_per_class rows per source file. Rows always come back in
+    hash order, which replaces the former pandas shuffle.
+    
+    Args:
+        conn: Connection from connect_review_store
+        include_extracted_text: Read the job's extracted_text_data rows
+        job_id: Job whose blocks are read
+        limit: Maximum number of rows (None = all)
+        sampling: 'top', 'random' or 'stratified'
+        samples_per_class: Row cap per source file in 'stratified' mode
+        seed: Seed of the sample hash
+    
+    Returns:
+        Tuple (query, params, include_extracted_text); the flag is False when the
+        job has no extracted text blocks and comment_blocks is used instead
+    """
+    if sampling not in DATASET_SAMPLING_MODES:
+        raise ValueError(f"Unknown dataset sampling '{sampling}', expected one of {DATASET_SAMPLING_MODES}")
+    
+    use_extracted = False
+    if include_extracted_text:
+        if has_job_blocks(conn, job_id):
+            print("📊 Loading dataset from extracted text files")
+            use_extracted = True
+        else:
+            print("⚠️  No extracted text data found, using comment_blocks")
+    
+    source = DATASET_SOURCES['extracted_text' if use_extracted else 'comment']
+    params = [job_id] if use_extracted else []
+    sample_key = sample_key_sql(seed)
+    
+    inner = f"SELECT {source['columns']}, {sample_key} AS sample_key"
+    if sampling == 'stratified':
+        inner += f", ROW_NUMBER() OVER (PARTITION BY {source['stratify']} ORDER BY {sample_key}) AS source_rank"
+    inner += f" FROM {source['table']} WHERE {source['where']}"
+    if sampling == 'top' and limit:
+        inner += f" ORDER BY {source['order']} LIMIT ?"
+        params.append(int(limit))
+    
+    query = f"SELECT {source['output']} FROM ({inner})"
+    if sampling == 'stratified' and samples_per_class:
+        query += " WHERE source_rank <= ?"
+        params.append(int(samples_per_class))
+    query += " ORDER BY sample_key"
+    if sampling != 'top' and limit:
+        query += " LIMIT ?"
+        params.append(int(limit))
+    
+    return query, tuple(params), use_extracted
+
+
+def load_combined_dataset(db_path, include_extracted_text=False, job_id=DEFAULT_JOB_ID, **selection):
     """
     Load dataset combining existing comment_blocks with optional extracted text data
+    
+    Args:
+        selection: limit, sampling, samples_per_class and seed for combined_dataset_query
     """
     try:
-        conn = sqlite3.connect(db_path)
+        with connect_review_store(db_path) as conn:
+            query, params, _ = combined_dataset_query(conn, include_extracted_text, job_id, **selection)
+            df_dataset = pd.read_sql_query(query, conn, params=params)
         
-        if include_extracted_text:
-            # Check if extracted_text_data table exists
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='extracted_text_data';")
-            has_extracted_data = cursor.fetchone() is not None
-            
-            if has_extracted_data:
-                # Use extracted text data
-                query = """
-                    SELECT 'extracted_text' as source, block_text as text, 
-                           0.5 as score, block_length as length, 
-                           0 as is_candidate, source_file as source_info,
-                           visit_date
-                    FROM extracted_text_data
-                    WHERE block_length >= 30
-                    ORDER BY visit_date, block_length DESC
-                """
-                print("📊 Loading dataset from extracted text files")
-            else:
-                print("⚠️  No extracted text data found, using comment_blocks")
-                include_extracted_text = False
+        return df_dataset
         
-        if not include_extracted_text:
-            # Original query - comments only
-            query = """
-                SELECT 'comment' as source, block_text as text, score, length, is_candidate, file_path as source_info
-                FROM comment_blocks 
-                WHERE score >= 0.3 AND length >= 30
-                ORDER BY score DESC
-            """
+    except Exception as e:
+        print(f"❌ Error loading combined dataset: {e}")
+        return None
+
+
+def iter_combined_dataset(db_path, chunk_rows, include_extracted_text=False, job_id=DEFAULT_JOB_ID, **selection):
+    """
+    Yield the selected dataset in DataFrame chunks of at most chunk_rows
+    
+    Args:
+        selection: limit, sampling, samples_per_class and seed for combined_dataset_query
+    """
+    with connect_review_store(db_path) as conn:
+        query, params, _ = combined_dataset_query(conn, include_extracted_text, job_id, **selection)
+        for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunk_rows):
+            yield chunk
+
+
+def save_sentiment_trends(trends_list, output_base_dir):
+    """Write sentiment_trends.json (trends plus summary) if there are dated reviews"""
+    if not trends_list:
+        return
+    
+    trends_file = os.path.join(output_base_dir, 'sentiment_trends.json')
+    with open(trends_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            'trends': trends_list,
+            'summary': {
+                'total_dates': len(trends_list),
+                'date_range': {
+                    'start': trends_list[0]['date'],
+                    'end': trends_list[-1]['date']
+                },
+                'total_reviews': sum(t['total'] for t in trends_list),
+                'total_positive': sum(t['positive'] for t in trends_list),
+                'total_negative': sum(t['negative'] for t in trends_list),
+                'total_neutral': sum(t['neutral'] for t in trends_list)
+            }
+        }, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Trends data saved to: {trends_file}")
+
+
+def finalize_analysis_results(results_df, folders, output_base_dir, processing_times, total_time,
+                              keyword_lists, sentence_length, representative_kwargs,
+                              wordcloud_max_words, top_words_count, persist_vectors=True,
+                              performance_extras=None, job_vectors=None):
+    """
+    Post-inference stages shared by the analysis run and rescore_job
+    
+    Computes and normalizes original scores, builds the vector store and
+    trends, writes the per-sentiment files and representatives and renders
+    the charts and summary files.
+    
+    Args:
+        results_df: One row per review with text, sentiment, confidence, raw_label,
+            original_length, is_candidate and visit_date
+        folders: Output folders (positive, negative, neutral, visualizations, vectors)
+        output_base_dir: Base output directory
+        processing_times: Per-batch inference times (for the charts)
+        total_time: Inference wall time in seconds
+        keyword_lists: (positive, neutral, negative) keyword lists
+        sentence_length: Sentence length threshold for original scores
+        representative_kwargs: Arguments for find_representative_comments
+        persist_vectors: Save the per-review TF-IDF vector store
+        performance_extras: Extra entries for performance_summary.json
+        job_vectors: Already persisted TF-IDF matrix in results_df row order
+            (skips rebuilding the vector store)
+    
+    Returns:
+        dict with results_df, sentiment_counts, representative_results and trends
+    """
+    key_positive_words, key_neutral_words, key_negative_words = keyword_lists
+    
+    # Compute original scores based on text length and keywords
+    print("\n📊 Computing original quality scores...")
+    results_df['original_score'] = compute_original_scores(
+        results_df['text'],
+        results_df['sentiment'],
+        key_positive_words,
+        key_neutral_words,
+        key_negative_words,
+        sentence_length
+    )
+    
+    # Normalize scores by sentiment category
+    print("📊 Normalizing scores by sentiment category...")
+    results_df = normalize_scores_by_sentiment(results_df)
+    
+    print(f"✅ Score computation complete!")
+    print(f"   Score range: {results_df['original_score'].min():.3f} - {results_df['original_score'].max():.3f}")
+    print(f"   Average score: {results_df['original_score'].mean():.3f}")
+    
+    # Per-review vector store (rows follow complete_results.csv)
+    if job_vectors is None and persist_vectors:
+        print("\n🧮 Building per-review vector store...")
+        job_vectors = build_job_vectors(
+            results_df['text'].tolist(),
+            folders['vectors'],
+            tfidf_max_features=representative_kwargs.get('tfidf_max_features', 1000),
+            tfidf_min_df=representative_kwargs.get('tfidf_min_df', 4),
+            tfidf_max_df=representative_kwargs.get('tfidf_max_df', 0.8)
+        )
+    if job_vectors is not None:
+        # Row-addressable texts and current labels for the chatbot's vector search
+        save_review_rows(folders['vectors'], results_df['text'].tolist(), results_df['sentiment'].tolist())
+    
+    # Build trends by date
+    print("\n📈 Building sentiment trends by date...")
+    trends_list = build_sentiment_trends(results_df)
+    
+    if trends_list:
+        print(f"✅ Trends computed for {len(trends_list)} dates:")
+        print(f"   Date range: {trends_list[0]['date']} to {trends_list[-1]['date']}")
+        print(f"   Total reviews with dates: {sum(t['total'] for t in trends_list)}")
         
-        df_dataset = pd.read_sql_query(query, conn)
-        conn.close()
+        # Show sample of trends
+        print("\n   Sample trends:")
+        for trend in trends_list[:5]:
+            print(f"      {trend['date']}: +{trend['positive']} | -{trend['negative']} | ={trend['neutral']} (total: {trend['total']})")
+    else:
+        print("⚠️  No date information found in reviews")
+    
+    # Index comments by sentiment into folders
+    print("\n" + "=" * 80)
+    print("INDEXING COMMENTS BY SENTIMENT")
+    print("=" * 80)
+    
+    sentiment_counts = {'POSITIVE': 0, 'NEGATIVE': 0, 'NEUTRAL': 0}
+    
+    for sentiment in ['POSITIVE', 'NEGATIVE', 'NEUTRAL']:
+        sentiment_data = results_df[results_df['sentiment'] == sentiment]
+        sentiment_counts[sentiment] = len(sentiment_data)
         
-        return df_dataset
+        if len(sentiment_data) > 0:
+            # Save to JSON files
+            output_file = os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_comments.json')
+            
+            # Convert to list of dictionaries for JSON serialization
+            json_data = sentiment_data.to_dict('records')
+            
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(json_data, f, indent=2, ensure_ascii=False)
+            
+            print(f"💾 {sentiment}: {len(sentiment_data):,} comments saved to {output_file}")
+            
+            # Save sample as text file for easy reading
+            sample_file = os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_samples.txt')
+            with open(sample_file, 'w', encoding='utf-8') as f:
+                f.write(f"{sentiment} SENTIMENT SAMPLES\n")
+                f.write("=" * 50 + "\n\n")
+                
+                for i, (_, row) in enumerate(sentiment_data.head(50).iterrows(), 1):
+                    f.write(f"{i:2d}. Confidence: {row['confidence']:.3f}\n")
+                    f.write(f"    Text: {row['text']}\n\n")
+    
+    print(f"\n📊 Final Distribution:")
+    total_analyzed = sum(sentiment_counts.values())
+    for sentiment, count in sentiment_counts.items():
+        percentage = (count / total_analyzed) * 100 if total_analyzed > 0 else 0
+        print(f"   {sentiment}: {count:,} ({percentage:.1f}%)")
+    
+    # Vector Search Implementation
+    print("\n" + "=" * 80)
+    print("VECTOR SEARCH FOR REPRESENTATIVE COMMENTS")
+    print("=" * 80)
+    
+    # Find representative comments for each sentiment
+    print("\n🔍 Finding most representative comments...")
+    
+    representative_results = {}
+    
+    for sentiment in ['POSITIVE', 'NEGATIVE', 'NEUTRAL']:
+        sentiment_data = results_df[results_df['sentiment'] == sentiment]
         
+        if len(sentiment_data) > 0:
+            print(f"\n📝 Analyzing {sentiment} comments ({len(sentiment_data)} total)...")
+            representatives = find_representative_comments(
+                sentiment_data, 
+                vectors=(job_vectors[np.flatnonzero(results_df['sentiment'].values == sentiment)]
+                         if job_vectors is not None else None),
+                **representative_kwargs
+            )
+            representative_results[sentiment] = representatives
+            
+            print(f"✅ Found {len(representatives)} representative {sentiment} comments:")
+            
+            for i, (_, row) in enumerate(representatives.iterrows(), 1):
+                print(f"   {i:2d}. [Cluster {row['cluster_id']} | Size: {row['cluster_size']}] "
+                      f"Conf: {row['confidence']:.3f}")
+                text_preview = row['text'][:80] + "..." if len(row['text']) > 80 else row['text']
+                print(f"       {text_preview}")
+            
+            # Save representatives
+            repr_file = os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_representatives.json')
+            representatives.to_json(repr_file, orient='records', indent=2)
+    
+    # Save trends data
+    save_sentiment_trends(trends_list, output_base_dir)
+    
+    # Visualization
+    vizualization(
+        sentiment_counts, 
+        results_df,
+        processing_times,
+        folders,
+        wordcloud_max_words, 
+        top_words_count, 
+        results_df,
+        total_time,
+        output_base_dir,
+        representative_results,
+        trends_list,
+        performance_extras=performance_extras,
+        word_counts=load_job_vectors(folders['vectors'], name='counts') if job_vectors is not None else None
+    )
+    
+    return {
+        'results_df': results_df,
+        'sentiment_counts': sentiment_counts,
+        'representative_results': representative_results,
+        'trends': trends_list
+    }
+
+
+def save_cascade_report(cascade, output_base_dir):
+    """Print lexicon cascade stats and write cascade_calibration.json when calibrating"""
+    stats = cascade.stats()
+    print(f"\n🪜 Lexicon cascade: {sum(stats['decided_by_lexicon'].values()):,} of {stats['texts']:,} texts "
+          f"decided without the model ({stats['inference_skipped_fraction']*100:.1f}%)")
+    
+    if 'calibration' in stats:
+        for row in stats['calibration']:
+            agreement = f"{row['agreement']*100:5.1f}%" if row['agreement'] is not None else "  n/a"
+            print(f"   margin {row['margin']}: would skip {row['skipped_fraction']*100:5.1f}% | agreement {agreement}")
+        report_file = os.path.join(output_base_dir, 'cascade_calibration.json')
+        with open(report_file, 'w') as f:
+            json.dump(stats, f, indent=2)
+        print(f"💾 Calibration report saved to: {report_file}")
+    return stats
+
+
+def run_streaming_analysis(classify_frame, path_db, include_extracted_text, folders, output_base_dir,
+                           total_samples, chunk_rows, sample_rows, keyword_lists, sentence_length,
+                           representative_kwargs, wordcloud_max_words, top_words_count,
+                           processing_times, result_cache=None, cascade=None, job_id=DEFAULT_JOB_ID,
+                           dataset_selection=None, extraction_stats=None):
+    """
+    Bounded-memory variant of the analysis stage
+    
+    Pass 1 reads blocks from SQLite in chunks, classifies them and appends the
+    results to a spill file while counts, trends and score ranges are updated
+    incrementally. Pass 2 re-reads the spill file to normalize scores and write
+    complete_results.csv and the per-sentiment comment files. Charts and
+    representative comments use a fixed-size sample per sentiment.
+    
+    Args:
+        classify_frame: Callable(DataFrame) -> list of result dicts (batched path)
+        path_db: SQLite database with the blocks
+        include_extracted_text: Read extracted_text_data instead of comment_blocks
+        folders: Output folders created by Context_analyzer_RoBERTa_fun
+        output_base_dir: Base output directory
+        total_samples: Maximum number of blocks to analyze
+        chunk_rows: Rows per chunk
+        sample_rows: Rows per sentiment kept for charts and clustering
+        keyword_lists: (positive, neutral, negative) keyword lists
+        sentence_length: Sentence length threshold for original scores
+        representative_kwargs: Arguments for find_representative_comments
+        processing_times: List collecting per-batch inference times
+        result_cache: Optional SentimentResultCache (for its stats)
+        cascade: Optional LexiconCascade (for its stats)
+        job_id: Job whose blocks are read from the review store
+        dataset_selection: sampling, samples_per_class and seed for combined_dataset_query
+        extraction_stats: Optional per-file extraction timings (for performance_summary.json)
+    
+    Returns:
+        dict like Context_analyzer_RoBERTa_fun, with results_df being the sample
+    """
+    print("\n" + "=" * 80)
+    print("STREAMING ANALYSIS (BOUNDED MEMORY)")
+    print("=" * 80)
+    
+    start_total = time.time()
+    spill = ResultSpill(os.path.join(output_base_dir, 'streaming_results'))
+    aggregates = StreamingAggregates()
+    key_positive_words, key_neutral_words, key_negative_words = keyword_lists
+    
+    # Pass 1: classify chunk by chunk
+    try:
+        chunks = iter_combined_dataset(path_db, chunk_rows, include_extracted_text, job_id,
+                                       limit=total_samples, **(dataset_selection or {}))
+        for chunk_number, chunk in enumerate(chunks, 1):
+            frame = pd.DataFrame(classify_frame(chunk))
+            if 'visit_date' in chunk.columns:
+                frame['visit_date'] = chunk['visit_date'].astype(object).where(chunk['visit_date'].notna(), None).to_numpy()
+            else:
+                frame['visit_date'] = extract_dates_vectorized(chunk['text']).to_numpy()
+            frame['original_score'] = compute_original_scores(
+                frame['text'], frame['sentiment'],
+                key_positive_words, key_neutral_words, key_negative_words, sentence_length
+            )
+            frame['positive_probability'] = positive_probabilities(frame['raw_label'], frame['confidence'])
+            
+            aggregates.update(frame)
+            spill.append(frame)
+            print(f"   Chunk {chunk_number}: {aggregates.total:,} blocks analyzed")
     except Exception as e:
-        print(f"❌ Error loading combined dataset: {e}")
+        print(f"❌ Error during streaming analysis: {e}")
+        spill.remove()
+        return None
+    
+    if aggregates.total == 0:
+        print("❌ Error: No data loaded from database")
+        spill.remove()
         return None
+    
+    total_time = time.time() - start_total
+    print(f"\n✅ Analysis complete!")
+    print(f"   Total time: {total_time/60:.1f} minutes")
+    print(f"   Average per text: {total_time/aggregates.total:.3f} seconds")
+    print(f"   Spill file: {spill.path} ({spill.rows:,} rows)")
+    
+    # Pass 2: normalize scores and write the per-review outputs
+    print("\n💾 Writing results...")
+    sampler = SentimentSampler(sample_rows)
+    comment_writers = {
+        sentiment: JsonArrayWriter(os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_comments.json'))
+        for sentiment in SENTIMENTS
+    }
+    samples_written = {sentiment: 0 for sentiment in SENTIMENTS}
+    results_csv = os.path.join(output_base_dir, 'complete_results.csv')
+    
+    try:
+        for chunk_number, chunk in enumerate(spill.iter_chunks(chunk_rows)):
+            chunk['original_score'] = aggregates.normalize_scores(chunk)
+            chunk.to_csv(results_csv, mode='w' if chunk_number == 0 else 'a',
+                         header=chunk_number == 0, index=False)
+            aggregates.update_normalized(chunk)
+            sampler.add(chunk)
+            
+            for sentiment, group in chunk.groupby('sentiment'):
+                comment_writers[sentiment].write_records(group.to_dict('records'))
+                
+                # Save first 50 as text file for easy reading
+                sample_file = os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_samples.txt')
+                remaining = 50 - samples_written[sentiment]
+                if remaining > 0:
+                    with open(sample_file, 'w' if samples_written[sentiment] == 0 else 'a', encoding='utf-8') as f:
+                        if samples_written[sentiment] == 0:
+                            f.write(f"{sentiment} SENTIMENT SAMPLES\n")
+                            f.write("=" * 50 + "\n\n")
+                        for _, row in group.head(remaining).iterrows():
+                            samples_written[sentiment] += 1
+                            f.write(f"{samples_written[sentiment]:2d}. Confidence: {row['confidence']:.3f}\n")
+                            f.write(f"    Text: {row['text']}\n\n")
+    finally:
+        for writer in comment_writers.values():
+            writer.close()
+        spill.remove()
+    
+    sentiment_counts = {sentiment: aggregates.counts.get(sentiment, 0) for sentiment in SENTIMENTS}
+    print(f"\n📊 Final Distribution:")
+    for sentiment, count in sentiment_counts.items():
+        percentage = (count / aggregates.total) * 100
+        print(f"   {sentiment}: {count:,} ({percentage:.1f}%)")
+    
+    trends_list = aggregates.trends_list()
+    save_sentiment_trends(trends_list, output_base_dir)
+    
+    # Representatives from the bounded per-sentiment samples
+    print("\n🔍 Finding most representative comments (sampled)...")
+    representative_results = {}
+    for sentiment in SENTIMENTS:
+        sentiment_data = sampler.frame(sentiment)
+        if len(sentiment_data) > 0:
+            representatives = find_representative_comments(sentiment_data, **representative_kwargs)
+            representative_results[sentiment] = representatives
+            repr_file = os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_representatives.json')
+            representatives.to_json(repr_file, orient='records', indent=2)
+            print(f"✅ {sentiment}: {len(representatives)} representatives from {len(sentiment_data):,} sampled comments")
+    
+    performance_extras = aggregates.summary_overrides(total_time)
+    performance_extras['streaming'] = {
+        'chunk_rows': chunk_rows,
+        'sample_rows_per_sentiment': sample_rows,
+        'spill_format': 'parquet' if PYARROW_AVAILABLE else 'csv'
+    }
+    if result_cache is not None:
+        performance_extras['result_cache'] = result_cache.stats()
+    if cascade is not None:
+        performance_extras['lexicon_cascade'] = save_cascade_report(cascade, output_base_dir)
+    if extraction_stats:
+        performance_extras['extraction'] = extraction_stats
+    
+    sample_df = sampler.frame()
+    vizualization(
+        sentiment_counts,
+        sample_df,
+        processing_times,
+        folders,
+        wordcloud_max_words,
+        top_words_count,
+        sample_df,
+        total_time,
+        output_base_dir,
+        representative_results,
+        trends_list,
+        performance_extras=performance_extras,
+        total_samples=aggregates.total,
+        write_results_csv=False
+    )
+    
+    print("\n" + "=" * 80)
+    print("✅ ANALYSIS COMPLETE!")
+    print("=" * 80)
+    
+    return {
+        'results_df': sample_df,
+        'sentiment_counts': sentiment_counts,
+        'representative_results': representative_results,
+        'trends': trends_list,
+        'folders': folders,
+        'total_time': total_time
+    }
 
 
 def Context_analyzer_RoBERTa_fun(**kwargs):
@@ -455,41 +1101,116 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
     Main function to run sentiment analysis with configuration parameters
     
     Keyword Arguments:
-        samples_per_class: Number of samples per sentiment class
+        samples_per_class: Row cap per source file when dataset_sampling='stratified'
         total_samples: Total samples to process
+        dataset_sampling: Row selection done in SQLite: 'top' (best-ranked rows), 'random'
+            (deterministic hash sample) or 'stratified' (samples_per_class rows per source file)
+        sampling_seed: Seed of the deterministic sample order
         use_extracted_text: Use extracted text files instead of web crawling
-        extracted_text_dir: Directory with extracted text files
+        extracted_text_dir: Directory with extracted text files (used when text_blocks is not given)
+        text_blocks: Block records returned by extract_text_fun (text, category, source_file,
+            visit_date, length); ingested directly instead of re-reading the text files
+        block_categories: Record categories that are analyzed
+        extraction_stats: Per-file extraction timings from extract_text_fun, added to performance_summary.json
         batch_size: Batch size for sentiment analysis processing
+        batched_inference: Score each batch in one padded forward pass (False = one pipeline call per text)
+        truncation_mode: 'chars' (cut at 400 characters) or 'tokens' (sliding token windows, batched path only)
+        window_tokens: Tokens per window in 'tokens' mode
+        window_overlap: Overlapping tokens between consecutive windows
+        window_reducer: Window aggregation: 'mean', 'max_confidence' or 'length_weighted'
         confidence_threshold: Confidence threshold for 3-class simulation
         n_representatives: Number of representative comments to find per sentiment
         tfidf_max_features: Maximum features for TF-IDF vectorization
         tfidf_min_df: Minimum document frequency for TF-IDF
         tfidf_max_df: Maximum document frequency for TF-IDF
+        clustering_mode: 'kmeans', 'minibatch' (sparse, scalable) or 'auto'
+        scalable_clustering_threshold: Comments per sentiment at which 'auto' uses minibatch
+        clustering_max_fit_samples: Subsample size for fitting minibatch k-means
+        persist_vectors: Save per-review TF-IDF vectors to vectors/ and reuse them for clustering
+        streaming: Bounded-memory mode: read, classify and write results chunk by chunk
+        streaming_chunk_rows: Rows read from SQLite (and spilled to disk) per chunk
+        streaming_sample_rows: Rows per sentiment kept in memory for charts and clustering
+        inference_workers: Model replica processes for one job (1 = in-process, 'auto' = from cores)
+        threads_per_worker: torch threads per replica process ('auto' = cores / workers)
+        inference_scheduler: Send texts to the process-wide micro-batching scheduler shared by concurrent jobs
+        scheduler_max_batch_size: Maximum texts per coalesced batch
+        scheduler_max_wait_ms: Latency deadline before a partial batch is run
+        scheduler_timeout: Seconds a job waits for one BATCH_SIZE chunk from the scheduler before failing (None = no limit)
+        job_id: Job identifier (fairness unit of the scheduler)
+        lexicon_cascade: Label clearly one-sided texts from the keyword lists and skip the model for them
+        cascade_margin: Minimum positive/negative keyword hit difference for a lexicon decision
+        cascade_max_opposing: Maximum keyword hits of the opposite polarity for a lexicon decision
+        cascade_confidence: Confidence reported for lexicon decisions
+        cascade_calibrate: Run the model on every text and report lexicon agreement per margin
         top_words_count: Number of top words to show in frequency analysis
         wordcloud_max_words: Maximum words in word clouds
         cache_dir: HuggingFace cache directory
         model_path: Path to sentiment analysis model
+        device: Device index for the model (-1 = CPU)
+        inference_backend: 'pytorch' or 'onnx' (ONNX Runtime on CPU)
+        onnx_quantize: Use the dynamically int8-quantized ONNX model
+        onnx_dir: Directory for the ONNX export (default: under cache_dir)
+        result_cache: Reuse model outputs for texts already classified by earlier jobs
+        result_cache_path: SQLite file of the cross-job result cache
+        result_cache_max_entries: LRU size bound of the result cache
         output_base_dir: Base directory for output files
-        path_db: Path to database
+        path_db: Path to the review store (shared by all jobs, rows keyed by job_id)
     """
     
     # Extract parameters with defaults
     SAMPLES_PER_CLASS = kwargs.get('samples_per_class', 1750)
     TOTAL_SAMPLES = kwargs.get('total_samples', SAMPLES_PER_CLASS * 2)
+    DATASET_SAMPLING = kwargs.get('dataset_sampling', 'top')
+    SAMPLING_SEED = kwargs.get('sampling_seed', 42)
     USE_EXTRACTED_TEXT = kwargs.get('use_extracted_text', True)
     EXTRACTED_TEXT_DIR = kwargs.get('extracted_text_dir', './Request/extracted_text')
+    TEXT_BLOCKS = kwargs.get('text_blocks', None)
+    BLOCK_CATEGORIES = kwargs.get('block_categories', ['reviews', 'descriptions', 'other_text'])
+    EXTRACTION_STATS = kwargs.get('extraction_stats', None)
     BATCH_SIZE = kwargs.get('batch_size', 100)
+    BATCHED_INFERENCE = kwargs.get('batched_inference', True)
+    TRUNCATION_MODE = kwargs.get('truncation_mode', 'chars')
+    WINDOW_TOKENS = kwargs.get('window_tokens', 510)
+    WINDOW_OVERLAP = kwargs.get('window_overlap', 64)
+    WINDOW_REDUCER = kwargs.get('window_reducer', 'mean')
     CONFIDENCE_THRESHOLD = kwargs.get('confidence_threshold', 0.8)
     N_REPRESENTATIVES = kwargs.get('n_representatives', 10)
     TFIDF_MAX_FEATURES = kwargs.get('tfidf_max_features', 1000)
     TFIDF_MIN_DF = kwargs.get('tfidf_min_df', 4)
     TFIDF_MAX_DF = kwargs.get('tfidf_max_df', 0.8)
+    CLUSTERING_MODE = kwargs.get('clustering_mode', 'auto')
+    SCALABLE_CLUSTERING_THRESHOLD = kwargs.get('scalable_clustering_threshold', 5000)
+    CLUSTERING_MAX_FIT_SAMPLES = kwargs.get('clustering_max_fit_samples', 20000)
+    PERSIST_VECTORS = kwargs.get('persist_vectors', True)
+    STREAMING = kwargs.get('streaming', False)
+    INFERENCE_WORKERS = kwargs.get('inference_workers', 1)
+    THREADS_PER_WORKER = kwargs.get('threads_per_worker', 'auto')
+    INFERENCE_SCHEDULER = kwargs.get('inference_scheduler', False)
+    SCHEDULER_MAX_BATCH_SIZE = kwargs.get('scheduler_max_batch_size', 64)
+    SCHEDULER_MAX_WAIT_MS = kwargs.get('scheduler_max_wait_ms', 20)
+    SCHEDULER_TIMEOUT = kwargs.get('scheduler_timeout', 600)
+    JOB_ID = kwargs.get('job_id', None)
+    LEXICON_CASCADE = kwargs.get('lexicon_cascade', False)
+    CASCADE_MARGIN = kwargs.get('cascade_margin', 3)
+    CASCADE_MAX_OPPOSING = kwargs.get('cascade_max_opposing', 0)
+    CASCADE_CONFIDENCE = kwargs.get('cascade_confidence', 0.9)
+    CASCADE_CALIBRATE = kwargs.get('cascade_calibrate', False)
+    STREAMING_CHUNK_ROWS = kwargs.get('streaming_chunk_rows', 5000)
+    STREAMING_SAMPLE_ROWS = kwargs.get('streaming_sample_rows', 5000)
     TOP_WORDS_COUNT = kwargs.get('top_words_count', 15)
     WORDCLOUD_MAX_WORDS = kwargs.get('wordcloud_max_words', 100)
     CACHE_DIR = kwargs.get('cache_dir', '/tmp/hf_cache')
     MODEL_PATH = kwargs.get('model_path', './my_volume/hf_model')
+    DEVICE = kwargs.get('device', -1)
+    INFERENCE_BACKEND = kwargs.get('inference_backend', 'pytorch')
+    ONNX_QUANTIZE = kwargs.get('onnx_quantize', False)
+    ONNX_DIR = kwargs.get('onnx_dir', None)
+    RESULT_CACHE = kwargs.get('result_cache', True)
+    RESULT_CACHE_PATH = kwargs.get('result_cache_path', './my_volume/sentiment_cache.db')
+    RESULT_CACHE_MAX_ENTRIES = kwargs.get('result_cache_max_entries', 200000)
     OUTPUT_BASE_DIR = kwargs.get('output_base_dir', './my_volume/sentiment_analysis')
-    path_db = kwargs.get('path_db', './filtered_reviews.db')
+    path_db = kwargs.get('path_db', REVIEW_STORE_PATH)
+    STORE_JOB_ID = JOB_ID or DEFAULT_JOB_ID
     
     # Extract keyword parameters for score computation
     KEY_POSITIVE_WORDS = kwargs.get('key_positive_words', ["nice", "good", "excellent"])
@@ -509,6 +1230,7 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
     print(f"   Samples per class: {SAMPLES_PER_CLASS}")
     print(f"   Total samples: {TOTAL_SAMPLES}")
     print(f"   Batch size: {BATCH_SIZE}")
+    print(f"   Truncation mode: {TRUNCATION_MODE}" + (f" ({WINDOW_TOKENS} tokens, overlap {WINDOW_OVERLAP}, {WINDOW_REDUCER})" if TRUNCATION_MODE == 'tokens' else ""))
     print(f"   Confidence threshold: {CONFIDENCE_THRESHOLD}")
     print(f"   Representatives per sentiment: {N_REPRESENTATIVES}")
     print(f"   Use extracted text: {USE_EXTRACTED_TEXT}")
@@ -517,29 +1239,186 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
     print(f"   Negative keywords: {len(KEY_NEGATIVE_WORDS)}")
     print(f"   Neutral keywords: {len(KEY_NEUTRAL_WORDS)}")
     
-    # Initialize sentiment analysis model
+    # Borrow the sentiment model from the process-wide registry
+    # (main_api.py warms it at startup, so normally nothing is loaded here)
     print("\n🤖 Loading sentiment analysis model...")
+    model_entry = get_model_registry().get(
+        MODEL_PATH, device=DEVICE, cache_dir=CACHE_DIR,
+        backend=INFERENCE_BACKEND, quantize=ONNX_QUANTIZE, onnx_dir=ONNX_DIR
+    )
+    pipe = model_entry['pipe']
+    model_name = model_entry['model_name']
+    simulate_3_class = True
+    
+    if pipe is None and not BATCHED_INFERENCE:
+        # ONNX backend has no transformers pipeline, only the batched path
+        print("⚠️  Per-text pipeline path not available for the ONNX backend, using batched inference")
+        BATCHED_INFERENCE = True
+    
+    if STREAMING and not BATCHED_INFERENCE:
+        print("⚠️  Streaming mode uses batched inference")
+        BATCHED_INFERENCE = True
+    
+    print(f"✅ Model ready: {model_name} [{model_entry['backend']}] (loaded in {model_entry['load_time_seconds']:.1f}s, "
+          f"borrowed {model_entry['borrow_count']}x)")
     
-    # Try to load model from local path first, then download if needed
-    if os.path.exists(os.path.join(MODEL_PATH, "config.json")):
-        print("📂 Using existing DistilBERT model from local path...")
+    processing_times = []
+    
+    result_cache = None
+    if RESULT_CACHE and BATCHED_INFERENCE:
         try:
-            pipe = pipeline("sentiment-analysis", model=MODEL_PATH)
-            model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-            simulate_3_class = True
+            result_cache = SentimentResultCache(RESULT_CACHE_PATH, max_entries=RESULT_CACHE_MAX_ENTRIES)
         except Exception as e:
-            print(f"❌ Error loading local model: {e}")
-            print("🔄 Downloading model from HuggingFace...")
-            pipe = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
-            model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-            simulate_3_class = True
-    else:
-        print("📥 Downloading DistilBERT model from HuggingFace...")
-        pipe = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
-        model_name = "distilbert-base-uncased-finetuned-sst-2-english"
-        simulate_3_class = True
+            print(f"⚠️  Result cache unavailable, classifying everything: {e}")
+    
+    cascade = None
+    if LEXICON_CASCADE:
+        cascade = LexiconCascade(KEY_POSITIVE_WORDS, KEY_NEGATIVE_WORDS, margin=CASCADE_MARGIN,
+                                 max_opposing=CASCADE_MAX_OPPOSING, confidence=CASCADE_CONFIDENCE)
+        print(f"🪜 Lexicon cascade {'calibration' if CASCADE_CALIBRATE else 'enabled'} "
+              f"(margin {CASCADE_MARGIN}, max opposing {CASCADE_MAX_OPPOSING})")
+        if CASCADE_CONFIDENCE <= CONFIDENCE_THRESHOLD:
+            print(f"⚠️  cascade_confidence {CASCADE_CONFIDENCE} is not above the confidence threshold "
+                  f"{CONFIDENCE_THRESHOLD}; lexicon decisions keep their label (see decided_by)")
+    
+    # Length-bucketed batches: one padded forward pass per BATCH_SIZE texts
+    batch_counter = {'n': 0}
+    
+    def report_progress(done, total, batch_time):
+        batch_counter['n'] += 1
+        processing_times.append(batch_time)
+        progress = (done / total) * 100
+        elapsed = time.time() - start_total
+        eta = (elapsed / done) * (total - done) if done else 0
+        print(f"   Progress: {progress:5.1f}% | Batch {batch_counter['n']:2d} | ETA: {eta/60:.1f}m")
+    
+    # Cross-job micro-batching on the shared model (takes precedence over sharding)
+    scheduler = None
+    if BATCHED_INFERENCE and INFERENCE_SCHEDULER:
+        scheduler = get_inference_scheduler(model_entry, SCHEDULER_MAX_BATCH_SIZE, SCHEDULER_MAX_WAIT_MS)
+        print(f"🚦 Using shared inference scheduler (batch {scheduler.max_batch_size}, "
+              f"deadline {scheduler.max_wait_ms} ms)")
+    
+    # Optional process pool of model replicas (CPU only), shared across jobs and started on first use
+    shard_layout = None
+    if BATCHED_INFERENCE and INFERENCE_WORKERS != 1 and scheduler is None:
+        workers, threads = resolve_worker_layout(INFERENCE_WORKERS, THREADS_PER_WORKER)
+        if DEVICE != -1:
+            print("⚠️  Inference sharding is CPU only, using a single process on the GPU")
+        elif workers > 1:
+            shard_layout = (workers, threads)
+            print(f"🧵 Sharding inference across {workers} workers x {threads} threads")
+    def classify(batch_texts):
+        options = {
+            'confidence_threshold': CONFIDENCE_THRESHOLD,
+            'batch_size': BATCH_SIZE,
+            'truncation': TRUNCATION_MODE,
+            'window_tokens': WINDOW_TOKENS,
+            'window_overlap': WINDOW_OVERLAP,
+            'window_reducer': WINDOW_REDUCER
+        }
+        if scheduler is not None:
+            # BATCH_SIZE chunks: per-chunk timeout and progress while other jobs share the model
+            futures = [
+                scheduler.submit(JOB_ID or OUTPUT_BASE_DIR, batch_texts[i:i + BATCH_SIZE], **options)
+                for i in range(0, len(batch_texts), BATCH_SIZE)
+            ]
+            results = []
+            try:
+                for future in futures:
+                    waited = time.time()
+                    results.extend(scheduler.wait(future, SCHEDULER_TIMEOUT))
+                    report_progress(len(results), len(batch_texts), time.time() - waited)
+            except Exception:
+                for future in futures:
+                    scheduler.cancel(future)
+                raise
+            return results
+        if shard_layout is not None:
+            # Process-wide pool: workers and their model copies outlive this job
+            classifier = get_sharded_classifier(
+                shard_layout[0], shard_layout[1], MODEL_PATH, device=DEVICE, cache_dir=CACHE_DIR,
+                backend=INFERENCE_BACKEND, quantize=ONNX_QUANTIZE, onnx_dir=ONNX_DIR
+            )
+            return classifier.classify(batch_texts, on_shard=report_progress, **options)
+        return classify_texts_batched(
+            batch_texts,
+            model_entry['tokenizer'],
+            model_entry['model'],
+            on_batch=report_progress,
+            **options
+        )
     
-    print(f"✅ Model loaded successfully!")
+    def classify_with_cache(texts):
+        """Classify texts with the batched path (cache misses only)"""
+        if result_cache is not None:
+            # Only cache misses go to the model
+            policy = truncation_policy_id(TRUNCATION_MODE, 400, WINDOW_TOKENS, WINDOW_OVERLAP, WINDOW_REDUCER)
+            # Resolved checkpoint + file fingerprint + backend/quantization
+            model_id = model_entry['model_id']
+            # Keyed by the model input itself (the 400-char cut under 'chars')
+            keys = [result_cache.make_key(display_text(t, TRUNCATION_MODE, 400), model_id, policy) for t in texts]
+            cached = result_cache.lookup_many(keys)
+            miss_idx = [i for i, key in enumerate(keys) if key not in cached]
+            print(f"🗃️  Result cache: {len(texts) - len(miss_idx)} hits, {len(miss_idx)} misses")
+            
+            miss_results = classify([texts[i] for i in miss_idx]) if miss_idx else []
+            result_cache.store_many(
+                (keys[i], r['raw_label'], r['confidence']) for i, r in zip(miss_idx, miss_results)
+            )
+            
+            results = [None] * len(texts)
+            for i, r in zip(miss_idx, miss_results):
+                results[i] = r
+            for i, key in enumerate(keys):
+                if results[i] is None:
+                    raw_label, confidence = cached[key]
+                    results[i] = {
+                        'text': display_text(texts[i], TRUNCATION_MODE, 400),
+                        'sentiment': simulate_3_class_label(raw_label, confidence, CONFIDENCE_THRESHOLD),
+                        'confidence': confidence,
+                        'raw_label': raw_label
+                    }
+        else:
+            results = classify(texts)
+        return results
+    
+    def classify_frame(frame):
+        """Classify a DataFrame of blocks: lexicon tier first, the model for the rest"""
+        texts = frame['text'].tolist()
+        
+        decisions = {}
+        if cascade is not None and CASCADE_CALIBRATE:
+            # Calibration: the model still sees every text
+            scores = [cascade.score(t) for t in texts]
+        elif cascade is not None:
+            decisions, _ = cascade.decide_many(texts)
+        
+        model_idx = [i for i in range(len(texts)) if i not in decisions]
+        model_results = classify_with_cache([texts[i] for i in model_idx]) if model_idx else []
+        if cascade is not None and CASCADE_CALIBRATE:
+            cascade.record_calibration(scores, model_results)
+        
+        results = [None] * len(texts)
+        for i, r in zip(model_idx, model_results):
+            r['decided_by'] = 'model'
+            results[i] = r
+        for i, label in decisions.items():
+            results[i] = cascade.result(display_text(texts[i], TRUNCATION_MODE, 400), label)
+        
+        # Store temporarily without original_score (will compute after all sentiments are known)
+        if 'length' in frame.columns:
+            original_lengths = frame['length'].tolist()
+        else:
+            original_lengths = frame['text'].str.len().tolist()
+        if 'is_candidate' in frame.columns:
+            candidates = frame['is_candidate'].tolist()
+        else:
+            candidates = [False] * len(frame)
+        for result, length, is_candidate in zip(results, original_lengths, candidates):
+            result['original_length'] = length
+            result['is_candidate'] = is_candidate
+        return results
     
     # Create output directories
     folders = {
@@ -565,16 +1444,22 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
     # Extracted text reading section
     if USE_EXTRACTED_TEXT:
         print("\n" + "=" * 80)
-        print("READING EXTRACTED TEXT FILES")
+        print("READING EXTRACTED TEXT BLOCKS")
         print("=" * 80)
         
         try:
-            # Read text blocks from extracted text files
-            text_blocks = read_extracted_text_files(EXTRACTED_TEXT_DIR)
+            if TEXT_BLOCKS is not None:
+                # Typed records handed over by extract_text_fun (no text file round trip)
+                text_blocks = [block for block in TEXT_BLOCKS
+                               if block.get('category') is None or block['category'] in BLOCK_CATEGORIES]
+                print(f"✅ Received {len(text_blocks)} block records from extraction")
+            else:
+                # Read text blocks from extracted text files
+                text_blocks = read_extracted_text_files(EXTRACTED_TEXT_DIR)
             
             if text_blocks:
                 # Integrate with database
-                integrate_extracted_text_with_db(text_blocks, path_db)
+                integrate_extracted_text_with_db(text_blocks, path_db, job_id=STORE_JOB_ID)
                 print(f"\n✅ Successfully integrated {len(text_blocks)} text blocks")
             else:
                 print("\n⚠️  No text blocks found, will try database only")
@@ -585,16 +1470,60 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
             print("   Falling back to database only")
             USE_EXTRACTED_TEXT = False
     
+    if STREAMING:
+        start_total = time.time()
+        return run_streaming_analysis(
+            classify_frame,
+            path_db,
+            USE_EXTRACTED_TEXT,
+            folders,
+            OUTPUT_BASE_DIR,
+            total_samples=TOTAL_SAMPLES,
+            chunk_rows=STREAMING_CHUNK_ROWS,
+            sample_rows=STREAMING_SAMPLE_ROWS,
+            keyword_lists=(KEY_POSITIVE_WORDS, KEY_NEUTRAL_WORDS, KEY_NEGATIVE_WORDS),
+            sentence_length=SENTENCE_LENGTH,
+            representative_kwargs={
+                'n_representatives': N_REPRESENTATIVES,
+                'tfidf_max_features': TFIDF_MAX_FEATURES,
+                'tfidf_min_df': TFIDF_MIN_DF,
+                'tfidf_max_df': TFIDF_MAX_DF,
+                'clustering_mode': CLUSTERING_MODE,
+                'scalable_threshold': SCALABLE_CLUSTERING_THRESHOLD,
+                'max_fit_samples': CLUSTERING_MAX_FIT_SAMPLES
+            },
+            wordcloud_max_words=WORDCLOUD_MAX_WORDS,
+            top_words_count=TOP_WORDS_COUNT,
+            processing_times=processing_times,
+            result_cache=result_cache,
+            cascade=cascade,
+            job_id=STORE_JOB_ID,
+            dataset_selection={
+                'sampling': DATASET_SAMPLING,
+                'samples_per_class': SAMPLES_PER_CLASS,
+                'seed': SAMPLING_SEED
+            },
+            extraction_stats=EXTRACTION_STATS
+        )
+    
     try:
         # Load dataset (with or without extracted text data)
-        df_dataset = load_combined_dataset(path_db, include_extracted_text=USE_EXTRACTED_TEXT)
+        df_dataset = load_combined_dataset(
+            path_db,
+            include_extracted_text=USE_EXTRACTED_TEXT,
+            job_id=STORE_JOB_ID,
+            limit=TOTAL_SAMPLES,
+            sampling=DATASET_SAMPLING,
+            samples_per_class=SAMPLES_PER_CLASS,
+            seed=SAMPLING_SEED
+        )
         
         if df_dataset is None or len(df_dataset) == 0:
             print("❌ Error: No data loaded from database")
             return None
         
         print(f"✅ Dataset loaded successfully!")
-        print(f"   Total samples: {len(df_dataset):,}")
+        print(f"   Total samples: {len(df_dataset):,} (selection: {DATASET_SAMPLING})")
         
         # Show data source distribution
         if 'source' in df_dataset.columns:
@@ -608,12 +1537,8 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
         if 'block_text' in df_dataset.columns:
             df_dataset.rename(columns={'block_text': 'text'}, inplace=True)
         
-        # Take a subset for processing
-        max_samples = min(len(df_dataset), TOTAL_SAMPLES)
-        df_sample = df_dataset.head(max_samples).copy()
-        
-        # Shuffle the data
-        df_sample = df_sample.sample(frac=1, random_state=42).reset_index(drop=True)
+        # LIMIT, sampling and shuffling already happened in SQL
+        df_sample = df_dataset
         
         print(f"✅ Selected {len(df_sample)} samples for analysis!")
         
@@ -626,35 +1551,41 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
     print("⏱️  This will take several minutes...")
     
     all_results = []
-    processing_times = []
-    
     start_total = time.time()
     
-    for i in range(0, len(df_sample), BATCH_SIZE):
-        batch_end = min(i + BATCH_SIZE, len(df_sample))
-        batch = df_sample.iloc[i:batch_end]
-        
-        batch_start = time.time()
-        batch_results = []
-        
-        for _, row in batch.iterrows():
-            result = analyze_sentiment_enhanced(row['text'], pipe, CONFIDENCE_THRESHOLD)
-            # Store temporarily without original_score (will compute after all sentiments are known)
-            result['original_length'] = row.get('length', len(row['text']))
-            result['is_candidate'] = row.get('is_candidate', False)
-            batch_results.append(result)
-        
-        all_results.extend(batch_results)
-        
-        batch_time = time.time() - batch_start
-        processing_times.append(batch_time)
-        
-        # Progress indicator
-        progress = (batch_end / len(df_sample)) * 100
-        avg_time = batch_time / len(batch)
-        eta = ((len(df_sample) - batch_end) / len(batch)) * avg_time
-        
-        print(f"   Progress: {progress:5.1f}% | Batch {i//BATCH_SIZE + 1:2d} | ETA: {eta/60:.1f}m")
+    if BATCHED_INFERENCE:
+        all_results = classify_frame(df_sample)
+    else:
+        for i in range(0, len(df_sample), BATCH_SIZE):
+            batch_end = min(i + BATCH_SIZE, len(df_sample))
+            batch = df_sample.iloc[i:batch_end]
+            
+            batch_start = time.time()
+            batch_results = []
+            
+            for _, row in batch.iterrows():
+                label = cascade.decide(row['text']) if cascade is not None and not CASCADE_CALIBRATE else None
+                if label is not None:
+                    result = cascade.result(truncate_text(row['text']), label)
+                else:
+                    result = analyze_sentiment_enhanced(row['text'], pipe, CONFIDENCE_THRESHOLD)
+                    result['decided_by'] = 'model'
+                # Store temporarily without original_score (will compute after all sentiments are known)
+                result['original_length'] = row.get('length', len(row['text']))
+                result['is_candidate'] = row.get('is_candidate', False)
+                batch_results.append(result)
+            
+            all_results.extend(batch_results)
+            
+            batch_time = time.time() - batch_start
+            processing_times.append(batch_time)
+            
+            # Progress indicator
+            progress = (batch_end / len(df_sample)) * 100
+            avg_time = batch_time / len(batch)
+            eta = ((len(df_sample) - batch_end) / len(batch)) * avg_time
+            
+            print(f"   Progress: {progress:5.1f}% | Batch {i//BATCH_SIZE + 1:2d} | ETA: {eta/60:.1f}m")
     
     total_time = time.time() - start_total
     print(f"\n✅ Analysis complete!")
@@ -664,176 +1595,48 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
     # Create results dataframe
     results_df = pd.DataFrame(all_results)
     
-    # Extract dates from text
+    # Visit dates were extracted at ingestion; only extract for sources without them
     print("\n📅 Extracting dates from reviews...")
-    results_df['visit_date'] = results_df['text'].apply(extract_date_from_text)
+    if 'visit_date' in df_sample.columns:
+        results_df['visit_date'] = df_sample['visit_date'].astype(object).where(df_sample['visit_date'].notna(), None).to_numpy()
+    else:
+        results_df['visit_date'] = extract_dates_vectorized(df_sample['text']).to_numpy()
     dates_found = results_df['visit_date'].notna().sum()
     print(f"✅ Found dates in {dates_found} out of {len(results_df)} reviews")
     
-    # Compute original scores based on text length and keywords
-    print("\n📊 Computing original quality scores...")
-    results_df['original_score'] = results_df.apply(
-        lambda row: compute_original_score(
-            row['text'], 
-            row['sentiment'],
-            KEY_POSITIVE_WORDS,
-            KEY_NEUTRAL_WORDS,
-            KEY_NEGATIVE_WORDS,
-            SENTENCE_LENGTH
-        ),
-        axis=1
-    )
-    
-    # Normalize scores by sentiment category
-    print("📊 Normalizing scores by sentiment category...")
-    results_df = normalize_scores_by_sentiment(results_df)
-    
-    print(f"✅ Score computation complete!")
-    print(f"   Score range: {results_df['original_score'].min():.3f} - {results_df['original_score'].max():.3f}")
-    print(f"   Average score: {results_df['original_score'].mean():.3f}")
-    
-    # Build trends by date
-    print("\n📈 Building sentiment trends by date...")
-    trends = defaultdict(lambda: {'POSITIVE': 0, 'NEGATIVE': 0, 'NEUTRAL': 0, 'total': 0})
-    
-    for _, row in results_df.iterrows():
-        if pd.notna(row.get('visit_date')):
-            date = row['visit_date']
-            sentiment = row['sentiment']
-            trends[date][sentiment] += 1
-            trends[date]['total'] += 1
-    
-    # Convert trends to sorted list of dictionaries
-    trends_list = []
-    for date in sorted(trends.keys()):
-        trends_list.append({
-            'date': date,
-            'positive': trends[date]['POSITIVE'],
-            'negative': trends[date]['NEGATIVE'],
-            'neutral': trends[date]['NEUTRAL'],
-            'total': trends[date]['total']
-        })
-    
-    if trends_list:
-        print(f"✅ Trends computed for {len(trends_list)} dates:")
-        print(f"   Date range: {trends_list[0]['date']} to {trends_list[-1]['date']}")
-        print(f"   Total reviews with dates: {sum(t['total'] for t in trends_list)}")
-        
-        # Show sample of trends
-        print("\n   Sample trends:")
-        for trend in trends_list[:5]:
-            print(f"      {trend['date']}: +{trend['positive']} | -{trend['negative']} | ={trend['neutral']} (total: {trend['total']})")
-    else:
-        print("⚠️  No date information found in reviews")
-    
-    # Index comments by sentiment into folders
-    print("\n" + "=" * 80)
-    print("INDEXING COMMENTS BY SENTIMENT")
-    print("=" * 80)
-    
-    sentiment_counts = {'POSITIVE': 0, 'NEGATIVE': 0, 'NEUTRAL': 0}
-    
-    for sentiment in ['POSITIVE', 'NEGATIVE', 'NEUTRAL']:
-        sentiment_data = results_df[results_df['sentiment'] == sentiment]
-        sentiment_counts[sentiment] = len(sentiment_data)
-        
-        if len(sentiment_data) > 0:
-            # Save to JSON files
-            output_file = os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_comments.json')
-            
-            # Convert to list of dictionaries for JSON serialization
-            json_data = sentiment_data.to_dict('records')
-            
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=2, ensure_ascii=False)
-            
-            print(f"💾 {sentiment}: {len(sentiment_data):,} comments saved to {output_file}")
-            
-            # Save sample as text file for easy reading
-            sample_file = os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_samples.txt')
-            with open(sample_file, 'w', encoding='utf-8') as f:
-                f.write(f"{sentiment} SENTIMENT SAMPLES\n")
-                f.write("=" * 50 + "\n\n")
-                
-                for i, (_, row) in enumerate(sentiment_data.head(50).iterrows(), 1):
-                    f.write(f"{i:2d}. Confidence: {row['confidence']:.3f}\n")
-                    f.write(f"    Text: {row['text']}\n\n")
-    
-    print(f"\n📊 Final Distribution:")
-    total_analyzed = sum(sentiment_counts.values())
-    for sentiment, count in sentiment_counts.items():
-        percentage = (count / total_analyzed) * 100 if total_analyzed > 0 else 0
-        print(f"   {sentiment}: {count:,} ({percentage:.1f}%)")
+    # Raw model output, kept so jobs can be re-thresholded without inference
+    results_df['positive_probability'] = positive_probabilities(results_df['raw_label'], results_df['confidence'])
     
-    # Vector Search Implementation
-    print("\n" + "=" * 80)
-    print("VECTOR SEARCH FOR REPRESENTATIVE COMMENTS")
-    print("=" * 80)
+    # Extra metrics for performance_summary.json
+    performance_extras = {}
+    if result_cache is not None:
+        performance_extras['result_cache'] = result_cache.stats()
+    if cascade is not None:
+        performance_extras['lexicon_cascade'] = save_cascade_report(cascade, OUTPUT_BASE_DIR)
+    if EXTRACTION_STATS:
+        performance_extras['extraction'] = EXTRACTION_STATS
     
-    # Find representative comments for each sentiment
-    print("\n🔍 Finding most representative comments...")
-    
-    representative_results = {}
-    
-    for sentiment in ['POSITIVE', 'NEGATIVE', 'NEUTRAL']:
-        sentiment_data = results_df[results_df['sentiment'] == sentiment]
-        
-        if len(sentiment_data) > 0:
-            print(f"\n📝 Analyzing {sentiment} comments ({len(sentiment_data)} total)...")
-            representatives = find_representative_comments(
-                sentiment_data, 
-                n_representatives=N_REPRESENTATIVES,
-                tfidf_max_features=TFIDF_MAX_FEATURES,
-                tfidf_min_df=TFIDF_MIN_DF,
-                tfidf_max_df=TFIDF_MAX_DF
-            )
-            representative_results[sentiment] = representatives
-            
-            print(f"✅ Found {len(representatives)} representative {sentiment} comments:")
-            
-            for i, (_, row) in enumerate(representatives.iterrows(), 1):
-                print(f"   {i:2d}. [Cluster {row['cluster_id']} | Size: {row['cluster_size']}] "
-                      f"Conf: {row['confidence']:.3f}")
-                text_preview = row['text'][:80] + "..." if len(row['text']) > 80 else row['text']
-                print(f"       {text_preview}")
-            
-            # Save representatives
-            repr_file = os.path.join(folders[sentiment.lower()], f'{sentiment.lower()}_representatives.json')
-            representatives.to_json(repr_file, orient='records', indent=2)
-    
-    # Save trends data
-    if trends_list:
-        trends_file = os.path.join(OUTPUT_BASE_DIR, 'sentiment_trends.json')
-        with open(trends_file, 'w', encoding='utf-8') as f:
-            json.dump({
-                'trends': trends_list,
-                'summary': {
-                    'total_dates': len(trends_list),
-                    'date_range': {
-                        'start': trends_list[0]['date'],
-                        'end': trends_list[-1]['date']
-                    },
-                    'total_reviews': sum(t['total'] for t in trends_list),
-                    'total_positive': sum(t['positive'] for t in trends_list),
-                    'total_negative': sum(t['negative'] for t in trends_list),
-                    'total_neutral': sum(t['neutral'] for t in trends_list)
-                }
-            }, f, indent=2, ensure_ascii=False)
-        print(f"\n💾 Trends data saved to: {trends_file}")
-    
-    # Visualization
-    vizualization(
-        sentiment_counts, 
+    outputs = finalize_analysis_results(
         results_df,
-        processing_times,
         folders,
-        WORDCLOUD_MAX_WORDS, 
-        TOP_WORDS_COUNT, 
-        df_sample,
-        total_time,
         OUTPUT_BASE_DIR,
-        representative_results,
-        trends_list
+        processing_times,
+        total_time,
+        keyword_lists=(KEY_POSITIVE_WORDS, KEY_NEUTRAL_WORDS, KEY_NEGATIVE_WORDS),
+        sentence_length=SENTENCE_LENGTH,
+        representative_kwargs={
+            'n_representatives': N_REPRESENTATIVES,
+            'tfidf_max_features': TFIDF_MAX_FEATURES,
+            'tfidf_min_df': TFIDF_MIN_DF,
+            'tfidf_max_df': TFIDF_MAX_DF,
+            'clustering_mode': CLUSTERING_MODE,
+            'scalable_threshold': SCALABLE_CLUSTERING_THRESHOLD,
+            'max_fit_samples': CLUSTERING_MAX_FIT_SAMPLES
+        },
+        wordcloud_max_words=WORDCLOUD_MAX_WORDS,
+        top_words_count=TOP_WORDS_COUNT,
+        persist_vectors=PERSIST_VECTORS,
+        performance_extras=performance_extras
     )
     
     print("\n" + "=" * 80)
@@ -841,10 +1644,10 @@ def Context_analyzer_RoBERTa_fun(**kwargs):
     print("=" * 80)
     
     return {
-        'results_df': results_df,
-        'sentiment_counts': sentiment_counts,
-        'representative_results': representative_results,
-        'trends': trends_list,
+        'results_df': outputs['results_df'],
+        'sentiment_counts': outputs['sentiment_counts'],
+        'representative_results': outputs['representative_results'],
+        'trends': outputs['trends'],
         'folders': folders,
         'total_time': total_time
     }
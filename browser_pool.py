@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bounded pool of warm headless browsers for Selenium page downloads
+Drivers are launched once (Firefox, falling back to Chrome) and checked out
+per page instead of starting and quitting a browser for every download.
+A driver is health-checked before checkout and replaced after a number of
+pages or when a page load fails. Images, fonts and media are not loaded.
+Concurrent jobs share the pool; when every driver is busy they wait.
+"""
+
+import time
+import atexit
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    from selenium import webdriver
+    from selenium.webdriver.firefox.options import Options as FirefoxOptions
+    from selenium.webdriver.chrome.options import Options as ChromeOptions
+    SELENIUM_AVAILABLE = True
+except ImportError:
+    SELENIUM_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+CHROME_USER_AGENT = ('Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 '
+                     '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+
+# Firefox preferences: no images, no downloadable fonts, no media autoplay
+FIREFOX_BLOCKING_PREFS = {
+    'permissions.default.image': 2,
+    'gfx.downloadable_fonts.enabled': False,
+    'browser.display.use_document_fonts': 0,
+    'media.autoplay.default': 5,
+    'media.autoplay.blocking_policy': 2,
+    'media.mediasource.enabled': False,
+}
+
+# Chrome: request patterns blocked through the DevTools protocol
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.m4s', '*.m3u8', '*.mp3', '*.ogg', '*.wav',
+]
+
+
+# Executables of the browsers create_driver can launch
+BROWSER_BINARIES = ('firefox', 'google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+
+
+def browser_available():
+    """True if a Firefox or Chrome binary is on PATH"""
+    return any(shutil.which(name) for name in BROWSER_BINARIES)
+
+
+def create_firefox_driver():
+    """Headless Firefox with image, font and media loading disabled"""
+    options = FirefoxOptions()
+    options.add_argument('--headless')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    for name, value in FIREFOX_BLOCKING_PREFS.items():
+        options.set_preference(name, value)
+    return webdriver.Firefox(options=options)
+
+
+def create_chrome_driver():
+    """Headless Chrome with image, font and media requests blocked"""
+    options = ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument(f'--user-agent={CHROME_USER_AGENT}')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+    driver = webdriver.Chrome(options=options)
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        logger.warning(f"Could not block font/media requests in Chrome: {e}")
+    return driver
+
+
+def create_driver():
+    """Launch a headless browser: Firefox first, then Chrome"""
+    try:
+        return create_firefox_driver()
+    except Exception as e:
+        logger.info(f"Firefox not available ({e}), trying Chrome")
+    return create_chrome_driver()
+
+
+class BrowserPool:
+    """
+    Bounded pool of reusable headless WebDriver instances
+
+    Args:
+        max_drivers: Maximum number of browsers alive at once
+        max_pages_per_driver: Pages after which a driver is quit and replaced
+        checkout_timeout: Seconds to wait for a free driver before giving up
+        driver_factory: Callable launching a new driver
+    """
+
+    def __init__(self, max_drivers=2, max_pages_per_driver=50, checkout_timeout=120,
+                 driver_factory=create_driver):
+        self.max_drivers = max(1, int(max_drivers))
+        self.max_pages_per_driver = max(1, int(max_pages_per_driver))
+        self.checkout_timeout = checkout_timeout
+        self.driver_factory = driver_factory
+        # Idle drivers as [driver, pages_served]; most recently used last
+        self._idle = []
+        self._alive = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self.launched = 0
+        self.recycled = 0
+        self.failed_health_checks = 0
+        self.pages = 0
+        self.launch_seconds = 0.0
+
+    def _launch(self):
+        start = time.time()
+        driver = self.driver_factory()
+        with self._cond:
+            self.launched += 1
+            self.launch_seconds += time.time() - start
+        return driver
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def is_healthy(driver):
+        """True if the browser still answers WebDriver commands"""
+        try:
+            driver.execute_script('return 1')
+            return True
+        except Exception:
+            return False
+
+    def warm(self, count=1):
+        """Launch up to count idle drivers ahead of the first download"""
+        launched = 0
+        for _ in range(count):
+            with self._cond:
+                if self._closed or self._alive >= self.max_drivers:
+                    break
+                self._alive += 1
+            try:
+                driver = self._launch()
+            except Exception:
+                with self._cond:
+                    self._alive -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append([driver, 0])
+                self._cond.notify()
+            launched += 1
+        return launched
+
+    def _checkout(self):
+        """Healthy idle driver, a new one if below max_drivers, else wait"""
+        deadline = time.time() + self.checkout_timeout
+        while True:
+            with self._cond:
+                while not self._idle and self._alive >= self.max_drivers and not self._closed:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No browser free within {self.checkout_timeout}s")
+                    self._cond.wait(remaining)
+                if self._closed:
+                    raise RuntimeError("Browser pool is shut down")
+                if self._idle:
+                    slot = self._idle.pop()
+                else:
+                    self._alive += 1
+                    slot = None
+
+            if slot is None:
+                try:
+                    return [self._launch(), 0]
+                except Exception:
+                    self._release_slot()
+                    raise
+
+            if self.is_healthy(slot[0]):
+                return slot
+            # Crashed or hung browser: replace it
+            with self._cond:
+                self.failed_health_checks += 1
+            self._quit(slot[0])
+            self._release_slot()
+
+    def _release_slot(self):
+        with self._cond:
+            self._alive -= 1
+            self._cond.notify()
+
+    def _checkin(self, slot, failed):
+        slot[1] += 1
+        with self._cond:
+            self.pages += 1
+        if failed or slot[1] >= self.max_pages_per_driver or self._closed:
+            with self._cond:
+                self.recycled += 1
+            self._quit(slot[0])
+            self._release_slot()
+            return
+        try:
+            # Don't carry cookies and consent state from one job's page into the next
+            slot[0].delete_all_cookies()
+        except Exception:
+            self._quit(slot[0])
+            self._release_slot()
+            return
+        with self._cond:
+            self._idle.append(slot)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self):
+        """
+        Borrow a driver for one page
+
+        The driver is returned to the pool afterwards, or quit if the block
+        raised or the driver reached max_pages_per_driver.
+        """
+        slot = self._checkout()
+        failed = True
+        try:
+            yield slot[0]
+            failed = False
+        finally:
+            self._checkin(slot, failed)
+
+    def shutdown(self):
+        """Quit every idle driver; drivers in use are quit on return"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._alive -= len(idle)
+            self._cond.notify_all()
+        for driver, _ in idle:
+            self._quit(driver)
+
+    def stats(self):
+        """Pool usage counters"""
+        with self._cond:
+            return {
+                'max_drivers': self.max_drivers,
+                'alive': self._alive,
+                'idle': len(self._idle),
+                'launched': self.launched,
+                'recycled': self.recycled,
+                'failed_health_checks': self.failed_health_checks,
+                'pages': self.pages,
+                'mean_launch_seconds': self.launch_seconds / self.launched if self.launched else 0.0
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool(max_drivers=2, max_pages_per_driver=50, checkout_timeout=120):
+    """
+    Process-wide browser pool (created on first use)
+
+    The settings only apply when the pool is created.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(max_drivers=max_drivers, max_pages_per_driver=max_pages_per_driver,
+                                checkout_timeout=checkout_timeout)
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def shutdown_browser_pool():
+    """Quit the browsers of the process-wide pool"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -15,6 +15,7 @@ import os
 from groq import Groq
 from typing import Dict, List, Optional, Literal
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 
@@ -30,50 +31,40 @@ except ImportError:
     logger.warning("Andrey's knowledge base disabled (install sentence-transformers and faiss-cpu)")
 
 
-class ResultsChatbot:
+# Per-job TF-IDF vector store written by the analysis stage
+try:
+    from review_vectors import load_job_vectors, search_job_vectors, read_review_rows
+    JOB_VECTORS_AVAILABLE = True
+except ImportError:
+    JOB_VECTORS_AVAILABLE = False
+
+
+# Andrey knowledge base per path, shared by every chatbot in the process.
+# main_api preloads it before gunicorn forks workers so the MiniLM weights
+# and FAISS index pages are shared copy-on-write.
+_andrey_kb_cache = {}
+_andrey_kb_lock = threading.Lock()
+
+
+def load_andrey_kb(kb_path):
     """
-    Chatbot with DUAL ROLE:
-    1. Sentiment Analysis Expert - answers about analysis results
-    2. Andrey Representative - answers about Andrey Vlasenko
+    Build (once per process) the chunked Andrey knowledge base with its FAISS index
     
-    Uses RAG (Retrieval-Augmented Generation) for both contexts
+    Returns:
+        dict with chunks, embedding_model and index, or None if unavailable
     """
+    if not Andrey_KB_AVAILABLE or not os.path.exists(kb_path):
+        return None
     
-    def __init__(self, job_id: str, analysis_path: str, groq_api_key: str, 
-                 Andrey_kb_path: str = "/app/ANDREYS_KNOWLEDGE_BASE.md"):
-        """
-        Initialize chatbot with analysis results and Andrey knowledge base
-        
-        Args:
-            job_id: Unique job identifier
-            analysis_path: Path to sentiment analysis results
-            groq_api_key: Groq API key for LLM
-            Andrey_kb_path: Path to Andrey knowledge base markdown file
-        """
-        self.job_id = job_id
-        self.analysis_path = analysis_path
-        self.groq_client = Groq(api_key=groq_api_key)
-        self.context = self._load_analysis_context()
-        self.conversation_history = []
-        
-        # Initialize Andrey knowledge base (if available)
-        self.Andrey_kb_path = Andrey_kb_path
-        self.Andrey_chunks = []
-        self.Andrey_index = None
-        self.embedding_model = None
+    with _andrey_kb_lock:
+        if kb_path in _andrey_kb_cache:
+            return _andrey_kb_cache[kb_path]
         
-        if Andrey_KB_AVAILABLE and os.path.exists(Andrey_kb_path):
-            self._initialize_Andrey_kb()
-        
-        logger.info(f"Chatbot initialized for job {job_id} with dual-role capabilities")
-    
-    def _initialize_Andrey_kb(self):
-        """Initialize Andrey knowledge base with FAISS indexing"""
         try:
-            logger.info(f"Loading Andrey knowledge base from {self.Andrey_kb_path}")
+            logger.info(f"Loading Andrey knowledge base from {kb_path}")
             
             # Load and chunk the knowledge base
-            with open(self.Andrey_kb_path, 'r', encoding='utf-8') as f:
+            with open(kb_path, 'r', encoding='utf-8') as f:
                 content = f.read()
             
             # Split by major sections (##)
@@ -104,23 +95,74 @@ class ResultsChatbot:
                 else:
                     final_chunks.append(chunk)
             
-            self.Andrey_chunks = [c for c in final_chunks if len(c.strip()) > 50]
+            chunks = [c for c in final_chunks if len(c.strip()) > 50]
             
             # Initialize embedding model
-            self.embedding_model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
+            embedding_model = SentenceTransformer('paraphrase-MiniLM-L6-v2')
             
             # Build FAISS index
-            embeddings = self.embedding_model.encode(self.Andrey_chunks, show_progress_bar=False)
+            embeddings = embedding_model.encode(chunks, show_progress_bar=False)
             dimension = embeddings.shape[1]
-            self.Andrey_index = faiss.IndexFlatL2(dimension)
-            self.Andrey_index.add(embeddings.astype('float32'))
+            index = faiss.IndexFlatL2(dimension)
+            index.add(embeddings.astype('float32'))
             
-            logger.info(f"✅ Andrey KB initialized: {len(self.Andrey_chunks)} chunks, {dimension}D vectors")
+            logger.info(f"✅ Andrey KB initialized: {len(chunks)} chunks, {dimension}D vectors")
+            kb = {'chunks': chunks, 'embedding_model': embedding_model, 'index': index}
             
         except Exception as e:
             logger.error(f"Failed to initialize Andrey KB: {e}")
-            self.Andrey_chunks = []
-            self.Andrey_index = None
+            kb = None
+        
+        _andrey_kb_cache[kb_path] = kb
+        return kb
+
+
+class ResultsChatbot:
+    """
+    Chatbot with DUAL ROLE:
+    1. Sentiment Analysis Expert - answers about analysis results
+    2. Andrey Representative - answers about Andrey Vlasenko
+    
+    Uses RAG (Retrieval-Augmented Generation) for both contexts
+    """
+    
+    def __init__(self, job_id: str, analysis_path: str, groq_api_key: str, 
+                 Andrey_kb_path: str = "/app/ANDREYS_KNOWLEDGE_BASE.md"):
+        """
+        Initialize chatbot with analysis results and Andrey knowledge base
+        
+        Args:
+            job_id: Unique job identifier
+            analysis_path: Path to sentiment analysis results
+            groq_api_key: Groq API key for LLM
+            Andrey_kb_path: Path to Andrey knowledge base markdown file
+        """
+        self.job_id = job_id
+        self.analysis_path = analysis_path
+        self.groq_client = Groq(api_key=groq_api_key)
+        self.context = self._load_analysis_context()
+        self.conversation_history = []
+        self.review_vectors = None
+        
+        # Initialize Andrey knowledge base (if available)
+        self.Andrey_kb_path = Andrey_kb_path
+        self.Andrey_chunks = []
+        self.Andrey_index = None
+        self.embedding_model = None
+        
+        if Andrey_KB_AVAILABLE and os.path.exists(Andrey_kb_path):
+            self._initialize_Andrey_kb()
+        
+        logger.info(f"Chatbot initialized for job {job_id} with dual-role capabilities")
+    
+    def _initialize_Andrey_kb(self):
+        """Attach the process-wide Andrey knowledge base (built once, shared by all chatbots)"""
+        kb = load_andrey_kb(self.Andrey_kb_path)
+        if kb is None:
+            return
+        self.Andrey_chunks = kb['chunks']
+        self.embedding_model = kb['embedding_model']
+        self.Andrey_index = kb['index']
     
     def _route_query(self, question: str) -> Literal["Andrey_KB", "PLATFORM"]:
         """
@@ -267,6 +309,47 @@ class ResultsChatbot:
         
         return data
     
+    def _retrieve_relevant_reviews(self, question: str, top_k: int = 5) -> List[str]:
+        """Find reviews matching the question in the job's memory-mapped vector store"""
+        if not JOB_VECTORS_AVAILABLE:
+            return []
+        
+        try:
+            vectors_dir = os.path.join(self.analysis_path, 'vectors')
+            if self.review_vectors is None:
+                self.review_vectors = load_job_vectors(vectors_dir)
+                if self.review_vectors is None:
+                    self.review_vectors = False
+                    return []
+            
+            if not self.review_vectors:
+                return []
+            
+            matches = search_job_vectors(self.review_vectors, question, top_k=top_k)
+            rows = [row for row, _ in matches]
+            reviews = read_review_rows(vectors_dir, rows)
+            if reviews is None:
+                reviews = self._read_result_rows(rows)
+            return [f"- [{sentiment}] \"{text}\"" for text, sentiment in reviews]
+            
+        except Exception as e:
+            logger.error(f"Error retrieving reviews from vector store: {e}")
+            self.review_vectors = False
+            return []
+    
+    def _read_result_rows(self, rows: List[int]) -> List[tuple]:
+        """(text, sentiment) of some rows of complete_results.csv, for jobs without a row store"""
+        import csv
+        wanted = set(rows)
+        found = {}
+        with open(os.path.join(self.analysis_path, 'complete_results.csv'), 'r', encoding='utf-8') as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                if i in wanted:
+                    found[i] = (row['text'], row['sentiment'])
+                    if len(found) == len(wanted):
+                        break
+        return [found[row] for row in rows if row in found]
+    
     def _build_context_prompt(self) -> str:
         """Build a concise context prompt from analysis data"""
         prompt_parts = []
@@ -568,6 +651,10 @@ Answer the question based on the context:"""
                 # PLATFORM MODE: Answer about sentiment analysis
                 context_prompt = self._build_context_prompt()
                 
+                relevant_reviews = self._retrieve_relevant_reviews(question)
+                if relevant_reviews:
+                    context_prompt += "\n\nREVIEWS MATCHING THE QUESTION:\n" + "\n".join(relevant_reviews)
+                
                 system_message = f"""You are an expert sentiment analysis assistant for the LeadLink platform.
 You help users understand their customer feedback data.
 
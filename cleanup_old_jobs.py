@@ -6,14 +6,20 @@ Created on Sun Nov 16 21:39:13 2025
 @author: andreyvlasenko
 """
 import os
+import glob
 import time
 import shutil
 
+from review_store import delete_job_blocks
+
 
 def cleanup_old_jobs(logger, max_age_days=7):
     """
     Remove job folders older than max_age_days, but keep the root visualizations folder
     
+    The removed jobs' rows in the review store and leftover per-job
+    filtered_reviews_<job_id>.db files are deleted as well.
+    
     Args:
         max_age_days: Maximum age in days before job folders are deleted
     """
@@ -24,6 +30,7 @@ def cleanup_old_jobs(logger, max_age_days=7):
         
         current_time = time.time()
         max_age_seconds = max_age_days * 24 * 60 * 60
+        removed_jobs = []
         
         for item in os.listdir(base_dir):
             item_path = os.path.join(base_dir, item)
@@ -44,9 +51,23 @@ def cleanup_old_jobs(logger, max_age_days=7):
                 if folder_age > max_age_seconds:
                     try:
                         shutil.rmtree(item_path)
+                        removed_jobs.append(item)
                         logger.info(f"Cleanup: Removed old job folder: {item} (age: {folder_age/86400:.1f} days)")
                     except Exception as e:
                         logger.warning(f"Cleanup: Could not remove {item}: {e}")
+        
+        if removed_jobs:
+            deleted_rows = delete_job_blocks(removed_jobs)
+            logger.info(f"Cleanup: Removed {deleted_rows} review store rows of {len(removed_jobs)} old jobs")
+        
+        # Per-job databases from before the central review store
+        for db_file in glob.glob("filtered_reviews_*.db"):
+            if current_time - os.path.getmtime(db_file) > max_age_seconds:
+                try:
+                    os.remove(db_file)
+                    logger.info(f"Cleanup: Removed old job database: {db_file}")
+                except Exception as e:
+                    logger.warning(f"Cleanup: Could not remove {db_file}: {e}")
     
     except Exception as e:
         logger.warning(f"Cleanup: Error during cleanup: {e}")
\ No newline at end of file
@@ -2,7 +2,11 @@
 # -*- coding: utf-8 -*-
 """
 Script to download a TripAdvisor page into a cache folder
-Uses Selenium WebDriver to handle JavaScript-heavy sites like TripAdvisor
+Uses Selenium WebDriver to handle JavaScript-heavy sites like TripAdvisor,
+with warm headless browsers borrowed from a shared pool (see browser_pool)
+Pages are kept in a URL-keyed page cache (see page_cache): fresh pages are
+served without a download; stale pages fetched with requests are revalidated
+with a conditional GET, stale browser-rendered pages are downloaded again
 
 Created on November 1, 2025
 @author: andreyvlasenko
@@ -15,9 +19,6 @@ from datetime import datetime
 
 # Try Selenium first (recommended for TripAdvisor), fallback to requests
 try:
-    from selenium import webdriver
-    from selenium.webdriver.firefox.options import Options as FirefoxOptions
-    from selenium.webdriver.chrome.options import Options as ChromeOptions
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
@@ -28,73 +29,117 @@ except ImportError:
 
 import requests
 
+from page_cache import DEFAULT_PAGE_TTL, get_page_cache
+from browser_pool import get_browser_pool
 
-# Create cache folder if it doesn't exist
 
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Cache-Control': 'max-age=0'
+}
 
-def download_with_selenium(url, cache_dir):
+
+def page_file_path(url, cache_dir):
+    """Timestamped HTML file path for url in cache_dir"""
+    parsed_url = urlparse(url)
+    filename = parsed_url.path.strip('/').replace('/', '_')
+    
+    # If filename is empty, use domain name
+    if not filename:
+        filename = parsed_url.netloc.replace('.', '_')
+    
+    # Add .html extension if not present
+    if not filename.endswith('.html'):
+        filename += '.html'
+    
+    # Add timestamp to make filename unique
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    base_name, ext = os.path.splitext(filename)
+    return os.path.join(cache_dir, f"{base_name}_{timestamp}{ext}")
+
+def save_cached_page(url, cache_dir, entry, status):
+    """
+    Write a page from the page cache into the job's cache folder
+    
+    Args:
+        url: Page URL
+        cache_dir: Job cache folder
+        entry: Entry from PageCache.lookup
+        status: 'fresh' (within TTL) or 'revalidated' (304 Not Modified)
+    
+    Returns:
+        Path to saved file
+    """
+    filepath = page_file_path(url, cache_dir)
+    with open(filepath, 'wb') as f:
+        f.write(entry['content'])
+    
+    metadata_file = filepath.replace('.html', '_metadata.txt')
+    with open(metadata_file, 'w', encoding='utf-8') as f:
+        f.write(f"URL: {url}\n")
+        f.write(f"Downloaded: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Method: Page cache ({status}, fetched with {entry['method']})\n")
+        f.write(f"Cache Age: {entry['age']:.0f} seconds\n")
+        f.write(f"Content Length: {len(entry['content'])} bytes\n")
+    
+    print(f"✅ Served from page cache ({status}, age {entry['age']:.0f}s)")
+    print(f"   📁 Saved to: {filepath}")
+    print(f"   📊 Size: {len(entry['content']):,} bytes")
+    return filepath
+
+def download_with_selenium(url, cache_dir, page_cache=None):
     """
     Download a web page using Selenium WebDriver (handles JavaScript)
     
+    With a page cache, a fresh cached page is used without starting a browser.
+    Rendered pages are not revalidated: the server's validators describe the
+    HTML shell, not the DOM after JavaScript ran, so the TTL alone decides.
+    
     Args:
         url: URL to download
         cache_dir: Directory to save the downloaded content
+        page_cache: Optional PageCache
     
     Returns:
         Path to saved file or None if failed
     """
-    driver = None
+    if page_cache is not None:
+        entry = page_cache.lookup(url)
+        if entry is not None and entry['fresh']:
+            page_cache.record_hit(entry)
+            return save_cached_page(url, cache_dir, entry, 'fresh')
+    
     try:
         print(f"🌐 Downloading with Selenium: {url}")
         
-        # Try Firefox first (since user mentioned Firefox), then Chrome
-        try:
-            print("   Trying Firefox WebDriver...")
-            options = FirefoxOptions()
-            options.add_argument('--headless')  # Run in background
-            options.add_argument('--disable-blink-features=AutomationControlled')
-            driver = webdriver.Firefox(options=options)
-        except Exception as e:
-            print(f"   Firefox not available: {e}")
-            try:
-                print("   Trying Chrome WebDriver...")
-                options = ChromeOptions()
-                options.add_argument('--headless')
-                options.add_argument('--disable-blink-features=AutomationControlled')
-                options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-                driver = webdriver.Chrome(options=options)
-            except Exception as e2:
-                print(f"   Chrome not available: {e2}")
-                return None
-        
-        # Load the page
-        driver.get(url)
-        
-        # Wait for page to load (wait for body element)
-        print("   Waiting for page to load...")
-        WebDriverWait(driver, 20).until(
-            EC.presence_of_element_located((By.TAG_NAME, "body"))
-        )
-        
-        # Additional wait for dynamic content
-        time.sleep(3)
-        
-        # Get the page source
-        page_source = driver.page_source
+        # Warm browser from the shared pool instead of launching one per page
+        with get_browser_pool().driver() as driver:
+            # Load the page
+            driver.get(url)
+            
+            # Wait for page to load (wait for body element)
+            print("   Waiting for page to load...")
+            WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.TAG_NAME, "body"))
+            )
+            
+            # Additional wait for dynamic content
+            time.sleep(3)
+            
+            # Get the page source
+            page_source = driver.page_source
+            browser_name = driver.name
         
         # Generate filename
-        parsed_url = urlparse(url)
-        filename = parsed_url.path.strip('/').replace('/', '_')
-        if not filename:
-            filename = parsed_url.netloc.replace('.', '_')
-        if not filename.endswith('.html'):
-            filename += '.html'
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name, ext = os.path.splitext(filename)
-        filename = f"{base_name}_{timestamp}{ext}"
-        
-        filepath = os.path.join(cache_dir, filename)
+        filepath = page_file_path(url, cache_dir)
         
         # Save the content
         with open(filepath, 'w', encoding='utf-8') as f:
@@ -107,74 +152,65 @@ def download_with_selenium(url, cache_dir):
             f.write(f"Downloaded: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
             f.write(f"Method: Selenium WebDriver\n")
             f.write(f"Content Length: {len(page_source)} characters\n")
-            f.write(f"Browser: {driver.name}\n")
+            f.write(f"Browser: {browser_name}\n")
         
         print(f"✅ Successfully downloaded with Selenium!")
         print(f"   📁 Saved to: {filepath}")
         print(f"   📊 Size: {len(page_source):,} characters")
         print(f"   📝 Metadata: {metadata_file}")
         
+        if page_cache is not None:
+            # No validators: the rendered DOM can change while the HTML shell does not
+            page_cache.store(url, page_source, method='selenium')
+            page_cache.record_miss()
+        
         return filepath
         
     except Exception as e:
         print(f"❌ Selenium download failed: {str(e)}")
         return None
-    finally:
-        if driver:
-            driver.quit()
 
-def download_with_requests(url, cache_dir):
+def download_with_requests(url, cache_dir, page_cache=None):
     """
     Download a web page using requests library (fallback method)
     
+    With a page cache, a fresh cached page is used without a request and a
+    stale one is revalidated with If-None-Match / If-Modified-Since.
+    
     Args:
         url: URL to download
         cache_dir: Directory to save the downloaded content
+        page_cache: Optional PageCache
     
     Returns:
         Path to saved file or None if failed
     """
+    entry = page_cache.lookup(url) if page_cache is not None else None
+    if entry is not None and entry['fresh']:
+        page_cache.record_hit(entry)
+        return save_cached_page(url, cache_dir, entry, 'fresh')
+    
     try:
         print(f"🌐 Downloading with requests: {url}")
         
         # Set up session with headers to mimic a real browser
         session = requests.Session()
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0'
-        }
+        headers = dict(BROWSER_HEADERS)
+        # A 304 only vouches for pages fetched the same way (not a browser-rendered DOM)
+        if entry is not None and entry['method'] == 'requests':
+            headers.update(page_cache.conditional_headers(entry))
         
         # Make the request with a longer timeout
         response = session.get(url, headers=headers, timeout=30, allow_redirects=True)
-        response.raise_for_status()
-        
-        # Generate filename from URL
-        parsed_url = urlparse(url)
-        filename = parsed_url.path.strip('/').replace('/', '_')
-        
-        # If filename is empty, use domain name
-        if not filename:
-            filename = parsed_url.netloc.replace('.', '_')
-        
-        # Add .html extension if not present
-        if not filename.endswith('.html'):
-            filename += '.html'
         
-        # Add timestamp to make filename unique
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        base_name, ext = os.path.splitext(filename)
-        filename = f"{base_name}_{timestamp}{ext}"
+        if entry is not None and response.status_code == 304:
+            page_cache.refresh(url, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+            page_cache.record_revalidated(entry)
+            return save_cached_page(url, cache_dir, entry, 'revalidated')
+        response.raise_for_status()
         
         # Full path for the file
-        filepath = os.path.join(cache_dir, filename)
+        filepath = page_file_path(url, cache_dir)
         
         # Save the content
         with open(filepath, 'wb') as f:
@@ -195,6 +231,11 @@ def download_with_requests(url, cache_dir):
         print(f"   📊 Size: {len(response.content):,} bytes")
         print(f"   📝 Metadata: {metadata_file}")
         
+        if page_cache is not None:
+            page_cache.store(url, response.content, response.headers.get('ETag'),
+                             response.headers.get('Last-Modified'), method='requests')
+            page_cache.record_miss()
+        
         return filepath
         
     except requests.exceptions.RequestException as e:
@@ -204,28 +245,38 @@ def download_with_requests(url, cache_dir):
         print(f"❌ Unexpected error: {str(e)}")
         return None
 
-def download_page(url, cache_dir):
+def download_page(url, cache_dir, page_cache=None):
     """
     Download page using best available method
     
     Args:
         url: URL to download
         cache_dir: Directory to save the downloaded content
+        page_cache: Optional PageCache
     
     Returns:
         Path to saved file or None if failed
     """
     # Try Selenium first (better for JavaScript-heavy sites)
     if SELENIUM_AVAILABLE:
-        result = download_with_selenium(url, cache_dir)
+        result = download_with_selenium(url, cache_dir, page_cache)
         if result:
             return result
         print("   Selenium failed, trying requests library...")
     
     # Fallback to requests
-    return download_with_requests(url, cache_dir)
+    return download_with_requests(url, cache_dir, page_cache)
 
-def download_page_fun(CACHE_FOLDER,TARGET_URL):
+def download_page_fun(CACHE_FOLDER, TARGET_URL, use_page_cache=True, page_cache_ttl=DEFAULT_PAGE_TTL):
+    """
+    Download TARGET_URL into CACHE_FOLDER
+    
+    Args:
+        CACHE_FOLDER: Job cache folder
+        TARGET_URL: Page to download
+        use_page_cache: Serve and store the page through the shared page cache
+        page_cache_ttl: Seconds a cached page is used without revalidation
+    """
     
     os.makedirs(CACHE_FOLDER, exist_ok=True)
     print(f"\n📂 Cache folder: {os.path.abspath(CACHE_FOLDER)}")
@@ -237,8 +288,15 @@ def download_page_fun(CACHE_FOLDER,TARGET_URL):
         print("   Also install a WebDriver (geckodriver for Firefox or chromedriver for Chrome)")
         print("   Falling back to requests library...\n")
     
+    page_cache = get_page_cache(ttl_seconds=page_cache_ttl) if use_page_cache else None
+    
     # Download the page
-    result = download_page(TARGET_URL, CACHE_FOLDER)
+    result = download_page(TARGET_URL, CACHE_FOLDER, page_cache)
+    
+    if page_cache is not None:
+        stats = page_cache.stats()
+        print(f"\n🗄️  Page cache: {stats['hits']} hits, {stats['revalidated']} revalidated, "
+              f"{stats['misses']} misses, {stats['bytes_saved']:,} bytes saved")
     
     if result:
         print(f"\n🎉 Download complete!")
@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Extract visible text from downloaded TripAdvisor HTML page
-Organizes content into separate blocks and saves as txt file
+Extract visible text from downloaded TripAdvisor HTML pages
+Every HTML file of a job is extracted in a process pool; the blocks are
+merged with cross-file dedup and returned as typed records
+(optionally also saved as a human-readable txt file for debugging)
 
 Created on November 1, 2025
 @author: andreyvlasenko
@@ -10,9 +12,32 @@ Created on November 1, 2025
 
 import os
 import re
+import time
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup
 from datetime import datetime
 
+from extraction_rules import CITATION_PATTERN, get_extraction_rules
+from extractor_profiles import read_page_url, select_profile
+
+# Optional single-pass extraction engine
+try:
+    from lxml import etree, html as lxml_html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+
+# Block categories handed to the analysis stage; the title and restaurant_info are page metadata
+RECORD_CATEGORIES = ('reviews', 'ratings', 'descriptions', 'other_text')
+
+NON_VISIBLE_TAGS = ('script', 'style', 'meta', 'link', 'noscript', 'iframe')
+
+# TripAdvisor-style review containers (matched against the class attribute)
+REVIEW_CLASS_PATTERN = re.compile(r'review|comment', re.I)
 
 
 def clean_text(text):
@@ -33,56 +58,65 @@ def is_quoted_or_citation(sentence):
     Returns:
         True if sentence contains quotes or citation markers
     """
-    # Check for quoted text with "..." or '...'
-    if re.search(r'["\'].*?["\']', sentence):
-        return True
-    
-    # Check for citation markers
-    citation_patterns = [
-        r'\[.*?\]',  # [citation]
-        r'\(.*?\)',  # (reference)
-        r'according to',
-        r'said',
-        r'quoted',
-        r'states',
-        r'mentioned'
-    ]
-    
-    for pattern in citation_patterns:
-        if re.search(pattern, sentence, re.IGNORECASE):
-            return True
-    
-    return False
+    return CITATION_PATTERN.search(sentence) is not None
+
+def split_sentences(text):
+    """Sentences used for duplicate detection (split on . ! ?, longer than 15 characters)"""
+    sentences = re.split(r'[.!?]+', text)
+    return [s.strip() for s in sentences if len(s.strip()) > 15]
+
+def sentence_key(sentence):
+    """Stable 8-byte hash of a whitespace/case-normalized sentence"""
+    normalized = re.sub(r'\s+', ' ', sentence).strip().lower()
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest()
 
-def has_duplicate_sentence(text, existing_texts):
+class SentenceDedupIndex:
     """
-    Check if any sentence in text appears in existing texts
-    Excludes quoted text and citations from duplicate detection
+    Hash index of the sentences of accepted blocks
     
-    Args:
-        text: Text to check
-        existing_texts: List of already processed texts
+    Keeps, per category, the accepted blocks and the hashes of their
+    sentences. The quote/citation flag of a block is computed once when it is
+    added; sentences of quoted blocks are not indexed, since a match against a
+    quote never counted as a duplicate. A lookup costs O(sentences) instead of
+    O(sentences x blocks x length).
     
-    Returns:
-        True if duplicate sentence found (excluding quotes/citations), False otherwise
+    Unlike the substring scan, a sentence only matches a whole indexed
+    sentence (ignoring case and whitespace).
     """
-    # Split into sentences (simple split by . ! ?)
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if len(s.strip()) > 15]
     
-    for sentence in sentences:
-        # Skip duplicate check if this is a quoted text or citation
-        if is_quoted_or_citation(sentence):
-            continue
+    def __init__(self):
+        self.blocks = {}
+        self.sentence_keys = {}
+        self.quoted = {}
+    
+    def add(self, category, block):
+        """Register an accepted block"""
+        self.blocks.setdefault(category, set()).add(block)
+        keys = self.sentence_keys.setdefault(category, set())
+        if block not in self.quoted:
+            self.quoted[block] = is_quoted_or_citation(block)
+        if not self.quoted[block]:
+            keys.update(sentence_key(sentence) for sentence in split_sentences(block))
+    
+    def is_duplicate(self, block, categories):
+        """
+        True if block was accepted before or shares a non-quoted sentence with
+        an accepted non-quoted block in any of categories
+        """
+        if any(block in self.blocks.get(category, ()) for category in categories):
+            return True
         
-        for existing_text in existing_texts:
-            # Check if sentence appears in existing text
-            if sentence in existing_text:
-                # But only mark as duplicate if the existing text doesn't have this as a quote/citation
-                if not is_quoted_or_citation(existing_text):
-                    return True
-    
-    return False
+        indexed = [self.sentence_keys[c] for c in categories if self.sentence_keys.get(c)]
+        if not indexed:
+            return False
+        for sentence in split_sentences(block):
+            # Quoted text and citations may legitimately repeat
+            if is_quoted_or_citation(sentence):
+                continue
+            key = sentence_key(sentence)
+            if any(key in keys for keys in indexed):
+                return True
+        return False
 
 def split_by_separators(text, SEPARATOR_KEYWORDS, separators=None):
     """
@@ -98,35 +132,134 @@ def split_by_separators(text, SEPARATOR_KEYWORDS, separators=None):
     if separators is None:
         separators = SEPARATOR_KEYWORDS
     
-    blocks = [text]
-    
-    # Split by each separator keyword
-    for separator in separators:
-        new_blocks = []
-        for block in blocks:
-            # Split but keep the separator with the following text
-            parts = block.split(separator)
-            if len(parts) > 1:
-                # First part without separator
-                if parts[0].strip():
-                    new_blocks.append(parts[0].strip())
-                # Remaining parts with separator prefix
-                for part in parts[1:]:
-                    if part.strip():
-                        new_blocks.append(separator + part.strip())
-            else:
-                if block.strip():
-                    new_blocks.append(block.strip())
-        blocks = new_blocks
-    
-    return [b for b in blocks if len(b) > 20]  # Filter out very short blocks
+    return get_extraction_rules(separators).split(text)
+
+def collect_page_text_bs4(html_content):
+    """
+    Texts the categorization rules work on, collected with BeautifulSoup
+    
+    Walks the tree once per element kind (p, review containers, div) and
+    re-stringifies nested elements for every ancestor.
+    
+    Returns:
+        Dictionary with title, heading, paragraphs, containers and divs
+    """
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # Remove script, style, and other non-visible elements
+    for element in soup(list(NON_VISIBLE_TAGS)):
+        element.decompose()
+    
+    heading = soup.find('h1')
+    return {
+        'title': clean_text(soup.title.string) if soup.title else '',
+        'heading': clean_text(heading.get_text()) if heading else None,
+        'paragraphs': [clean_text(p.get_text()) for p in soup.find_all('p')],
+        'containers': [clean_text(c.get_text(separator='\n', strip=True))
+                       for c in soup.find_all(['div', 'span'], class_=REVIEW_CLASS_PATTERN)],
+        'divs': [clean_text(div.get_text(separator='\n', strip=True)) for div in soup.find_all('div')]
+    }
+
+def parse_html_lxml(html_content):
+    """Parse a page into an lxml document root"""
+    try:
+        return lxml_html.document_fromstring(html_content)
+    except ValueError:
+        # Unicode input with an XML encoding declaration
+        return lxml_html.document_fromstring(html_content.encode('utf-8'))
 
-def extract_text_blocks(html_file, SEPARATOR_KEYWORDS = None):
+def collect_page_text_lxml(html_content, root=None):
+    """
+    Same texts as collect_page_text_bs4 from a single lxml traversal
+    
+    Element texts are built bottom-up: every element joins the already
+    cleaned texts of its children instead of walking its subtree again.
+    Document order of the collected elements is kept.
+    
+    Args:
+        html_content: Page HTML
+        root: Already parsed document of html_content (skips parsing)
+    
+    Returns:
+        Dictionary with title, heading, paragraphs, containers and divs
+    """
+    if root is None:
+        root = parse_html_lxml(html_content)
+    etree.strip_elements(root, *NON_VISIBLE_TAGS, with_tail=False)
+    
+    title = root.find('.//title')
+    page = {
+        'title': clean_text(title.text or '') if title is not None else '',
+        'heading': None,
+        'paragraphs': [],
+        'containers': [],
+        'divs': []
+    }
+    
+    # Per open element: [cleaned pieces (get_text(separator, strip) semantics),
+    #                    raw pieces (get_text() semantics, only inside p/h1), slots]
+    stack = []
+    raw_depth = 0
+    
+    def add_comment_tails(entry, node):
+        # iterwalk skips comments and processing instructions, but their tail is visible text
+        while node is not None and not isinstance(node.tag, str):
+            entry[0].append(clean_text(node.tail or ''))
+            if raw_depth:
+                entry[1].append(node.tail or '')
+            node = node.getnext()
+    
+    for event, element in etree.iterwalk(root, events=('start', 'end')):
+        tag = element.tag.lower()
+        if event == 'start':
+            # Reserve result slots now so the lists follow document (pre-)order
+            slots = []
+            if tag == 'p':
+                slots.append(('paragraphs', len(page['paragraphs'])))
+                page['paragraphs'].append(None)
+            if tag in ('div', 'span') and REVIEW_CLASS_PATTERN.search(element.get('class') or ''):
+                slots.append(('containers', len(page['containers'])))
+                page['containers'].append(None)
+            if tag == 'div':
+                slots.append(('divs', len(page['divs'])))
+                page['divs'].append(None)
+            if tag in ('p', 'h1'):
+                raw_depth += 1
+            stack.append([[clean_text(element.text or '')], [element.text or ''] if raw_depth else [], slots, tag])
+            if len(element):
+                add_comment_tails(stack[-1], element[0])
+            continue
+        
+        pieces, raw_pieces, slots, tag = stack.pop()
+        text = ' '.join(piece for piece in pieces if piece)
+        for kind, index in slots:
+            page[kind][index] = clean_text(''.join(raw_pieces)) if kind == 'paragraphs' else text
+        if tag == 'h1' and page['heading'] is None:
+            page['heading'] = clean_text(''.join(raw_pieces))
+        if tag in ('p', 'h1'):
+            raw_depth -= 1
+        
+        if stack:
+            parent = stack[-1]
+            parent[0].append(text)
+            parent[0].append(clean_text(element.tail or ''))
+            if raw_depth:
+                parent[1].append(''.join(raw_pieces))
+                parent[1].append(element.tail or '')
+            add_comment_tails(parent, element.getnext())
+    
+    return page
+
+def extract_text_blocks(html_file, SEPARATOR_KEYWORDS = None, engine='lxml', profiles=True):
     """
     Extract all visible text from HTML file organized into blocks
     
     Args:
         html_file: Path to HTML file
+        engine: 'lxml' (single-pass C parser) or 'bs4' (BeautifulSoup, html.parser);
+            both give the same blocks for well-formed HTML
+        profiles: Use a site extractor profile (see extractor_profiles) when
+            the page is recognized; requires lxml
     
     Returns:
         Dictionary with organized text blocks
@@ -136,12 +269,84 @@ def extract_text_blocks(html_file, SEPARATOR_KEYWORDS = None):
     with open(html_file, 'r', encoding='utf-8') as f:
         html_content = f.read()
     
-    soup = BeautifulSoup(html_content, 'html.parser')
+    if engine == 'lxml' and not LXML_AVAILABLE:
+        print("⚠️  lxml not available, using BeautifulSoup")
+        engine = 'bs4'
+    
+    root = None
+    if profiles and LXML_AVAILABLE:
+        root = parse_html_lxml(html_content)
+        profile = select_profile(root, read_page_url(html_file))
+        if profile is not None:
+            text_blocks = extract_profile_blocks(profile, root)
+            if text_blocks['reviews']:
+                return text_blocks
+            print(f"   ⚠️  {profile.name} profile found no reviews, using generic extraction")
+    
+    if engine == 'lxml':
+        page = collect_page_text_lxml(html_content, root=root)
+    else:
+        page = collect_page_text_bs4(html_content)
+    
+    return categorize_page_text(page, SEPARATOR_KEYWORDS)
+
+def extract_profile_blocks(profile, root):
+    """
+    Text blocks of a recognized page from its site profile
     
-    # Remove script, style, and other non-visible elements
-    for element in soup(['script', 'style', 'meta', 'link', 'noscript', 'iframe']):
-        element.decompose()
+    Only the review bodies are returned (no separator split, no generic
+    paragraph/div scan). Their visit dates and ratings are kept in the
+    visit_dates and review_ratings maps (review text -> value).
+    
+    Args:
+        profile: ExtractorProfile selected for the page
+        root: Parsed page (lxml)
+    
+    Returns:
+        Dictionary like categorize_page_text plus profile, visit_dates and review_ratings
+    """
+    title = root.find('.//title')
+    heading = root.find('.//h1')
+    etree.strip_elements(root, *NON_VISIBLE_TAGS, with_tail=False)
+    
+    text_blocks = {
+        'title': clean_text(title.text or '') if title is not None else '',
+        'restaurant_info': [],
+        'reviews': [],
+        'ratings': [],
+        'descriptions': [],
+        'other_text': [],
+        'profile': profile.name,
+        'visit_dates': {},
+        'review_ratings': {}
+    }
+    if text_blocks['title']:
+        print(f"   📝 Title: {text_blocks['title']}")
+    if heading is not None and clean_text(heading.text_content()):
+        text_blocks['restaurant_info'].append(f"Restaurant Name: {clean_text(heading.text_content())}")
+    
+    for review in profile.extract(root):
+        text = review['text']
+        # The same review can appear twice (e.g. collapsed and expanded copies)
+        if text in text_blocks['visit_dates']:
+            continue
+        text_blocks['reviews'].append(text)
+        text_blocks['visit_dates'][text] = review['visit_date']
+        text_blocks['review_ratings'][text] = review['rating']
+    
+    print(f"   🧭 {profile.name} profile: {len(text_blocks['reviews'])} reviews")
+    return text_blocks
+
+def categorize_page_text(page, SEPARATOR_KEYWORDS = None):
+    """
+    Split collected page texts into blocks and sort them into categories
+    
+    Args:
+        page: Output of collect_page_text_bs4 / collect_page_text_lxml
     
+    Returns:
+        Dictionary with organized text blocks
+    """
     text_blocks = {
         'title': '',
         'restaurant_info': [],
@@ -151,85 +356,60 @@ def extract_text_blocks(html_file, SEPARATOR_KEYWORDS = None):
         'other_text': []
     }
     
+    # Separator, citation and category rules compiled once per SEPARATOR_KEYWORDS
+    rules = get_extraction_rules(SEPARATOR_KEYWORDS)
+    dedup = SentenceDedupIndex()
+    
     # Extract page title
-    if soup.title:
-        text_blocks['title'] = clean_text(soup.title.string)
+    if page['title']:
+        text_blocks['title'] = page['title']
         print(f"   📝 Title: {text_blocks['title']}")
     
     # Extract restaurant name and basic info
-    restaurant_name = soup.find('h1')
-    if restaurant_name:
-        text_blocks['restaurant_info'].append(f"Restaurant Name: {clean_text(restaurant_name.get_text())}")
+    if page['heading'] is not None:
+        text_blocks['restaurant_info'].append(f"Restaurant Name: {page['heading']}")
+        dedup.add('restaurant_info', text_blocks['restaurant_info'][-1])
     
     # Extract all paragraphs first (natural separators)
-    all_paragraphs = []
-    for p in soup.find_all('p'):
-        text = clean_text(p.get_text())
-        if len(text) > 30:
-            all_paragraphs.append(text)
+    all_paragraphs = [text for text in page['paragraphs'] if len(text) > 30]
     
     # Split paragraphs by separator keywords
     for paragraph in all_paragraphs:
-        if SEPARATOR_KEYWORDS != None: split_blocks = split_by_separators(paragraph, SEPARATOR_KEYWORDS)
-        for block in split_blocks:
+        for block in rules.split(paragraph):
             # Categorize the block
-            if any(word in block.lower() for word in ['review', 'visited', 'stayed', 'experience', 'excellent', 'terrible', 'good', 'bad']):
-                text_blocks['reviews'].append(block)
-            elif any(char.isdigit() for char in block) and any(word in block.lower() for word in ['rating', 'star', 'score']):
-                text_blocks['ratings'].append(block)
-            else:
-                text_blocks['descriptions'].append(block)
+            category = rules.paragraph_category(block)
+            text_blocks[category].append(block)
+            dedup.add(category, block)
     
     # Extract all reviews (TripAdvisor specific selectors)
-    review_containers = soup.find_all(['div', 'span'], class_=re.compile(r'review|comment', re.I))
-    
-    for container in review_containers:
-        # Get text preserving paragraph structure
-        text = clean_text(container.get_text(separator='\n', strip=True))
-        
+    for text in page['containers']:
         if len(text) > 50:
             # Split by newlines (paragraph breaks) first
             paragraphs = [p.strip() for p in text.split('\n') if p.strip()]
             
             for para in paragraphs:
                 # Further split by separator keywords (including bullet point •)
-                split_blocks = split_by_separators(para, SEPARATOR_KEYWORDS)
-                
-                for block in split_blocks:
+                for block in rules.split(para):
                     # Check for duplicate sentences before adding
-                    if any(word in block.lower() for word in ['review', 'visited', 'stayed', 'experience']):
-                        if block not in text_blocks['reviews'] and not has_duplicate_sentence(block, text_blocks['reviews']):
-                            text_blocks['reviews'].append(block)
-                    elif any(char.isdigit() for char in block) and any(word in block.lower() for word in ['rating', 'star', 'score']):
-                        if block not in text_blocks['ratings'] and not has_duplicate_sentence(block, text_blocks['ratings']):
-                            text_blocks['ratings'].append(block)
-                    else:
-                        if block not in text_blocks['other_text'] and not has_duplicate_sentence(block, text_blocks['other_text']):
-                            text_blocks['other_text'].append(block)
+                    category = rules.container_category(block)
+                    if not dedup.is_duplicate(block, (category,)):
+                        text_blocks[category].append(block)
+                        dedup.add(category, block)
     
     # Extract all divs with substantial text
-    for div in soup.find_all('div'):
-        # Get text preserving structure with newlines
-        text = clean_text(div.get_text(separator='\n', strip=True))
-        
+    block_categories = [key for key, value in text_blocks.items() if isinstance(value, list)]
+    for text in page['divs']:
         if len(text) > 50:
             # Split by newlines (paragraph breaks)
             paragraphs = [p.strip() for p in text.split('\n') if p.strip() and len(p.strip()) > 30]
             
             for para in paragraphs:
                 # Further split by separator keywords (including bullet point •)
-                split_blocks = split_by_separators(para, SEPARATOR_KEYWORDS)
-                
-                for block in split_blocks:
+                for block in rules.split(para):
                     # Check if it's not already captured (exact match or duplicate sentences)
-                    is_duplicate = False
-                    for existing_list in text_blocks.values():
-                        if isinstance(existing_list, list):
-                            if block in existing_list or has_duplicate_sentence(block, existing_list):
-                                is_duplicate = True
-                                break
-                    if not is_duplicate:
+                    if not dedup.is_duplicate(block, block_categories):
                         text_blocks['other_text'].append(block)
+                        dedup.add('other_text', block)
     
     # Remove duplicates while preserving order
     for key in text_blocks:
@@ -321,7 +501,7 @@ def save_text_blocks(text_blocks, html_filename, OUTPUT_FOLDER):
         f.write("=" * 80 + "\n")
     
     # Print statistics
-    total_blocks = sum(len(v) if isinstance(v, list) else 1 for v in text_blocks.values() if v)
+    total_blocks = (1 if text_blocks['title'] else 0) + sum(len(v) for v in text_blocks.values() if isinstance(v, list))
     print(f"✅ Extraction complete!")
     print(f"\n📊 Statistics:")
     print(f"   • Restaurant info blocks: {len(text_blocks['restaurant_info'])}")
@@ -333,21 +513,126 @@ def save_text_blocks(text_blocks, html_filename, OUTPUT_FOLDER):
     
     return output_file
 
-def extract_text_fun(SEPARATOR_KEYWORDS, CACHE_FOLDER):
+def build_block_records(text_blocks, source_file, min_length=30):
+    """
+    Turn extracted text blocks into typed records for direct ingestion
+    
+    Args:
+        text_blocks: Dictionary from extract_text_blocks
+        source_file: HTML file the blocks come from
+        min_length: Minimum block length
+    
+    Returns:
+        List of dicts with text, category, source_file, visit_date, rating and length
+        (visit_date is None unless a site profile found it; ingestion fills it
+        in from the text)
+    """
+    visit_dates = text_blocks.get('visit_dates', {})
+    ratings = text_blocks.get('review_ratings', {})
+    records = []
+    for category in RECORD_CATEGORIES:
+        for block in text_blocks.get(category, []):
+            # Short "other" blocks were never written to the text file either
+            if len(block) <= min_length or (category == 'other_text' and len(block) <= 50):
+                continue
+            records.append({
+                'text': block,
+                'category': category,
+                'source_file': os.path.basename(source_file),
+                'visit_date': visit_dates.get(block),
+                'rating': ratings.get(block),
+                'length': len(block)
+            })
+    return records
+
+def extract_file_blocks(html_file, SEPARATOR_KEYWORDS, engine='lxml', profiles=True):
+    """
+    Process pool task: extract one HTML file
+    
+    Returns:
+        Tuple (html_file, text_blocks, seconds)
+    """
+    start = time.time()
+    text_blocks = extract_text_blocks(html_file, SEPARATOR_KEYWORDS, engine=engine, profiles=profiles)
+    return html_file, text_blocks, time.time() - start
+
+def resolve_extraction_workers(extraction_workers, n_files):
+    """Worker processes for n_files ('auto' = one per file up to the available cores)"""
+    if extraction_workers == 'auto':
+        try:
+            # CPUs this process may run on (cgroup/affinity aware)
+            workers = len(os.sched_getaffinity(0))
+        except AttributeError:
+            workers = os.cpu_count() or 1
+    else:
+        workers = max(1, int(extraction_workers))
+    return max(1, min(workers, n_files))
+
+def merge_file_records(file_results):
+    """
+    Merge per-file blocks into one record list with cross-file dedup
+    
+    Files are merged in the given order. A block is dropped when an earlier
+    file already produced it or shares a non-quoted sentence with it (the
+    same hashed sentence check as within a file); dedup inside a file is
+    left as extract_text_blocks did it.
+    
+    Args:
+        file_results: List of (html_file, text_blocks) tuples
+    
+    Returns:
+        Tuple (records, duplicates_dropped)
+    """
+    dedup = SentenceDedupIndex()
+    records = []
+    dropped = 0
+    for html_file, text_blocks in file_results:
+        file_records = build_block_records(text_blocks, html_file)
+        kept = [r for r in file_records if not dedup.is_duplicate(r['text'], RECORD_CATEGORIES)]
+        dropped += len(file_records) - len(kept)
+        # Index after the whole file so blocks of one file never drop each other
+        for record in kept:
+            dedup.add(record['category'], record['text'])
+        records.extend(kept)
+    return records, dropped
+
+def extract_text_fun(SEPARATOR_KEYWORDS, CACHE_FOLDER, save_text_file=True, engine='lxml',
+                     extraction_workers='auto', return_stats=False, extraction_profiles=True):
+    """
+    Extract review blocks from every HTML file in CACHE_FOLDER
+    
+    Files are extracted in parallel worker processes and their blocks merged
+    with cross-file duplicate removal.
+    
+    Args:
+        SEPARATOR_KEYWORDS: Keywords that split text into blocks
+        CACHE_FOLDER: Job cache folder with the downloaded HTML
+        save_text_file: Also write the human-readable <name>_text.txt (debug artifact)
+        engine: HTML extraction engine, 'lxml' or 'bs4'
+        extraction_workers: Worker processes ('auto' = one per file up to the cores, 1 = in-process)
+        return_stats: Also return the per-file extraction statistics
+        extraction_profiles: Use site extractor profiles for recognized pages
+    
+    Returns:
+        List of typed block records (see build_block_records), or the tuple
+        (records, stats) when return_stats is True
+    """
     # Configuration
     OUTPUT_FOLDER = CACHE_FOLDER  # Use the provided cache folder
     # Create output folder
     os.makedirs(OUTPUT_FOLDER, exist_ok=True)
     
+    stats = {'files': [], 'workers': 0, 'wall_time': 0.0, 'duplicates_dropped': 0}
+    
     # Clean up old extracted text files
     print("🧹 Cleaning up old extracted text files...")
     for old_file in os.listdir(OUTPUT_FOLDER):
-        if old_file.endswith('.txt'):
+        # Download metadata (source URL) is needed for profile selection
+        if old_file.endswith('.txt') and not old_file.endswith('_metadata.txt'):
             old_path = os.path.join(OUTPUT_FOLDER, old_file)
             os.remove(old_path)
             print(f"   Deleted: {old_file}")
     
-    """Main function"""
     print("=" * 80)
     print("TEXT EXTRACTOR FROM HTML")
     print("=" * 80)
@@ -355,34 +640,64 @@ def extract_text_fun(SEPARATOR_KEYWORDS, CACHE_FOLDER):
     # Find HTML files in cache folder
     if not os.path.exists(CACHE_FOLDER):
         print(f"❌ Cache folder not found: {CACHE_FOLDER}")
-        return
+        return ([], stats) if return_stats else []
     
     html_files = [f for f in os.listdir(CACHE_FOLDER) if f.endswith('.html')]
     
     if not html_files:
         print(f"❌ No HTML files found in {CACHE_FOLDER}")
         print("   Please run download_page.py first")
-        return
+        return ([], stats) if return_stats else []
     
-    # Sort files by modification time (newest first)
+    # Sort files by modification time (newest first); blocks of newer files win duplicates
     html_files.sort(key=lambda f: os.path.getmtime(os.path.join(CACHE_FOLDER, f)), reverse=True)
+    html_paths = [os.path.join(CACHE_FOLDER, f) for f in html_files]
     
     print(f"\n📂 Found {len(html_files)} HTML file(s) in cache folder:")
     for i, file in enumerate(html_files, 1):
         print(f"   {i}. {file}")
     
-    # Process the most recent file (first in sorted list)
-    html_file = os.path.join(CACHE_FOLDER, html_files[0])
-    print(f"\n🎯 Processing newest file: {html_files[0]}")
-    
-    # Extract text blocks
-    text_blocks = extract_text_blocks(html_file, SEPARATOR_KEYWORDS)
-    
-    # Save to file
-    output_file = save_text_blocks(text_blocks, html_file,OUTPUT_FOLDER)
-    
-    print(f"\n🎉 Text extraction complete!")
+    workers = resolve_extraction_workers(extraction_workers, len(html_paths))
+    print(f"\n🎯 Processing {len(html_paths)} file(s) with {workers} worker(s)")
+    
+    start = time.time()
+    if workers == 1:
+        results = [extract_file_blocks(path, SEPARATOR_KEYWORDS, engine, extraction_profiles)
+                   for path in html_paths]
+    else:
+        # spawn: the API process may already run torch/OpenMP threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            results = list(executor.map(
+                extract_file_blocks, html_paths,
+                [SEPARATOR_KEYWORDS] * len(html_paths), [engine] * len(html_paths),
+                [extraction_profiles] * len(html_paths)
+            ))
+    wall_time = time.time() - start
+    
+    records, dropped = merge_file_records([(path, blocks) for path, blocks, _ in results])
+    
+    for html_file, text_blocks, seconds in results:
+        n_blocks = sum(len(text_blocks.get(category, [])) for category in RECORD_CATEGORIES)
+        stats['files'].append({
+            'file': os.path.basename(html_file),
+            'seconds': round(seconds, 3),
+            'blocks': n_blocks,
+            'profile': text_blocks.get('profile', 'generic')
+        })
+        print(f"   ⏱️  {os.path.basename(html_file)}: {seconds:.2f}s, {n_blocks} blocks")
+        # Save to file
+        if save_text_file:
+            save_text_blocks(text_blocks, html_file, OUTPUT_FOLDER)
+    
+    stats['workers'] = workers
+    stats['wall_time'] = round(wall_time, 3)
+    stats['duplicates_dropped'] = dropped
+    
+    if dropped:
+        print(f"\n🔁 Dropped {dropped} block(s) duplicated across files")
+    print(f"\n🎉 Text extraction complete! {len(records)} blocks from {len(results)} file(s) "
+          f"ready for analysis ({wall_time:.2f}s)")
 
     
     print("\n" + "=" * 80)
-
+    return (records, stats) if return_stats else records
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compiled block splitting and categorization rules for text extraction
+The separator keywords, citation patterns and category keyword lists are
+compiled once per separator configuration and shared by every file and job
+in the process (get_extraction_rules is cached).
+"""
+
+import re
+from functools import lru_cache
+
+CITATION_PATTERN = re.compile(
+    r'["\'].*?["\']'      # "quoted" or 'quoted'
+    r'|\[.*?\]'           # [citation]
+    r'|\(.*?\)'           # (reference)
+    r'|according to|said|quoted|states|mentioned',
+    re.IGNORECASE
+)
+
+# Paragraph blocks with these words are reviews, otherwise descriptions
+PARAGRAPH_REVIEW_WORDS = ('review', 'visited', 'stayed', 'experience', 'excellent', 'terrible', 'good', 'bad')
+# Review-container and div blocks with these words are reviews, otherwise other_text
+CONTAINER_REVIEW_WORDS = ('review', 'visited', 'stayed', 'experience')
+RATING_WORDS = ('rating', 'star', 'score')
+
+
+def _substring_pattern(words):
+    """Alternation matching any of words as a substring (longest first)"""
+    return re.compile('|'.join(re.escape(w) for w in sorted(words, key=len, reverse=True)))
+
+
+def _separators_interact(separators):
+    """
+    True if a single left-to-right split can differ from one pass per separator
+
+    That happens when a separator has leading/trailing whitespace (the passes
+    strip blocks between separators), contains another separator, or ends
+    with the start of another one (the passes re-join separator and text).
+    """
+    for a in separators:
+        if a != a.strip():
+            return True
+        for b in separators:
+            if a is b:
+                continue
+            if b in a:
+                return True
+            if any(a.endswith(b[:k]) for k in range(1, len(b))):
+                return True
+    return False
+
+
+def _split_sequential(text, separators):
+    """Original split: one pass over all blocks per separator"""
+    blocks = [text]
+    for separator in separators:
+        new_blocks = []
+        for block in blocks:
+            parts = block.split(separator)
+            if len(parts) > 1:
+                if parts[0].strip():
+                    new_blocks.append(parts[0].strip())
+                for part in parts[1:]:
+                    if part.strip():
+                        new_blocks.append(separator + part.strip())
+            elif block.strip():
+                new_blocks.append(block.strip())
+        blocks = new_blocks
+    return blocks
+
+
+class ExtractionRules:
+    """
+    Block splitting, citation and category rules of extract_text_fun
+
+    Args:
+        separators: Separator keywords (SEPARATOR_KEYWORDS)
+    """
+
+    def __init__(self, separators):
+        self.separators = tuple(s for s in separators if s)
+        # One alternation instead of one split pass per separator. It gives the
+        # blocks of the sequential passes unless separators interact (see
+        # _separators_interact); such configurations keep the sequential passes.
+        self.sequential = _separators_interact(self.separators)
+        self.separator_pattern = _substring_pattern(self.separators) if self.separators else None
+        self.paragraph_review = _substring_pattern(PARAGRAPH_REVIEW_WORDS)
+        self.container_review = _substring_pattern(CONTAINER_REVIEW_WORDS)
+        self.rating = _substring_pattern(RATING_WORDS)
+
+    def split(self, text, min_length=20):
+        """
+        Split text before every separator keyword
+
+        Same blocks as split_by_separators: every block after the first starts
+        with its separator, blocks are stripped and blocks of min_length or
+        fewer characters are dropped.
+        """
+        if self.separator_pattern is None:
+            blocks = [text.strip()]
+        elif self.sequential:
+            blocks = _split_sequential(text, self.separators)
+        else:
+            blocks = []
+            matches = list(self.separator_pattern.finditer(text))
+            first = text[:matches[0].start()] if matches else text
+            if first.strip():
+                blocks.append(first.strip())
+            for i, match in enumerate(matches):
+                end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+                rest = text[match.end():end].strip()
+                if rest:
+                    blocks.append(match.group(0) + rest)
+        return [b for b in blocks if len(b) > min_length]
+
+    def _is_rating(self, block, lowered):
+        return self.rating.search(lowered) is not None and any(map(str.isdigit, block))
+
+    def paragraph_category(self, block):
+        """Category of a block from a <p> element"""
+        lowered = block.lower()
+        if self.paragraph_review.search(lowered):
+            return 'reviews'
+        if self._is_rating(block, lowered):
+            return 'ratings'
+        return 'descriptions'
+
+    def container_category(self, block):
+        """Category of a block from a review/comment container"""
+        lowered = block.lower()
+        if self.container_review.search(lowered):
+            return 'reviews'
+        if self._is_rating(block, lowered):
+            return 'ratings'
+        return 'other_text'
+
+
+@lru_cache(maxsize=16)
+def _cached_rules(separators):
+    return ExtractionRules(separators)
+
+
+def get_extraction_rules(separators):
+    """Shared compiled rules for a separator configuration"""
+    return _cached_rules(tuple(separators or ()))
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-site extractor profiles for the review pages we crawl
+A profile is selected by the page URL (from the download's _metadata.txt or
+the page's canonical/og:url) or by a structural fingerprint, and reads review
+bodies, ratings and visit dates with targeted XPath selectors instead of the
+generic scan over every <p>, review container and <div>. Pages without a
+matching profile, or where the profile finds no reviews, use the generic
+heuristic of extract_text_fun.
+"""
+
+import os
+import re
+from datetime import date
+from urllib.parse import urlparse
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+ISO_DATE = re.compile(r'\b(\d{4})-(\d{2})-(\d{2})\b')
+# "October 1, 2025", "Oct 1 2025"
+MONTH_DAY_YEAR = re.compile(r'\b([A-Za-z]{3,9})\.?\s+(\d{1,2}),?\s+(\d{4})\b')
+# "September 2023" (TripAdvisor "Date of visit/stay")
+MONTH_YEAR = re.compile(r'\b([A-Za-z]{3,9})\.?\s+(\d{4})\b')
+# "10/1/2025" (US order, as Yelp renders it)
+NUMERIC_DATE = re.compile(r'\b(\d{1,2})/(\d{1,2})/(\d{4})\b')
+
+# "4.5 of 5 bubbles", "4 out of 5", "5 star rating", "Rated 4.0 stars", "bubble_45"
+RATING_OF_FIVE = re.compile(r'(\d(?:[.,]\d)?)\s*(?:of|out of|/)\s*5\b', re.IGNORECASE)
+RATING_STARS = re.compile(r'(\d(?:[.,]\d)?)\s*(?:-\s*)?stars?\b', re.IGNORECASE)
+RATING_BUBBLE_CLASS = re.compile(r'bubble_(\d)(\d)')
+
+
+def _iso_date(year, month, day):
+    """YYYY-MM-DD of a calendar date (None if it does not exist, e.g. 2025-02-30)"""
+    try:
+        return date(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        return None
+
+
+def normalize_visit_date(text):
+    """
+    Date string of a review page in YYYY-MM-DD format
+
+    Month-only dates ("September 2023") map to the first of the month;
+    relative dates ("2 weeks ago") and impossible dates give None.
+    """
+    if not text:
+        return None
+    match = ISO_DATE.search(text)
+    if match:
+        return _iso_date(*match.groups())
+    match = MONTH_DAY_YEAR.search(text)
+    if match and match.group(1)[:3].lower() in MONTHS:
+        return _iso_date(match.group(3), MONTHS[match.group(1)[:3].lower()], match.group(2))
+    match = NUMERIC_DATE.search(text)
+    if match:
+        return _iso_date(match.group(3), match.group(1), match.group(2))
+    match = MONTH_YEAR.search(text)
+    if match and match.group(1)[:3].lower() in MONTHS:
+        return _iso_date(match.group(2), MONTHS[match.group(1)[:3].lower()], 1)
+    return None
+
+
+def normalize_rating(text):
+    """Rating on the 1-5 scale from an aria-label, title or class string (None if absent)"""
+    if not text:
+        return None
+    match = RATING_BUBBLE_CLASS.search(text)
+    if match:
+        return int(match.group(1)) + int(match.group(2)) / 10
+    match = RATING_OF_FIVE.search(text) or RATING_STARS.search(text)
+    if match:
+        rating = float(match.group(1).replace(',', '.'))
+        if 0 < rating <= 5:
+            return rating
+    return None
+
+
+def _text_of(node):
+    """Visible text of an XPath result (element, attribute or text node)"""
+    if isinstance(node, str):
+        return str(node)
+    return node.text_content()
+
+
+class ExtractorProfile:
+    """
+    Targeted selectors for one review site
+
+    Args:
+        name: Profile name (reported in the extraction output)
+        site_names: Domain labels of the site ('yelp' matches www.yelp.com, yelp.co.uk, ...)
+        fingerprints: Absolute XPaths; any match identifies a saved page of the site
+        review_xpath: Absolute XPath of one element per review
+        body_xpath: XPath (relative to the review) of the review text; the first
+            non-empty match is used
+        rating_xpath: Relative XPath of rating strings (aria-label, title or class)
+        date_xpath: Relative XPath of date strings; the first parseable one is used
+        path_prefix: Optional URL path prefix (or host label) required besides the site name
+    """
+
+    def __init__(self, name, site_names, fingerprints, review_xpath, body_xpath,
+                 rating_xpath=None, date_xpath=None, path_prefix=None):
+        self.name = name
+        self.site_names = tuple(site_names)
+        self.fingerprints = tuple(fingerprints)
+        self.review_xpath = review_xpath
+        self.body_xpath = body_xpath
+        self.rating_xpath = rating_xpath
+        self.date_xpath = date_xpath
+        self.path_prefix = path_prefix
+
+    def matches_url(self, url):
+        """True if url belongs to the site"""
+        parsed = urlparse(url if '//' in url else '//' + url)
+        labels = (parsed.hostname or '').lower().split('.')
+        if not any(name in labels for name in self.site_names):
+            return False
+        if self.path_prefix is None:
+            return True
+        # google.com/maps/... as well as maps.google.com and maps.app.goo.gl
+        return parsed.path.startswith(self.path_prefix) or self.path_prefix.strip('/') in labels
+
+    def matches_page(self, root):
+        """True if the parsed page carries one of the site's fingerprints"""
+        return any(root.xpath(fingerprint) for fingerprint in self.fingerprints)
+
+    def extract(self, root):
+        """
+        Reviews of a parsed page
+
+        Returns:
+            List of dicts with text, rating and visit_date (rating and
+            visit_date are None where the page has none)
+        """
+        reviews = []
+        for review in root.xpath(self.review_xpath):
+            text = ''
+            for node in review.xpath(self.body_xpath):
+                text = re.sub(r'\s+', ' ', _text_of(node)).strip()
+                if text:
+                    break
+            if not text:
+                continue
+
+            rating = None
+            if self.rating_xpath:
+                for node in review.xpath(self.rating_xpath):
+                    rating = normalize_rating(_text_of(node))
+                    if rating is not None:
+                        break
+
+            visit_date = None
+            if self.date_xpath:
+                for node in review.xpath(self.date_xpath):
+                    visit_date = normalize_visit_date(_text_of(node))
+                    if visit_date is not None:
+                        break
+
+            reviews.append({'text': text, 'rating': rating, 'visit_date': visit_date})
+        return reviews
+
+
+def _class_contains(name):
+    """XPath predicate for a whole class token"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+TRIPADVISOR = ExtractorProfile(
+    name='tripadvisor',
+    site_names=('tripadvisor',),
+    fingerprints=(
+        "//meta[@property='og:site_name'][contains(translate(@content, 'TRIPADVISOR', 'tripadvisor'), 'tripadvisor')]",
+        "//*[@data-automation='reviewCard']",
+    ),
+    review_xpath=f"//*[@data-automation='reviewCard'] | //div[{_class_contains('review-container')}]",
+    body_xpath=(".//*[@data-automation='reviewText'] | .//q"
+                f" | .//p[{_class_contains('partial_entry')}] | .//*[{_class_contains('reviewText')}]"),
+    rating_xpath=(f".//*[contains(@class, 'ui_bubble_rating')]/@class"
+                  " | .//*[local-name()='svg']/*[local-name()='title']/text()"
+                  " | .//*[contains(@aria-label, 'of 5')]/@aria-label"),
+    date_xpath=(".//@data-visit-date"
+                " | .//*[contains(text(), 'Date of visit') or contains(text(), 'Date of stay')"
+                " or contains(text(), 'Date of experience')]")
+)
+
+YELP = ExtractorProfile(
+    name='yelp',
+    site_names=('yelp',),
+    fingerprints=(
+        "//meta[@property='og:site_name'][@content='Yelp']",
+        "//p[starts-with(@class, 'comment__')]",
+    ),
+    review_xpath="//li[.//p[starts-with(@class, 'comment__')]] | //*[@data-review-id][.//p[starts-with(@class, 'comment__')]]",
+    body_xpath=".//p[starts-with(@class, 'comment__')]",
+    rating_xpath=".//*[@role='img'][contains(@aria-label, 'star')]/@aria-label",
+    date_xpath=".//span/text()"
+)
+
+GOOGLE_MAPS = ExtractorProfile(
+    name='google_maps',
+    site_names=('google', 'goo'),
+    path_prefix='/maps',
+    fingerprints=(
+        "//*[@data-review-id][.//*[@role='img'][contains(@aria-label, 'star')]]",
+    ),
+    # Expanded and collapsed copies of a review both carry data-review-id; keep the outer one
+    review_xpath="//*[@data-review-id][not(ancestor::*[@data-review-id])]",
+    body_xpath=f".//span[{_class_contains('wiI7pd')}] | .//*[@data-expandable-section]",
+    rating_xpath=".//*[@role='img'][contains(@aria-label, 'star')]/@aria-label",
+    date_xpath=f".//span[{_class_contains('rsqaWe')}]/text() | .//@data-review-date"
+)
+
+# Order matters for fingerprint detection: the first matching profile wins
+EXTRACTOR_PROFILES = (TRIPADVISOR, YELP, GOOGLE_MAPS)
+
+
+def read_page_url(html_file):
+    """Source URL of a downloaded page from its _metadata.txt (None if absent)"""
+    metadata_file = os.path.splitext(html_file)[0] + '_metadata.txt'
+    if not os.path.exists(metadata_file):
+        return None
+    with open(metadata_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('URL:'):
+                return line[len('URL:'):].strip() or None
+    return None
+
+
+def select_profile(root, url=None):
+    """
+    Extractor profile of a parsed page
+
+    Args:
+        root: lxml document root (before non-visible tags are stripped)
+        url: Source URL of the page, if known
+
+    Returns:
+        ExtractorProfile or None for unknown pages
+    """
+    urls = [url] if url else []
+    # Saved pages usually keep their own address
+    urls += [str(u) for u in root.xpath("//link[@rel='canonical']/@href | //meta[@property='og:url']/@content")]
+    for candidate in urls:
+        for profile in EXTRACTOR_PROFILES:
+            if profile.matches_url(candidate):
+                return profile
+
+    for profile in EXTRACTOR_PROFILES:
+        if profile.matches_page(root):
+            return profile
+    return None
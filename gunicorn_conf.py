@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gunicorn configuration for the pre-fork (copy-on-write) startup mode
+
+The master imports main_api with PRELOAD_MODELS=1, which loads the sentiment
+model, MiniLM and the FAISS knowledge-base index once. Workers are forked
+afterwards and share those pages copy-on-write instead of each loading
+their own copy.
+
+Usage:
+    gunicorn -c gunicorn_conf.py main_api:app
+
+Note: jobs_db and the chatbot sessions are still per-process dicts, so with
+more than one worker a job's status/results requests must reach the worker
+that ran it (sticky routing) or a shared job store is needed.
+"""
+
+import gc
+import os
+
+# Read by main_api at import time (the master imports it once with preload_app)
+os.environ.setdefault('PRELOAD_MODELS', '1')
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'uvicorn.workers.UvicornWorker'
+preload_app = True
+# Analysis jobs run in background tasks; keep slow requests from being killed
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 600))
+
+
+def when_ready(server):
+    """Freeze everything allocated during preload before the first fork"""
+    # Objects in the permanent generation are never scanned by the cyclic GC,
+    # so collections in the workers don't write to (and un-share) their pages
+    gc.collect()
+    gc.freeze()
+    server.log.info(f"Preloaded models frozen: {gc.get_freeze_count()} objects shared with workers")
+
+
+def post_fork(server, worker):
+    """Give every worker an equal share of the cores for torch intra-op threads"""
+    try:
+        import torch
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+        torch.set_num_threads(max(1, cores // workers))
+    except ImportError:
+        pass
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cross-job dynamic micro-batching for the shared sentiment model
+Concurrent jobs (FastAPI background tasks run in threads) submit texts to one
+scheduler thread per model. It coalesces texts from all jobs into batches of up
+to max_batch_size, or whatever is pending once the oldest text has waited
+max_wait_ms, runs them on the shared model and resolves each submission's
+future. Jobs are served round-robin so a large job cannot starve a small one.
+
+Any local text scorer can use it via submit(job_id, texts) - campaign
+predictions currently go to Groq and do not touch the local model.
+"""
+
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from sentiment_inference import classify_texts_batched
+
+logger = logging.getLogger(__name__)
+
+
+class _Submission:
+    """One submit() call: its texts, partial results and future"""
+
+    def __init__(self, job_id, texts, options):
+        self.job_id = job_id
+        self.options = options
+        self.results = [None] * len(texts)
+        self.remaining = len(texts)
+        self.future = Future()
+
+
+class InferenceScheduler:
+    """
+    Batches texts from many jobs onto one model
+
+    Args:
+        tokenizer: Tokenizer of the shared model
+        model: Shared sequence classification model (PyTorch or ONNX)
+        max_batch_size: Maximum texts per model call
+        max_wait_ms: Latency deadline for the oldest pending text
+        model_name: Name reported in stats()
+    """
+
+    def __init__(self, tokenizer, model, max_batch_size=64, max_wait_ms=20, model_name=None):
+        self.model_name = model_name
+        self.tokenizer = tokenizer
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+
+        # job_id -> deque of (submission, index, text, enqueued_at)
+        self._queues = OrderedDict()
+        self._pending = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+
+        self._metrics = {
+            'batches': 0,
+            'texts': 0,
+            'submissions': 0,
+            'max_queue_depth': 0,
+            'total_wait_ms': 0.0,
+            'total_batch_seconds': 0.0,
+            'jobs_per_batch_sum': 0
+        }
+
+        self._thread = threading.Thread(target=self._run, name='inference-scheduler', daemon=True)
+        self._thread.start()
+
+    def submit(self, job_id, texts, **options):
+        """
+        Queue texts for classification
+
+        Args:
+            job_id: Owner of the texts (fairness unit)
+            texts: List of input texts
+            **options: Keyword arguments for classify_texts_batched
+                (batch_size and on_batch are ignored - the scheduler sizes batches)
+
+        Returns:
+            Future resolving to the list of result dicts in input order
+        """
+        options.pop('batch_size', None)
+        options.pop('on_batch', None)
+        submission = _Submission(job_id, texts, options)
+        if not texts:
+            submission.future.set_result([])
+            return submission.future
+
+        now = time.time()
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError("Inference scheduler is stopped")
+            queue = self._queues.setdefault(job_id, deque())
+            queue.extend((submission, i, text, now) for i, text in enumerate(texts))
+            self._pending += len(texts)
+            self._metrics['submissions'] += 1
+            self._metrics['max_queue_depth'] = max(self._metrics['max_queue_depth'], self._pending)
+            self._cond.notify()
+        return submission.future
+
+    def classify(self, job_id, texts, timeout=None, **options):
+        """
+        Blocking submit()
+
+        Args:
+            timeout: Seconds to wait for the results (None = no limit); on
+                timeout the submission's queued texts are dropped
+
+        Raises:
+            TimeoutError: The results did not arrive within timeout
+        """
+        return self.wait(self.submit(job_id, texts, **options), timeout)
+
+    def wait(self, future, timeout=None):
+        """
+        Results of a submit() future
+
+        Args:
+            future: Future returned by submit()
+            timeout: Seconds to wait (None = no limit); on timeout the
+                submission's queued texts are dropped
+
+        Raises:
+            TimeoutError: The results did not arrive within timeout
+        """
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            self.cancel(future)
+            raise TimeoutError(f"Inference scheduler gave no result within {timeout}s")
+
+    def cancel(self, future):
+        """Drop the queued texts of the submission owning future"""
+        with self._cond:
+            for job_id, queue in list(self._queues.items()):
+                kept = deque(item for item in queue if item[0].future is not future)
+                self._pending -= len(queue) - len(kept)
+                if kept:
+                    self._queues[job_id] = kept
+                else:
+                    del self._queues[job_id]
+        if not future.done():
+            future.set_exception(TimeoutError("Submission cancelled"))
+
+    def _oldest_enqueued(self):
+        return min(queue[0][3] for queue in self._queues.values() if queue)
+
+    def _take_batch(self):
+        """
+        Round-robin one text per job until the batch is full
+
+        Only texts sharing the options of the first picked text join the batch,
+        since one model call uses one truncation policy.
+        """
+        batch = []
+        options = None
+        while len(batch) < self.max_batch_size:
+            progressed = False
+            for job_id in list(self._queues):
+                queue = self._queues[job_id]
+                if not queue or len(batch) >= self.max_batch_size:
+                    continue
+                if options is None:
+                    options = queue[0][0].options
+                elif queue[0][0].options != options:
+                    continue
+                batch.append(queue.popleft())
+                progressed = True
+            if not progressed:
+                break
+
+        # Rotate so the next batch starts with a different job
+        if self._queues:
+            self._queues.move_to_end(next(iter(self._queues)))
+        for job_id in [j for j, q in self._queues.items() if not q]:
+            del self._queues[job_id]
+
+        self._pending -= len(batch)
+        return batch, options or {}
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                with self._cond:
+                    while not self._stopped and self._pending == 0:
+                        self._cond.wait()
+                    if self._stopped and self._pending == 0:
+                        return
+
+                    # Wait for a full batch or the oldest text's deadline
+                    while self._pending < self.max_batch_size and not self._stopped:
+                        remaining = self.max_wait_ms / 1000.0 - (time.time() - self._oldest_enqueued())
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+
+                    batch, options = self._take_batch()
+
+                self._execute(batch, options)
+            except Exception as e:
+                # Never leave callers blocked on futures nobody will resolve
+                logger.exception(f"Inference scheduler loop failed: {e}")
+                self._fail_all(batch, e)
+
+    @staticmethod
+    def _fail(items, error):
+        for submission in {id(item[0]): item[0] for item in items}.values():
+            if not submission.future.done():
+                submission.future.set_exception(error)
+
+    def _fail_all(self, in_flight, error):
+        """Fail the in-flight batch and every queued submission"""
+        with self._cond:
+            queued = [item for queue in self._queues.values() for item in queue]
+            self._queues.clear()
+            self._pending = 0
+        self._fail(list(in_flight) + queued, error)
+
+    def _execute(self, batch, options):
+        started = time.time()
+        try:
+            results = classify_texts_batched(
+                [text for _, _, text, _ in batch], self.tokenizer, self.model,
+                batch_size=len(batch), **options
+            )
+        except Exception as e:
+            logger.error(f"Inference scheduler batch failed: {e}")
+            self._fail(batch, e)
+            return
+
+        elapsed = time.time() - started
+        with self._cond:
+            self._metrics['batches'] += 1
+            self._metrics['texts'] += len(batch)
+            self._metrics['total_batch_seconds'] += elapsed
+            self._metrics['total_wait_ms'] += sum((started - item[3]) * 1000.0 for item in batch)
+            self._metrics['jobs_per_batch_sum'] += len({item[0].job_id for item in batch})
+
+        for (submission, index, _, _), result in zip(batch, results):
+            if submission.future.done():
+                continue
+            submission.results[index] = result
+            submission.remaining -= 1
+            if submission.remaining == 0:
+                submission.future.set_result(submission.results)
+
+    def stats(self):
+        """Queue depth and batching metrics (exposed via /api/models)"""
+        with self._cond:
+            m = dict(self._metrics)
+            per_job = {str(job_id): len(queue) for job_id, queue in self._queues.items()}
+            depth = self._pending
+        batches = m['batches'] or 1
+        return {
+            'queue_depth': depth,
+            'queue_depth_per_job': per_job,
+            'max_queue_depth': m['max_queue_depth'],
+            'batches': m['batches'],
+            'texts': m['texts'],
+            'submissions': m['submissions'],
+            'avg_batch_size': m['texts'] / batches,
+            'avg_jobs_per_batch': m['jobs_per_batch_sum'] / batches,
+            'avg_wait_ms': m['total_wait_ms'] / m['texts'] if m['texts'] else 0.0,
+            'avg_batch_seconds': m['total_batch_seconds'] / batches,
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_ms
+        }
+
+    def stop(self, wait=True):
+        """Finish pending work and stop the scheduler thread (wait=False returns at once)"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if wait:
+            self._thread.join()
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_inference_scheduler(model_entry, max_batch_size=64, max_wait_ms=20):
+    """
+    Return the scheduler serving a model registry entry (created on first use)
+
+    Schedulers are keyed by the registry key, so a reloaded model gets a new
+    scheduler and the one serving the old model is retired.
+
+    Args:
+        model_entry: Entry from SentimentModelRegistry.get()
+    """
+    key = model_entry['registry_key']
+    with _schedulers_lock:
+        scheduler = _schedulers.get(key)
+        if scheduler is not None and scheduler.model is not model_entry['model']:
+            scheduler.stop(wait=False)
+            scheduler = None
+        if scheduler is None:
+            scheduler = InferenceScheduler(model_entry['tokenizer'], model_entry['model'],
+                                           max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                                           model_name=model_entry['model_name'])
+            _schedulers[key] = scheduler
+        return scheduler
+
+
+def retire_inference_scheduler(registry_key):
+    """Stop the scheduler of a registry key once its queued texts are done (e.g. after a reload)"""
+    with _schedulers_lock:
+        scheduler = _schedulers.pop(registry_key, None)
+    if scheduler is not None:
+        scheduler.stop(wait=False)
+
+
+def scheduler_stats():
+    """Stats of every running scheduler"""
+    with _schedulers_lock:
+        schedulers = list(_schedulers.values())
+    return [dict(model_name=s.model_name, **s.stats()) for s in schedulers]
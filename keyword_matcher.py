@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compiled multi-keyword matcher for the KEY_*_WORDS configuration lists
+A single alternation regex finds every keyword occurrence in one scan of the
+text, replacing one substring test per keyword.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+
+
+class KeywordMatcher:
+    """
+    Counts which configured keywords occur (as substrings) in a text
+
+    Matching is case-insensitive and equivalent to
+    sum(keyword.lower() in text.lower() for keyword in keywords),
+    including duplicate list entries.
+    """
+
+    def __init__(self, keywords):
+        lowered = [k.lower() for k in keywords]
+        self.multiplicity = Counter(lowered)
+        # An empty keyword is "in" every text
+        self.always_present = self.multiplicity.pop('', 0)
+
+        unique = sorted(self.multiplicity, key=len, reverse=True)
+        # Longest alternative first: at each position the lookahead reports the
+        # longest keyword starting there; shorter keywords starting at the same
+        # position are its prefixes and are added back via prefix_closure
+        self.pattern = re.compile(
+            '(?=(' + '|'.join(re.escape(k) for k in unique) + '))'
+        ) if unique else None
+        self.prefix_closure = {
+            m: [k for k in unique if m.startswith(k)]
+            for m in unique
+        }
+
+    def count(self, text_lower):
+        """Number of keyword list entries found in an already lowercased text"""
+        if self.pattern is None:
+            return self.always_present
+        present = set()
+        for match in set(self.pattern.findall(text_lower)):
+            present.update(self.prefix_closure[match])
+        return self.always_present + sum(self.multiplicity[k] for k in present)
+
+    def count_series(self, lowered_texts):
+        """Vectorized count over a pandas Series of lowercased texts"""
+        if self.pattern is None:
+            return lowered_texts.map(lambda _: self.always_present)
+        return lowered_texts.map(self.count)
+
+
+@lru_cache(maxsize=32)
+def _compiled(keywords):
+    return KeywordMatcher(keywords)
+
+
+def get_keyword_matcher(keywords):
+    """Return the compiled matcher for a keyword list (compiled once per list)"""
+    return _compiled(tuple(keywords))
@@ -11,6 +11,7 @@ from typing import Optional, Dict
 import os
 from datetime import datetime
 import logging
+import threading
 import uvicorn
 
 # Import your existing functions
@@ -23,10 +24,15 @@ from download_page_fun import download_page_fun
 from search_methods_fun import process_search_method
 from send_report_email_fun import send_report_email_fun
 from send_email import send_email
-from chatbot_analyzer import ResultsChatbot
+from chatbot_analyzer import ResultsChatbot, load_andrey_kb
 from insurance_calculator import calculate_insurance_risk
 from routes import Routes
 from cleanup_old_jobs import cleanup_old_jobs
+from sentiment_model_registry import get_model_registry
+from rescore import rescore_job
+from keyword_matcher import get_keyword_matcher
+from browser_pool import SELENIUM_AVAILABLE, browser_available, get_browser_pool, shutdown_browser_pool
+from sharded_inference import shutdown_sharded_classifiers
 from pipeline_helpers import (
     initialize_mlflow_tracking,
     setup_analysis_directories,
@@ -88,6 +94,89 @@ DEFAULT_PROMPT = config_data['DEFAULT_PROMPT']
 GROQ_API_KEY = config_data['GROQ_API_KEY']
 SMTP_CONFIG = config_data['SMTP_CONFIG']
 
+# Compile keyword matchers once per config (reused by every job)
+for keyword_list in (KEY_POSITIVE_WORDS, KEY_NEUTRAL_WORDS, KEY_NEGATIVE_WORDS):
+    get_keyword_matcher(keyword_list)
+
+# Shared sentiment models (loaded once, borrowed by every job)
+model_registry = get_model_registry()
+
+
+def warm_sentiment_models():
+    """Load the sentiment model before the first job arrives"""
+    try:
+        model_registry.register(
+            base_config.get('model_path', './my_volume/hf_model'),
+            device=base_config.get('device', -1),
+            cache_dir=base_config.get('cache_dir', '/tmp/hf_cache'),
+            backend=base_config.get('inference_backend', 'pytorch'),
+            quantize=base_config.get('onnx_quantize', False),
+            onnx_dir=base_config.get('onnx_dir')
+        )
+        for stats in model_registry.stats()['models']:
+            logger.info(f"Warm model: {stats['model_name']} - load {stats['load_time_seconds']}s, "
+                        f"RSS +{stats['rss_delta_mb']} MB")
+    except Exception as e:
+        # Jobs will fall back to loading the model on first use
+        logger.warning(f"Could not warm sentiment model at startup: {e}")
+
+
+def preload_shared_models():
+    """
+    Load every large read-only model into this process
+    
+    Under gunicorn with preload_app (see gunicorn_conf.py) this runs once in
+    the master before workers are forked, so the sentiment weights, MiniLM
+    and the FAISS index are shared copy-on-write instead of loaded per worker.
+    """
+    warm_sentiment_models()
+    load_andrey_kb(base_config.get('andrey_kb_path', '/app/ANDREYS_KNOWLEDGE_BASE.md'))
+
+
+if os.environ.get('PRELOAD_MODELS') == '1':
+    # Pre-fork mode: load in the gunicorn master at import time
+    preload_shared_models()
+else:
+    # Single uvicorn process: load when the app starts
+    app.on_event("startup")(warm_sentiment_models)
+
+
+def warm_browser_pool():
+    """
+    Launch headless browsers for page downloads before the first job
+
+    Browsers start in a background thread so app startup is not delayed,
+    and only when a browser binary is installed.
+    """
+    prewarm = base_config.get('browser_pool_prewarm', 1)
+    if not SELENIUM_AVAILABLE or prewarm <= 0:
+        return
+    if not browser_available():
+        logger.info("No Firefox or Chrome binary found, not warming the browser pool")
+        return
+    pool = get_browser_pool(
+        max_drivers=base_config.get('browser_pool_size', 2),
+        max_pages_per_driver=base_config.get('browser_pool_max_pages', 50),
+        checkout_timeout=base_config.get('browser_pool_checkout_timeout', 120)
+    )
+
+    def warm():
+        try:
+            launched = pool.warm(prewarm)
+            logger.info(f"Warm browsers: {launched} launched, "
+                        f"{pool.stats()['mean_launch_seconds']:.1f}s per launch")
+        except Exception as e:
+            # Downloads will launch browsers on demand (or fall back to requests)
+            logger.warning(f"Could not warm browser pool at startup: {e}")
+
+    threading.Thread(target=warm, name='browser-pool-warmup', daemon=True).start()
+
+
+# Browser processes are per worker: never started in the gunicorn master before fork
+app.on_event("startup")(warm_browser_pool)
+app.on_event("shutdown")(shutdown_browser_pool)
+app.on_event("shutdown")(shutdown_sharded_classifiers)
+
 
 def run_analysis_pipeline(
     job_id: str, 
@@ -184,6 +273,26 @@ def run_analysis_pipeline(
         handle_job_failure(job_id, jobs_db, e, tracker, MLFLOW_AVAILABLE)
 
 
+def rescore_analysis(job_id: str, overrides: dict) -> dict:
+    """
+    Re-threshold a finished job; unset overrides fall back to the current config
+    
+    Args:
+        job_id: Job whose outputs are rescored in place
+        overrides: confidence_threshold, sentence_length and key_*_words from RescoreRequest
+    """
+    options = {k: v for k, v in base_config.items() if k not in ('confidence_threshold', 'sentence_length')}
+    return rescore_job(
+        f"my_volume/sentiment_analysis/{job_id}",
+        overrides.get('confidence_threshold', base_config.get('confidence_threshold', 0.8)),
+        overrides.get('key_positive_words', KEY_POSITIVE_WORDS),
+        overrides.get('key_neutral_words', KEY_NEUTRAL_WORDS),
+        overrides.get('key_negative_words', KEY_NEGATIVE_WORDS),
+        overrides.get('sentence_length', SENTENCE_LENGTH),
+        **options
+    )
+
+
 # Chatbot storage (stores chatbot instances per job)
 chatbots: Dict[str, ResultsChatbot] = {}
 
@@ -194,7 +303,9 @@ routes_handler = Routes(
     run_analysis_pipeline=run_analysis_pipeline,
     names_config=names_config,
     base_config=base_config,
-    key_config=key_config
+    key_config=key_config,
+    model_registry=model_registry,
+    rescore_job=rescore_analysis
 )
 app.include_router(routes_handler.router)
 
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-worker memory report for the API server processes
+Reads /proc/<pid>/smaps_rollup of a server master and its workers and reports
+RSS, PSS and USS (private pages). USS is what each additional worker really
+costs. Comparing a plain uvicorn run with the gunicorn pre-fork mode shows how
+much of the model weights is shared.
+
+Usage:
+    python measure_worker_memory.py --pid <master pid> --label prefork --output prefork.json
+    python measure_worker_memory.py --compare single.json prefork.json
+"""
+
+import os
+import json
+import argparse
+
+ROLLUP_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty', 'Swap')
+
+
+def read_smaps_rollup(pid):
+    """Memory counters of one process in MB"""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup', 'r') as f:
+        for line in f:
+            parts = line.split()
+            key = parts[0].rstrip(':')
+            if key in ROLLUP_FIELDS:
+                values[key] = int(parts[1]) / 1024.0
+    values['Uss'] = values.get('Private_Clean', 0.0) + values.get('Private_Dirty', 0.0)
+    return values
+
+
+def child_pids(parent_pid):
+    """Direct children of a process"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # ppid is the 4th field; the command name (2nd) may contain spaces
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == parent_pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def measure(master_pid, label=None):
+    """
+    Memory report for a master process and its workers
+
+    Returns:
+        dict with per-process counters and worker totals
+    """
+    processes = [{'pid': master_pid, 'role': 'master', **read_smaps_rollup(master_pid)}]
+    for pid in child_pids(master_pid):
+        try:
+            processes.append({'pid': pid, 'role': 'worker', **read_smaps_rollup(pid)})
+        except OSError:
+            continue
+
+    workers = [p for p in processes if p['role'] == 'worker']
+    return {
+        'label': label,
+        'processes': processes,
+        'workers': len(workers),
+        'worker_uss_mb_mean': sum(p['Uss'] for p in workers) / len(workers) if workers else None,
+        'worker_rss_mb_mean': sum(p['Rss'] for p in workers) / len(workers) if workers else None,
+        'total_pss_mb': sum(p['Pss'] for p in processes)
+    }
+
+
+def print_report(report):
+    print(f"\n📊 Memory report{' - ' + report['label'] if report.get('label') else ''}")
+    print(f"   {'pid':>8} {'role':8} {'RSS MB':>9} {'PSS MB':>9} {'USS MB':>9} {'shared MB':>10}")
+    for p in report['processes']:
+        shared = p.get('Shared_Clean', 0.0) + p.get('Shared_Dirty', 0.0)
+        print(f"   {p['pid']:>8} {p['role']:8} {p['Rss']:9.1f} {p['Pss']:9.1f} {p['Uss']:9.1f} {shared:10.1f}")
+    if report['workers']:
+        print(f"   Workers: {report['workers']} | mean USS {report['worker_uss_mb_mean']:.1f} MB"
+              f" | mean RSS {report['worker_rss_mb_mean']:.1f} MB | total PSS {report['total_pss_mb']:.1f} MB")
+
+
+def compare(before, after):
+    """Print the per-worker unique memory difference between two reports"""
+    print_report(before)
+    print_report(after)
+    if before['worker_uss_mb_mean'] and after['worker_uss_mb_mean']:
+        saved = before['worker_uss_mb_mean'] - after['worker_uss_mb_mean']
+        print(f"\n✅ Unique memory per worker: {before['worker_uss_mb_mean']:.1f} MB -> "
+              f"{after['worker_uss_mb_mean']:.1f} MB ({saved:+.1f} MB saved per worker)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-worker RSS/PSS/USS of the API server")
+    parser.add_argument('--pid', type=int, help='PID of the uvicorn/gunicorn master')
+    parser.add_argument('--label', help='Name for this measurement (e.g. single, prefork)')
+    parser.add_argument('--output', help='Write the report as JSON')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='Compare two JSON reports')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], 'r') as f:
+            before = json.load(f)
+        with open(args.compare[1], 'r') as f:
+            after = json.load(f)
+        compare(before, after)
+    elif args.pid:
+        report = measure(args.pid, args.label)
+        print_report(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"💾 Report saved to: {args.output}")
+    else:
+        parser.error('either --pid or --compare is required')
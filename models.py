@@ -19,6 +19,15 @@ class AnalysisRequest(BaseModel):
     searchMethod: Optional[str] = "demo"  # keywords, urls, or demo
 
 
+class RescoreRequest(BaseModel):
+    """Request model for re-thresholding a finished job (unset fields use the config)"""
+    confidence_threshold: Optional[float] = None
+    sentence_length: Optional[int] = None
+    key_positive_words: Optional[list] = None
+    key_neutral_words: Optional[list] = None
+    key_negative_words: Optional[list] = None
+
+
 class JobStatus(BaseModel):
     """Status model for analysis job"""
     job_id: str
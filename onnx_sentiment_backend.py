@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ONNX Runtime backend for the sentiment analysis stage
+Exports the DistilBERT SST-2 model to ONNX (optionally int8-quantized) and
+runs it through onnxruntime on CPU. Includes a parity / throughput check
+against the PyTorch path.
+
+Requires the extras in requirements-onnx.txt (onnx, onnxruntime).
+
+Usage:
+    python onnx_sentiment_backend.py --model-path ./my_volume/hf_model --report onnx_parity_report.json
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Optional dependency - only needed when inference_backend: onnx
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+
+# Small fixture corpus for the parity check (mix of clear and borderline reviews)
+PARITY_FIXTURE_CORPUS = [
+    "Excellent food, great service! We will definitely come back.",
+    "The staff was rude and the soup was cold. Terrible experience.",
+    "It was okay. Nothing special, but nothing bad either.",
+    "Date of visit: October 1, 2025. We visited with the kids and loved the garden.",
+    "Overpriced for what you get, although the view is nice.",
+    "Waited forty minutes for a table even though we had a reservation.",
+    "Best ramen I have had outside of Japan, the broth was rich and balanced.",
+    "The temple was crowded, but the atmosphere in the evening made up for it.",
+    "Not worth the trip. Dirty tables and the toilets were out of order.",
+    "Friendly waiter, quick service and reasonable prices.",
+    "I would not recommend this place to anyone.",
+    "The dessert menu is small but everything we tried was delicious.",
+    "Average breakfast buffet, the coffee was weak.",
+    "Stayed two nights, the room was clean and quiet, staff were helpful.",
+    "They forgot our order twice and never apologized.",
+    "A hidden gem! Cozy interior and amazing cocktails.",
+    "The food was good but the music was far too loud to talk.",
+    "Absolutely horrible. Never again.",
+    "Great location near the station, easy to find.",
+    "Portions were tiny and the bill was huge. Disappointing."
+]
+
+
+DEFAULT_CACHE_DIR = '/tmp/hf_cache'
+
+
+# Identity of the checkpoint an export was made from, written next to the ONNX files
+SOURCE_STAMP_FILE = 'source_fingerprint.txt'
+
+
+def source_stamp(source):
+    """Fingerprint of a local checkpoint's files, or the hub model id"""
+    from sentiment_model_registry import checkpoint_fingerprint
+    return checkpoint_fingerprint(source) or source
+
+
+def default_onnx_dir(source, cache_dir=None):
+    """
+    Where the ONNX export of a model lives unless onnx_dir is configured
+
+    Local checkpoints get a directory per file fingerprint, so a retrained
+    checkpoint, or another checkpoint in a folder of the same name, is
+    exported afresh instead of reusing a stale graph.
+    """
+    if os.path.isdir(source):
+        name = f"{os.path.basename(os.path.normpath(source))}-{source_stamp(source)}"
+    else:
+        name = source.replace('/', '--')
+    return os.path.join(cache_dir or DEFAULT_CACHE_DIR, 'onnx', name)
+
+
+def _read_stamp(onnx_dir):
+    path = os.path.join(onnx_dir, SOURCE_STAMP_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().strip()
+
+
+def onnx_model_paths(onnx_dir):
+    """Return (fp32_path, int8_path) inside an ONNX export directory"""
+    return os.path.join(onnx_dir, 'model.onnx'), os.path.join(onnx_dir, 'model.int8.onnx')
+
+
+def export_onnx_model(model, tokenizer, onnx_dir, quantize=False, opset=14, stamp=None):
+    """
+    Export a HuggingFace sequence classification model to ONNX
+
+    Args:
+        model: PyTorch model (e.g. pipe.model)
+        tokenizer: Matching tokenizer
+        onnx_dir: Output directory
+        quantize: Also write a dynamically int8-quantized copy
+        opset: ONNX opset version
+        stamp: source_stamp() of the checkpoint; an export made from a
+            different checkpoint is discarded and redone
+
+    Returns:
+        Path to the model file that should be served
+    """
+    import torch
+
+    os.makedirs(onnx_dir, exist_ok=True)
+    fp32_path, int8_path = onnx_model_paths(onnx_dir)
+
+    if stamp is not None and _read_stamp(onnx_dir) != stamp:
+        for path in (fp32_path, int8_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    if not os.path.exists(fp32_path):
+        print(f"📦 Exporting sentiment model to ONNX: {fp32_path}")
+        model.eval()
+        sample = tokenizer(["export sample"], return_tensors='pt')
+
+        class LogitsOnly(torch.nn.Module):
+            # Export a plain tensor output instead of a ModelOutput object
+            def __init__(self, wrapped):
+                super().__init__()
+                self.wrapped = wrapped
+
+            def forward(self, input_ids, attention_mask):
+                return self.wrapped(input_ids=input_ids, attention_mask=attention_mask).logits
+
+        torch.onnx.export(
+            LogitsOnly(model),
+            (sample['input_ids'], sample['attention_mask']),
+            fp32_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=opset
+        )
+        tokenizer.save_pretrained(onnx_dir)
+        model.config.save_pretrained(onnx_dir)
+        if stamp is not None:
+            with open(os.path.join(onnx_dir, SOURCE_STAMP_FILE), 'w', encoding='utf-8') as f:
+                f.write(stamp)
+
+    if not quantize:
+        return fp32_path
+
+    if not os.path.exists(int8_path):
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        print(f"🗜️  Quantizing ONNX model to int8: {int8_path}")
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+class OnnxSentimentModel:
+    """
+    onnxruntime session exposing the parts of the HF model interface used by
+    sentiment_inference (config.id2label and predict_proba)
+    """
+
+    def __init__(self, onnx_path, config, intra_op_threads=None):
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime is not installed (pip install onnxruntime)")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(onnx_path, options, providers=['CPUExecutionProvider'])
+        self.onnx_path = onnx_path
+        self.config = config
+
+    def predict_proba(self, input_ids, attention_mask):
+        """Softmax probabilities for a padded int64 batch"""
+        logits = self.session.run(
+            ['logits'],
+            {'input_ids': input_ids.astype(np.int64), 'attention_mask': attention_mask.astype(np.int64)}
+        )[0]
+        logits = logits - logits.max(axis=1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=1, keepdims=True)
+
+    def size_mb(self):
+        return os.path.getsize(self.onnx_path) / (1024.0 * 1024.0)
+
+
+def load_onnx_backend(model_path, onnx_dir, quantize=False, intra_op_threads=None):
+    """
+    Load (exporting on first use) the ONNX sentiment model
+
+    Args:
+        model_path: Local model directory or HuggingFace model id used for export
+        onnx_dir: Directory holding the exported ONNX files
+        quantize: Serve the int8-quantized model
+        intra_op_threads: ONNX Runtime intra-op thread count (None = all cores)
+
+    Returns:
+        Tuple (tokenizer, OnnxSentimentModel)
+    """
+    from transformers import AutoConfig, AutoTokenizer
+
+    fp32_path, int8_path = onnx_model_paths(onnx_dir)
+    target = int8_path if quantize else fp32_path
+    stamp = source_stamp(model_path)
+
+    # Re-export when missing or made from another checkpoint (e.g. after retraining)
+    if not os.path.exists(target) or _read_stamp(onnx_dir) != stamp:
+        # Export needs the PyTorch weights once; they are dropped afterwards
+        from transformers import AutoModelForSequenceClassification
+        tokenizer = AutoTokenizer.from_pretrained(model_path)
+        torch_model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        target = export_onnx_model(torch_model, tokenizer, onnx_dir, quantize=quantize, stamp=stamp)
+        del torch_model
+
+    tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+    config = AutoConfig.from_pretrained(onnx_dir)
+    return tokenizer, OnnxSentimentModel(target, config, intra_op_threads)
+
+
+def _benchmark(texts, tokenizer, model, batch_size, repeats):
+    """Classify texts `repeats` times and return (results, texts_per_second)"""
+    from sentiment_inference import classify_texts_batched
+
+    results = classify_texts_batched(texts, tokenizer, model, batch_size=batch_size)
+    start = time.time()
+    for _ in range(repeats):
+        classify_texts_batched(texts, tokenizer, model, batch_size=batch_size)
+    elapsed = time.time() - start
+    return results, (len(texts) * repeats) / elapsed if elapsed > 0 else None
+
+
+def run_parity_check(model_path, onnx_dir=None, corpus=None, quantize=True, batch_size=16,
+                     repeats=3, report_path=None, cache_dir=None):
+    """
+    Compare ONNX (fp32 and optionally int8) against the PyTorch path
+
+    Reports label agreement, confidence deltas, throughput and memory for
+    every backend on a fixture corpus.
+
+    Args:
+        model_path: Local model directory or HuggingFace model id
+        onnx_dir: Directory for the ONNX export (default: the one the model registry uses)
+        corpus: List of texts (defaults to PARITY_FIXTURE_CORPUS)
+        quantize: Also evaluate the int8-quantized model
+        batch_size: Inference batch size
+        repeats: Timed passes over the corpus per backend
+        report_path: Optional JSON output path
+        cache_dir: HuggingFace cache directory (locates the default onnx_dir)
+
+    Returns:
+        dict: Comparison report
+    """
+    from sentiment_model_registry import SentimentModelRegistry, _current_rss_mb
+
+    texts = corpus or PARITY_FIXTURE_CORPUS
+    report = {'corpus_size': len(texts), 'batch_size': batch_size, 'backends': {}}
+
+    rss_before = _current_rss_mb()
+    reference_entry = SentimentModelRegistry()._load(model_path, -1, cache_dir)
+    if onnx_dir is None:
+        onnx_dir = default_onnx_dir(reference_entry['source'], cache_dir)
+    reference, reference_tps = _benchmark(texts, reference_entry['tokenizer'],
+                                          reference_entry['model'], batch_size, repeats)
+    report['backends']['pytorch'] = {
+        'texts_per_second': reference_tps,
+        'rss_delta_mb': reference_entry['rss_delta_mb'],
+        'parameter_mb': reference_entry['parameter_mb']
+    }
+    export_onnx_model(reference_entry['model'], reference_entry['tokenizer'], onnx_dir, quantize=quantize,
+                      stamp=source_stamp(reference_entry['source']))
+
+    variants = [('onnx_fp32', False)] + ([('onnx_int8', True)] if quantize else [])
+    for name, use_int8 in variants:
+        rss_start = _current_rss_mb()
+        tokenizer, onnx_model = load_onnx_backend(reference_entry['source'], onnx_dir, quantize=use_int8)
+        rss_loaded = _current_rss_mb()
+        results, tps = _benchmark(texts, tokenizer, onnx_model, batch_size, repeats)
+
+        deltas = np.array([
+            abs(ref['confidence'] - res['confidence'])
+            if ref['raw_label'] == res['raw_label']
+            else abs(ref['confidence'] - (1.0 - res['confidence']))
+            for ref, res in zip(reference, results)
+        ])
+        agreement = np.mean([ref['raw_label'] == res['raw_label'] for ref, res in zip(reference, results)])
+        sentiment_agreement = np.mean([ref['sentiment'] == res['sentiment'] for ref, res in zip(reference, results)])
+
+        report['backends'][name] = {
+            'texts_per_second': tps,
+            'speedup_vs_pytorch': (tps / reference_tps) if tps and reference_tps else None,
+            'rss_delta_mb': (rss_loaded - rss_start) if rss_start is not None and rss_loaded is not None else None,
+            'model_file_mb': onnx_model.size_mb(),
+            'label_agreement': float(agreement),
+            'sentiment_agreement': float(sentiment_agreement),
+            'confidence_delta_mean': float(deltas.mean()),
+            'confidence_delta_max': float(deltas.max())
+        }
+
+    report['process_rss_mb'] = {'start': rss_before, 'end': _current_rss_mb()}
+
+    print("\n📊 Backend comparison:")
+    for name, stats in report['backends'].items():
+        line = f"   {name:10s} {stats['texts_per_second'] or 0:8.1f} texts/s"
+        if 'label_agreement' in stats:
+            line += (f" | agreement {stats['label_agreement']*100:5.1f}%"
+                     f" | Δconf mean {stats['confidence_delta_mean']:.4f} max {stats['confidence_delta_max']:.4f}")
+        print(line)
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report saved to: {report_path}")
+
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ONNX vs PyTorch sentiment parity check")
+    parser.add_argument('--model-path', default='./my_volume/hf_model')
+    parser.add_argument('--onnx-dir', help='ONNX export directory (default: the one the API uses)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--corpus', help='Optional text file with one review per line')
+    parser.add_argument('--no-quantize', action='store_true')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--report', default='onnx_parity_report.json')
+    args = parser.parse_args()
+
+    corpus = None
+    if args.corpus:
+        with open(args.corpus, 'r', encoding='utf-8') as f:
+            corpus = [line.strip() for line in f if line.strip()]
+
+    run_parity_check(args.model_path, args.onnx_dir, corpus=corpus, quantize=not args.no_quantize,
+                     batch_size=args.batch_size, repeats=args.repeats, report_path=args.report,
+                     cache_dir=args.cache_dir)
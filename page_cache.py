@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+URL-keyed cache of downloaded review pages
+Pages are stored gzip-compressed in SQLite together with their ETag and
+Last-Modified validators. Entries younger than the TTL are served without
+any network access (and without starting a browser); older entries fetched
+with requests are revalidated with a conditional GET and reused on 304 Not
+Modified. Browser-rendered entries carry no validators and expire by TTL.
+"""
+
+import os
+import gzip
+import time
+import hashlib
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+PAGE_CACHE_PATH = 'my_volume/page_cache.db'
+DEFAULT_PAGE_TTL = 3600
+
+
+class PageCache:
+    """
+    SQLite-backed page cache with TTL and HTTP validators
+
+    Args:
+        db_path: SQLite file holding the cache
+        ttl_seconds: Age up to which an entry is used without revalidation
+        max_entries: Size bound; least recently fetched pages are evicted beyond it
+    """
+
+    def __init__(self, db_path=PAGE_CACHE_PATH, ttl_seconds=DEFAULT_PAGE_TTL, max_entries=500):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._lock = threading.Lock()
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS page_cache (
+                    url_key TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    body BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    method TEXT,
+                    fetched_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_page_cache_fetched ON page_cache(fetched_at)')
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(url):
+        """Hash of the URL without its fragment"""
+        return hashlib.sha256(url.split('#', 1)[0].strip().encode('utf-8')).hexdigest()
+
+    def lookup(self, url):
+        """
+        Cached page of url
+
+        Returns:
+            dict with content (bytes), etag, last_modified, method, age and
+            fresh (younger than the TTL), or None if the URL is not cached
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT body, etag, last_modified, method, fetched_at FROM page_cache WHERE url_key = ?',
+                (self.make_key(url),)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, method, fetched_at = row
+        age = time.time() - fetched_at
+        return {
+            'content': gzip.decompress(body),
+            'etag': etag,
+            'last_modified': last_modified,
+            'method': method,
+            'age': age,
+            'fresh': age < self.ttl_seconds
+        }
+
+    @staticmethod
+    def conditional_headers(entry):
+        """If-None-Match / If-Modified-Since headers for revalidating entry"""
+        headers = {}
+        if entry and entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def store(self, url, content, etag=None, last_modified=None, method=None):
+        """
+        Insert or replace a page and evict the oldest pages beyond max_entries
+
+        Args:
+            url: Page URL
+            content: Page bytes (or str, stored as UTF-8)
+            etag, last_modified: Validators from the response headers
+            method: How the page was fetched ('requests' or 'selenium')
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8')
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO page_cache '
+                '(url_key, url, body, size, etag, last_modified, method, fetched_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.make_key(url), url, gzip.compress(content), len(content),
+                 etag, last_modified, method, time.time())
+            )
+            count = conn.execute('SELECT COUNT(*) FROM page_cache').fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    'DELETE FROM page_cache WHERE url_key IN '
+                    '(SELECT url_key FROM page_cache ORDER BY fetched_at ASC LIMIT ?)',
+                    (overflow,)
+                )
+
+    def refresh(self, url, etag=None, last_modified=None):
+        """Restart the TTL of a page the server confirmed unchanged (304)"""
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE page_cache SET fetched_at = ?, etag = COALESCE(?, etag), '
+                'last_modified = COALESCE(?, last_modified) WHERE url_key = ?',
+                (time.time(), etag, last_modified, self.make_key(url))
+            )
+
+    def record_hit(self, entry):
+        """Count a page served from cache without revalidation"""
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(entry['content'])
+
+    def record_revalidated(self, entry):
+        """Count a page the server answered with 304 Not Modified"""
+        with self._lock:
+            self.revalidated += 1
+            self.bytes_saved += len(entry['content'])
+
+    def record_miss(self):
+        """Count a page that had to be downloaded"""
+        with self._lock:
+            self.misses += 1
+
+    def entry_count(self):
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM page_cache').fetchone()[0]
+
+    def stats(self):
+        """Hit/miss and bytes-saved counters"""
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'hit_rate': ((self.hits + self.revalidated) / lookups) if lookups else 0.0,
+            'bytes_saved': self.bytes_saved,
+            'entries': self.entry_count(),
+            'ttl_seconds': self.ttl_seconds
+        }
+
+
+_page_caches = {}
+_page_caches_lock = threading.Lock()
+
+
+def get_page_cache(db_path=PAGE_CACHE_PATH, ttl_seconds=DEFAULT_PAGE_TTL):
+    """Process-wide PageCache per database file, so counters span all downloads"""
+    key = os.path.abspath(db_path)
+    with _page_caches_lock:
+        cache = _page_caches.get(key)
+        if cache is None:
+            cache = PageCache(db_path, ttl_seconds=ttl_seconds)
+            _page_caches[key] = cache
+        cache.ttl_seconds = ttl_seconds
+        return cache
@@ -8,10 +8,11 @@ import os
 import pandas as pd
 import numpy as np
 import json
-import sqlite3
 import yaml
 from datetime import datetime
 
+from review_store import connect_review_store, job_source_files, DEFAULT_JOB_ID
+
 # PDF report generation
 try:
     from reportlab.lib.pagesizes import letter, A4
@@ -96,15 +97,14 @@ def draw_header_stripe(canvas_obj, doc, company_name=None):
     canvas_obj.restoreState()
 
 
-def extract_source_info_from_db(db_path):
+def extract_source_info_from_db(db_path, job_id=DEFAULT_JOB_ID):
     """Extract source website information from database"""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Get unique file paths to determine source
-        cursor.execute("SELECT DISTINCT file_path FROM comment_blocks LIMIT 5")
-        file_paths = [row[0] for row in cursor.fetchall()]
+        with connect_review_store(db_path) as conn:
+            # Get unique file paths to determine source
+            file_paths = job_source_files(conn, job_id)
+            if not file_paths:
+                file_paths = [row[0] for row in conn.execute("SELECT DISTINCT file_path FROM comment_blocks LIMIT 5")]
         
         # Extract website/source info from file paths
         sources = []
@@ -119,8 +119,6 @@ def extract_source_info_from_db(db_path):
                 clean_name = filename.replace('%20', ' ').replace('.html', '').replace('.htm', '')
                 sources.append(f"Web Source: {clean_name}")
         
-        conn.close()
-        
         if sources:
             return sources[0]  # Return the first/main source
         else:
@@ -165,7 +163,7 @@ def load_existing_data(OUTPUT_BASE_DIR):
         print(f"❌ Error loading existing data: {e}")
         return None, None, None
 
-def generate_pdf_report_simple(results_df, representative_results, performance_summary, db_path, OUTPUT_BASE_DIR, target_url=None, company_name=None):
+def generate_pdf_report_simple(results_df, representative_results, performance_summary, db_path, OUTPUT_BASE_DIR, target_url=None, company_name=None, job_id=DEFAULT_JOB_ID):
     """Generate comprehensive PDF report of the analysis"""
     
     if not PDF_AVAILABLE:
@@ -344,7 +342,7 @@ def generate_pdf_report_simple(results_df, representative_results, performance_s
     if target_url:
         source_info = target_url
     else:
-        source_info = extract_source_info_from_db(db_path)
+        source_info = extract_source_info_from_db(db_path, job_id)
     story.append(Paragraph(f"<b>Data Source:</b> {source_info}", normal_style))
     story.append(Spacer(1, 10))
     
@@ -969,7 +967,7 @@ def generate_pdf_report_simple(results_df, representative_results, performance_s
         print(f"❌ Error generating PDF report: {e}")
         return None
 
-def generate_pdf_fun(DB_PATH, OUTPUT_BASE_DIR, TARGET_URL=None, company_name=None):
+def generate_pdf_fun(DB_PATH, OUTPUT_BASE_DIR, TARGET_URL=None, company_name=None, job_id=DEFAULT_JOB_ID):
     print("📄 Generating PDF Report from Existing Data...")
     
     # Load company name from config if not provided
@@ -986,7 +984,7 @@ def generate_pdf_fun(DB_PATH, OUTPUT_BASE_DIR, TARGET_URL=None, company_name=Non
         return
     
     # Generate PDF report
-    pdf_path = generate_pdf_report_simple(results_df, representative_results, performance_summary, DB_PATH, OUTPUT_BASE_DIR, TARGET_URL, company_name)
+    pdf_path = generate_pdf_report_simple(results_df, representative_results, performance_summary, DB_PATH, OUTPUT_BASE_DIR, TARGET_URL, company_name, job_id)
     
     if pdf_path:
         print(f"✅ PDF report successfully generated: {pdf_path}")
@@ -9,6 +9,7 @@ import os
 import shutil
 import json
 from pdf_generation import generate_pdf_fun as pdf_gen_func
+from review_store import REVIEW_STORE_PATH
 import logging
 import traceback
 from datetime import datetime
@@ -69,7 +70,8 @@ def setup_analysis_directories(job_id: str) -> Tuple[str, str, str]:
     """
     cache_folder = f"cache/{job_id}"
     output_base_dir = f"my_volume/sentiment_analysis/{job_id}"
-    db_path = f"filtered_reviews_{job_id}.db"
+    # All jobs share the central review store; rows are keyed by job_id
+    db_path = REVIEW_STORE_PATH
     
     os.makedirs(cache_folder, exist_ok=True)
     os.makedirs(output_base_dir, exist_ok=True)
@@ -131,7 +133,14 @@ def execute_sentiment_analysis(
     """
     # Extract text
     logger.info(f"Job {job_id}: Extracting text")
-    extract_text_fun(SEPARATOR_KEYWORDS, cache_folder)
+    text_blocks, extraction_stats = extract_text_fun(
+        SEPARATOR_KEYWORDS, cache_folder,
+        save_text_file=base_config.get('save_extracted_text', False),
+        engine=base_config.get('extraction_engine', 'lxml'),
+        extraction_workers=base_config.get('extraction_workers', 'auto'),
+        extraction_profiles=base_config.get('extraction_profiles', True),
+        return_stats=True
+    )
     
     # Configure analysis
     config = base_config.copy()
@@ -142,6 +151,9 @@ def execute_sentiment_analysis(
     config['output_base_dir'] = output_base_dir
     config['path_db'] = db_path
     config['extracted_text_dir'] = cache_folder
+    config['text_blocks'] = text_blocks
+    config['extraction_stats'] = extraction_stats
+    config['job_id'] = job_id
     
     # Run sentiment analysis
     logger.info(f"Job {job_id}: Running sentiment analysis")
@@ -221,7 +233,7 @@ def generate_and_copy_pdf(
     
     # Use provided function or default to pdf_generation module
     pdf_func = generate_pdf_fun if generate_pdf_fun is not None else pdf_gen_func
-    pdf_func(db_path, output_base_dir, company_name=company_name)
+    pdf_func(db_path, output_base_dir, company_name=company_name, job_id=job_id)
     
     # Copy PDF to root visualizations folder for frontend access
     source_pdf = os.path.join(output_base_dir, 'visualizations', 'sentiment_analysis_report.pdf')
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Re-threshold and re-score a finished sentiment analysis job
+Labels are re-derived from the stored per-review P(POSITIVE) in
+complete_results.csv, so changing the confidence threshold, the keyword lists
+or the sentence length only recomputes scores, trends, representatives and
+charts - the transformer is not run again.
+
+LLM summaries, recommendations and the PDF report are not regenerated.
+
+Usage:
+    python rescore.py --job-dir my_volume/sentiment_analysis/<job_id> --confidence-threshold 0.9
+"""
+
+import os
+import json
+import time
+import argparse
+from datetime import datetime
+
+import pandas as pd
+
+from sentiment_inference import labels_from_positive_probabilities, positive_probabilities
+from review_vectors import load_job_vectors
+from Context_analyzer_RoBERTa_fun import finalize_analysis_results
+
+RESCORE_FILES = ('{s}_comments.json', '{s}_samples.txt', '{s}_representatives.json')
+
+# Performance summary entries produced at extraction and inference time that a rescore keeps
+CARRIED_EXTRAS = ('result_cache', 'lexicon_cascade', 'extraction')
+
+
+def load_job_results(output_base_dir):
+    """Read complete_results.csv of a finished job"""
+    results_path = os.path.join(output_base_dir, 'complete_results.csv')
+    if not os.path.exists(results_path):
+        raise FileNotFoundError(f"No complete_results.csv in {output_base_dir}")
+    # Review texts such as "NA" or "null" must stay text
+    results_df = pd.read_csv(results_path, keep_default_na=False, na_values=[''])
+    results_df['text'] = results_df['text'].fillna('').astype(str)
+    results_df['visit_date'] = results_df['visit_date'].astype(object).where(results_df['visit_date'].notna(), None)
+    return results_df
+
+
+def rescore_job(output_base_dir, confidence_threshold, key_positive_words, key_neutral_words,
+                key_negative_words, sentence_length, **kwargs):
+    """
+    Recompute a job's labels and derived outputs from the stored model outputs
+
+    Args:
+        output_base_dir: The job's output directory (my_volume/sentiment_analysis/<job_id>)
+        confidence_threshold: New threshold for the 3-class simulation
+        key_positive_words, key_neutral_words, key_negative_words: Keyword lists for original scores
+        sentence_length: Sentence length threshold for original scores
+
+    Keyword Arguments:
+        n_representatives, tfidf_max_features, tfidf_min_df, tfidf_max_df,
+        clustering_mode, scalable_clustering_threshold, clustering_max_fit_samples,
+        top_words_count, wordcloud_max_words: Same meaning as in Context_analyzer_RoBERTa_fun
+
+    Returns:
+        dict with sentiment_counts, previous_counts, trends and rescore_time
+    """
+    start = time.time()
+    print("\n" + "=" * 80)
+    print(f"RESCORING JOB: {output_base_dir}")
+    print("=" * 80)
+
+    results_df = load_job_results(output_base_dir)
+    previous_counts = {sentiment: int(count) for sentiment, count in results_df['sentiment'].value_counts().items()}
+
+    # Jobs analyzed before positive_probability was stored still carry raw_label/confidence
+    if 'positive_probability' not in results_df.columns:
+        print("⚠️  No positive_probability column, deriving it from raw_label and confidence")
+        results_df['positive_probability'] = positive_probabilities(results_df['raw_label'], results_df['confidence'])
+
+    # Lexicon cascade decisions carry no model probability and keep their label
+    if 'decided_by' not in results_df.columns:
+        results_df['decided_by'] = 'model'
+    results_df['decided_by'] = results_df['decided_by'].fillna('model')
+    by_model = (results_df['decided_by'] != 'lexicon').to_numpy()
+
+    sentiments, confidences, raw_labels = labels_from_positive_probabilities(
+        results_df.loc[by_model, 'positive_probability'], confidence_threshold
+    )
+    results_df.loc[by_model, 'sentiment'] = sentiments
+    results_df.loc[by_model, 'confidence'] = confidences
+    results_df.loc[by_model, 'raw_label'] = raw_labels
+    print(f"✅ Re-labelled {int(by_model.sum()):,} reviews at confidence threshold {confidence_threshold} "
+          f"({int((~by_model).sum()):,} lexicon decisions kept)")
+
+    folders = {
+        'positive': os.path.join(output_base_dir, 'positive'),
+        'negative': os.path.join(output_base_dir, 'negative'),
+        'neutral': os.path.join(output_base_dir, 'neutral'),
+        'visualizations': os.path.join(output_base_dir, 'visualizations'),
+        'vectors': os.path.join(output_base_dir, 'vectors')
+    }
+    for folder in folders.values():
+        os.makedirs(folder, exist_ok=True)
+
+    # A sentiment can become empty; drop its files from the previous labelling
+    for sentiment in ('positive', 'negative', 'neutral'):
+        for pattern in RESCORE_FILES:
+            path = os.path.join(folders[sentiment], pattern.format(s=sentiment))
+            if os.path.exists(path):
+                os.remove(path)
+
+    # Inference time and inference-time stats stay those of the original run
+    total_time = 0.0
+    performance_extras = {}
+    perf_path = os.path.join(output_base_dir, 'performance_summary.json')
+    if os.path.exists(perf_path):
+        with open(perf_path, 'r') as f:
+            previous_summary = json.load(f)
+        total_time = previous_summary.get('processing_time_minutes', 0.0) * 60
+        performance_extras = {k: previous_summary[k] for k in CARRIED_EXTRAS if k in previous_summary}
+
+    # TF-IDF vectors depend only on the texts, so the persisted store is reused
+    store = load_job_vectors(folders['vectors'])
+    job_vectors = store['matrix'] if store is not None and store['matrix'].shape[0] == len(results_df) else None
+
+    performance_extras['rescore'] = {
+        'confidence_threshold': confidence_threshold,
+        'sentence_length': sentence_length,
+        'rescored_at': datetime.now().isoformat(),
+        'previous_distribution': previous_counts
+    }
+
+    outputs = finalize_analysis_results(
+        results_df,
+        folders,
+        output_base_dir,
+        processing_times=[],
+        total_time=total_time,
+        keyword_lists=(key_positive_words, key_neutral_words, key_negative_words),
+        sentence_length=sentence_length,
+        representative_kwargs={
+            'n_representatives': kwargs.get('n_representatives', 10),
+            'tfidf_max_features': kwargs.get('tfidf_max_features', 1000),
+            'tfidf_min_df': kwargs.get('tfidf_min_df', 4),
+            'tfidf_max_df': kwargs.get('tfidf_max_df', 0.8),
+            'clustering_mode': kwargs.get('clustering_mode', 'auto'),
+            'scalable_threshold': kwargs.get('scalable_clustering_threshold', 5000),
+            'max_fit_samples': kwargs.get('clustering_max_fit_samples', 20000)
+        },
+        wordcloud_max_words=kwargs.get('wordcloud_max_words', 100),
+        top_words_count=kwargs.get('top_words_count', 15),
+        persist_vectors=job_vectors is None,
+        performance_extras=performance_extras,
+        job_vectors=job_vectors
+    )
+
+    rescore_time = time.time() - start
+    print(f"\n✅ Rescore complete in {rescore_time:.1f}s")
+    return {
+        'sentiment_counts': outputs['sentiment_counts'],
+        'previous_counts': previous_counts,
+        'trends': outputs['trends'],
+        'rescore_time': rescore_time
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-threshold a finished sentiment analysis job")
+    parser.add_argument('--job-dir', required=True, help='my_volume/sentiment_analysis/<job_id>')
+    parser.add_argument('--confidence-threshold', type=float)
+    parser.add_argument('--sentence-length', type=int)
+    args = parser.parse_args()
+
+    from config.config import load_all_configs
+    config_data = load_all_configs()
+    base_config = config_data['base_config']
+    options = {k: v for k, v in base_config.items() if k not in ('confidence_threshold', 'sentence_length')}
+    rescore_job(
+        args.job_dir,
+        args.confidence_threshold if args.confidence_threshold is not None else base_config.get('confidence_threshold', 0.8),
+        config_data['KEY_POSITIVE_WORDS'],
+        config_data['KEY_NEUTRAL_WORDS'],
+        config_data['KEY_NEGATIVE_WORDS'],
+        args.sentence_length if args.sentence_length is not None else config_data['SENTENCE_LENGTH'],
+        **options
+    )
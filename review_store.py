@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Central SQLite store for extracted review blocks
+All jobs share one WAL-mode database instead of a filtered_reviews_<job>.db
+per job. Blocks are bulk-inserted with executemany in a single transaction
+and reads filter on the indexed job_id column.
+"""
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+REVIEW_STORE_PATH = 'my_volume/review_store.db'
+
+# job_id used when the analyzer runs outside the API (no job)
+DEFAULT_JOB_ID = 'local'
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS extracted_text_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id TEXT NOT NULL DEFAULT 'local',
+        source_file TEXT NOT NULL,
+        block_text TEXT NOT NULL,
+        block_length INTEGER,
+        visit_date TEXT,
+        category TEXT,
+        rating REAL,
+        extraction_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_extracted_job_length ON extracted_text_data(job_id, block_length)',
+    'CREATE INDEX IF NOT EXISTS idx_extracted_job_date ON extracted_text_data(job_id, visit_date)'
+)
+
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def _ensure_schema(conn, db_path):
+    """Create the table and indexes once per database file and process"""
+    key = os.path.abspath(db_path)
+    with _init_lock:
+        if key in _initialized:
+            return
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(extracted_text_data)')]
+        if columns and 'job_id' not in columns:
+            # Per-job databases written before the central store
+            conn.execute("ALTER TABLE extracted_text_data ADD COLUMN job_id TEXT NOT NULL DEFAULT 'local'")
+        if columns and 'category' not in columns:
+            conn.execute('ALTER TABLE extracted_text_data ADD COLUMN category TEXT')
+        if columns and 'rating' not in columns:
+            conn.execute('ALTER TABLE extracted_text_data ADD COLUMN rating REAL')
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+        _initialized.add(key)
+
+
+@contextmanager
+def connect_review_store(db_path=REVIEW_STORE_PATH):
+    """
+    Shared connection factory for the review store
+
+    Connections use WAL so analysis reads don't block ingestion of other jobs.
+    The connection commits on success, rolls back on error and is always closed.
+    """
+    if os.path.dirname(db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        _ensure_schema(conn, db_path)
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def insert_blocks(conn, job_id, rows):
+    """
+    Replace a job's blocks with one executemany in the caller's transaction
+
+    Args:
+        conn: Connection from connect_review_store
+        job_id: Owner of the blocks
+        rows: Iterable of (source_file, block_text, block_length, visit_date, category, rating)
+
+    Returns:
+        Number of inserted rows
+    """
+    conn.execute('DELETE FROM extracted_text_data WHERE job_id = ?', (job_id,))
+    cursor = conn.executemany(
+        'INSERT INTO extracted_text_data '
+        '(job_id, source_file, block_text, block_length, visit_date, category, rating) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+        ((job_id, *row) for row in rows)
+    )
+    return cursor.rowcount
+
+
+def has_job_blocks(conn, job_id):
+    """True if the job has ingested blocks"""
+    return conn.execute('SELECT 1 FROM extracted_text_data WHERE job_id = ? LIMIT 1', (job_id,)).fetchone() is not None
+
+
+def job_source_files(conn, job_id, limit=5):
+    """Distinct source files of a job's blocks"""
+    rows = conn.execute(
+        'SELECT DISTINCT source_file FROM extracted_text_data WHERE job_id = ? LIMIT ?', (job_id, limit)
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def delete_job_blocks(job_ids, db_path=REVIEW_STORE_PATH):
+    """
+    Remove the blocks of finished or expired jobs
+
+    Returns:
+        Number of deleted rows
+    """
+    job_ids = list(job_ids)
+    if not job_ids or not os.path.exists(db_path):
+        return 0
+    with connect_review_store(db_path) as conn:
+        cursor = conn.executemany('DELETE FROM extracted_text_data WHERE job_id = ?', ((j,) for j in job_ids))
+        return cursor.rowcount
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Per-job store of review feature vectors in the vectors/ output folder
+The TF-IDF matrix is saved as its CSR components (.npy) next to the idf
+weights and vocabulary, so consumers can memory-map it instead of
+re-vectorizing the raw text.
+
+Layout of <output>/vectors/:
+    tfidf_data.npy, tfidf_indices.npy, tfidf_indptr.npy   CSR matrix components
+    tfidf_ids.npy                                           row -> row of complete_results.csv
+    tfidf_idf.npy                                           idf weight per feature
+    tfidf_meta.json                                         shape, vocabulary, vectorizer settings
+    counts_*                                                raw word counts (no idf, no max_df),
+                                                            same layout without idf
+    rows_text.bin, rows_offsets.npy, rows_sentiment.npy    review text and label per row
+"""
+
+import os
+import json
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
+
+# Single words of 3+ letters, as the word clouds and top-word charts show them
+COUNT_TOKEN_PATTERN = r'(?u)\b[a-zA-Z]{3,}\b'
+
+
+def _vector_paths(vectors_dir, name, idf=True):
+    parts = ('data', 'indices', 'indptr', 'ids') + (('idf',) if idf else ())
+    return {part: os.path.join(vectors_dir, f'{name}_{part}.npy') for part in parts}
+
+
+def save_job_vectors(vectors_dir, matrix, ids, vectorizer, name='tfidf'):
+    """
+    Write a sparse feature matrix and its id mapping to disk
+
+    Args:
+        vectors_dir: Output folder (the job's vectors/ directory)
+        matrix: scipy sparse matrix, one row per review
+        ids: Row number of each review in complete_results.csv
+        vectorizer: Fitted TfidfVectorizer or CountVectorizer (vocabulary and idf, if any, are stored)
+        name: File prefix
+    """
+    os.makedirs(vectors_dir, exist_ok=True)
+    matrix = csr_matrix(matrix)
+    has_idf = hasattr(vectorizer, 'idf_')
+    paths = _vector_paths(vectors_dir, name, idf=has_idf)
+
+    np.save(paths['data'], matrix.data.astype(np.float32))
+    np.save(paths['indices'], matrix.indices.astype(np.int32))
+    np.save(paths['indptr'], matrix.indptr.astype(np.int64))
+    np.save(paths['ids'], np.asarray(ids, dtype=np.int64))
+    if has_idf:
+        np.save(paths['idf'], vectorizer.idf_.astype(np.float32))
+
+    meta = {
+        'idf': has_idf,
+        'shape': list(matrix.shape),
+        'nnz': int(matrix.nnz),
+        'vocabulary': {term: int(col) for term, col in vectorizer.vocabulary_.items()},
+        'vectorizer': {
+            'max_features': vectorizer.max_features,
+            'min_df': vectorizer.min_df,
+            'max_df': vectorizer.max_df,
+            'stop_words': vectorizer.stop_words,
+            'ngram_range': list(vectorizer.ngram_range)
+        }
+    }
+    with open(os.path.join(vectors_dir, f'{name}_meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def build_job_vectors(texts, vectors_dir, tfidf_max_features=1000, tfidf_min_df=4, tfidf_max_df=0.8):
+    """
+    Fit TF-IDF over all reviews of a job and persist it
+
+    Args:
+        texts: Review texts in complete_results.csv order
+
+    Returns:
+        CSR matrix (one row per text), or None if the corpus is too small to vectorize
+    """
+    vectorizer = TfidfVectorizer(max_features=tfidf_max_features, stop_words='english',
+                                 ngram_range=(1, 2), min_df=tfidf_min_df, max_df=tfidf_max_df)
+    try:
+        matrix = vectorizer.fit_transform(texts)
+    except ValueError as e:
+        # e.g. "After pruning, no terms remain" on very small jobs
+        print(f"⚠️  Skipping vector store: {e}")
+        return None
+
+    save_job_vectors(vectors_dir, matrix, np.arange(len(texts)), vectorizer)
+    print(f"💾 Vector store saved to: {vectors_dir} ({matrix.shape[0]:,} x {matrix.shape[1]:,}, nnz={matrix.nnz:,})")
+
+    # Raw counts for word clouds and top words: TF-IDF's max_df would drop the dominant words
+    counter = CountVectorizer(stop_words='english', token_pattern=COUNT_TOKEN_PATTERN, max_features=20000)
+    try:
+        save_job_vectors(vectors_dir, counter.fit_transform(texts), np.arange(len(texts)), counter, name='counts')
+    except ValueError as e:
+        print(f"⚠️  Skipping word counts: {e}")
+    return matrix.tocsr()
+
+
+def load_job_vectors(vectors_dir, name='tfidf', mmap=True):
+    """
+    Open a persisted feature matrix without copying it into memory
+
+    Args:
+        vectors_dir: The job's vectors/ directory
+        mmap: Memory-map the .npy files (read-only)
+
+    Returns:
+        dict with 'matrix' (CSR), 'ids', 'idf' and 'vocabulary', or None if absent
+    """
+    meta_path = os.path.join(vectors_dir, f'{name}_meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    paths = _vector_paths(vectors_dir, name, idf=meta.get('idf', True))
+    if not all(os.path.exists(p) for p in paths.values()):
+        return None
+
+    mode = 'r' if mmap else None
+    arrays = {part: np.load(path, mmap_mode=mode) for part, path in paths.items()}
+
+    matrix = csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                        shape=tuple(meta['shape']), copy=False)
+    return {
+        'matrix': matrix,
+        'ids': arrays['ids'],
+        'idf': arrays.get('idf'),
+        'vocabulary': meta['vocabulary'],
+        'vectorizer': meta.get('vectorizer', {})
+    }
+
+
+def save_review_rows(vectors_dir, texts, sentiments):
+    """
+    Write review texts and labels so single rows can be read without the CSV
+
+    Rewritten after every (re)scoring, since labels change with the threshold.
+
+    Args:
+        vectors_dir: The job's vectors/ directory
+        texts, sentiments: Per-review text and label in complete_results.csv order
+    """
+    os.makedirs(vectors_dir, exist_ok=True)
+    encoded = [str(text).encode('utf-8') for text in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    with open(os.path.join(vectors_dir, 'rows_text.bin'), 'wb') as f:
+        f.write(b''.join(encoded))
+    np.save(os.path.join(vectors_dir, 'rows_offsets.npy'), offsets)
+    np.save(os.path.join(vectors_dir, 'rows_sentiment.npy'), np.asarray(sentiments, dtype='U8'))
+
+
+def read_review_rows(vectors_dir, rows):
+    """
+    Text and label of some reviews, reading only those rows
+
+    Returns:
+        List of (text, sentiment) in the order of rows, or None if the row store is absent
+    """
+    paths = [os.path.join(vectors_dir, name) for name in ('rows_text.bin', 'rows_offsets.npy', 'rows_sentiment.npy')]
+    if not all(os.path.exists(p) for p in paths):
+        return None
+    offsets = np.load(paths[1], mmap_mode='r')
+    sentiments = np.load(paths[2], mmap_mode='r')
+    found = []
+    with open(paths[0], 'rb') as f:
+        for row in rows:
+            if not 0 <= row < len(sentiments):
+                continue
+            f.seek(int(offsets[row]))
+            text = f.read(int(offsets[row + 1] - offsets[row])).decode('utf-8')
+            found.append((text, str(sentiments[row])))
+    return found
+
+
+def term_weights(store, rows):
+    """
+    Summed weight (word count or TF-IDF) of every stored term over some reviews
+
+    Args:
+        store: Result of load_job_vectors
+        rows: Matrix rows (e.g. the reviews of one sentiment)
+
+    Returns:
+        dict term -> weight for the terms present in those rows
+    """
+    weights = np.asarray(store['matrix'][rows].sum(axis=0)).ravel()
+    return {term: float(weights[col]) for term, col in store['vocabulary'].items() if weights[col] > 0}
+
+
+def search_job_vectors(store, query, top_k=5):
+    """
+    Rank stored reviews by cosine similarity to a free-text query
+
+    The query is vectorized with the stored vocabulary and idf weights, so no
+    refit over the job's texts is needed.
+
+    Args:
+        store: Result of load_job_vectors
+        query: Query text
+        top_k: Number of matches
+
+    Returns:
+        List of (review_row, similarity) tuples, best first
+    """
+    settings = store['vectorizer']
+    vectorizer = TfidfVectorizer(vocabulary=store['vocabulary'], stop_words=settings.get('stop_words'),
+                                 ngram_range=tuple(settings.get('ngram_range', (1, 2))), use_idf=False)
+    query_vector = vectorizer.fit_transform([query]).multiply(store['idf']).tocsr()
+    norm = np.sqrt(query_vector.multiply(query_vector).sum())
+    if norm == 0:
+        return []
+
+    # Stored rows are already L2-normalized
+    scores = np.asarray((store['matrix'] @ (query_vector / norm).T).todense()).ravel()
+    top = np.argsort(-scores, kind='stable')[:top_k]
+    return [(int(store['ids'][i]), float(scores[i])) for i in top if scores[i] > 0]
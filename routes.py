@@ -1,14 +1,17 @@
-from fastapi import APIRouter, BackgroundTasks, HTTPException, File, UploadFile, Request
+from fastapi import APIRouter, BackgroundTasks, HTTPException, File, UploadFile, Request, Header
 from fastapi.responses import FileResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime
 from typing import Optional, Dict, Callable
 import os
+import hmac
 import json
 import uuid
 import logging
 
-from models import AnalysisRequest, JobStatus, ChatRequest, ChatResponse
+from models import AnalysisRequest, JobStatus, ChatRequest, ChatResponse, RescoreRequest
 from chatbot_analyzer import ResultsChatbot
+from inference_scheduler import scheduler_stats
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +27,9 @@ class Routes:
         run_analysis_pipeline: Callable,
         names_config: dict,
         base_config: dict,
-        key_config: dict
+        key_config: dict,
+        model_registry=None,
+        rescore_job: Optional[Callable] = None
     ):
         self.jobs_db = jobs_db
         self.chatbots = chatbots
@@ -32,6 +37,8 @@ class Routes:
         self.names_config = names_config
         self.base_config = base_config
         self.key_config = key_config
+        self.model_registry = model_registry
+        self.rescore_job = rescore_job
         self.router = APIRouter()
         self._setup_routes()
     
@@ -68,6 +75,42 @@ class Routes:
             """Health check endpoint for Docker"""
             return {"status": "healthy", "timestamp": datetime.now().isoformat()}
         
+        @self.router.get("/api/models")
+        async def get_model_stats():
+            """Load time and resident memory of the warm sentiment models, plus scheduler queues"""
+            if self.model_registry is None:
+                raise HTTPException(status_code=503, detail="Model registry not configured")
+            # stats() takes the registry lock; never wait for it on the event loop
+            stats = await run_in_threadpool(self.model_registry.stats)
+            stats['schedulers'] = await run_in_threadpool(scheduler_stats)
+            return stats
+        
+        @self.router.post("/api/models/reload")
+        async def reload_models(model_path: Optional[str] = None, x_admin_token: Optional[str] = Header(None)):
+            """
+            Reload registered sentiment models (all, or only model_path)
+            
+            Requires the X-Admin-Token header to match ADMIN_TOKEN (env) or
+            admin_token (base config); disabled when neither is set. Only
+            already-registered models can be reloaded.
+            """
+            if self.model_registry is None:
+                raise HTTPException(status_code=503, detail="Model registry not configured")
+            admin_token = os.getenv('ADMIN_TOKEN') or self.base_config.get('admin_token')
+            if not admin_token:
+                raise HTTPException(status_code=403, detail="Model reload is disabled")
+            if not x_admin_token or not hmac.compare_digest(x_admin_token, admin_token):
+                raise HTTPException(status_code=401, detail="Invalid admin token")
+            try:
+                # Model loading takes seconds; keep it off the event loop
+                reloaded = await run_in_threadpool(self.model_registry.reload, model_path=model_path)
+            except KeyError:
+                raise HTTPException(status_code=404, detail=f"Model not registered: {model_path}")
+            except Exception as e:
+                logger.error(f"Error reloading models: {e}")
+                raise HTTPException(status_code=500, detail=f"Reload error: {str(e)}")
+            return {"reloaded": reloaded}
+        
         @self.router.get("/api/config")
         async def get_config():
             """Get frontend configuration including company name"""
@@ -232,6 +275,38 @@ class Routes:
             
             return JSONResponse(content=results)
         
+        @self.router.post("/api/results/{job_id}/rescore")
+        async def rescore_results(job_id: str, request: RescoreRequest):
+            """
+            Re-threshold a finished job from its stored model outputs
+            
+            Recomputes labels, scores, trends, representatives and charts without
+            re-running inference. AI summaries and the PDF are left as they were.
+            """
+            if self.rescore_job is None:
+                raise HTTPException(status_code=503, detail="Rescoring not configured")
+            
+            output_dir = f"my_volume/sentiment_analysis/{job_id}"
+            if not os.path.exists(f"{output_dir}/complete_results.csv"):
+                raise HTTPException(status_code=404, detail="Job results not found")
+            
+            if job_id in self.jobs_db and self.jobs_db[job_id]['status'] not in ('completed', 'failed'):
+                raise HTTPException(status_code=409, detail="Analysis still running")
+            
+            try:
+                result = await run_in_threadpool(self.rescore_job, job_id, request.dict(exclude_none=True))
+            except Exception as e:
+                logger.error(f"Error rescoring job {job_id}: {e}")
+                raise HTTPException(status_code=500, detail=f"Rescore error: {str(e)}")
+            
+            return {
+                "job_id": job_id,
+                "sentiment_distribution": result['sentiment_counts'],
+                "previous_distribution": result['previous_counts'],
+                "trend_dates": len(result['trends']),
+                "rescore_seconds": round(result['rescore_time'], 2)
+            }
+        
         @self.router.post("/api/upload")
         async def upload_html_file(
             file: UploadFile = File(...),
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Content-addressed cache of sentiment model outputs shared across jobs
+Entries are keyed by a hash of (model input text, model id, truncation
+policy) and hold the raw label and its probability, so the confidence threshold can
+still be applied per job.
+"""
+
+import os
+import time
+import hashlib
+import sqlite3
+from contextlib import contextmanager
+
+
+class SentimentResultCache:
+    """
+    SQLite-backed LRU cache of (raw_label, probability) per text
+
+    Args:
+        db_path: SQLite file holding the cache
+        max_entries: Size bound; least recently used entries are evicted beyond it
+    """
+
+    def __init__(self, db_path='my_volume/sentiment_cache.db', max_entries=200000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS sentiment_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    raw_label TEXT NOT NULL,
+                    probability REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_sentiment_cache_access ON sentiment_cache(last_access)')
+
+    @contextmanager
+    def _connect(self):
+        """Connection that commits on success and is always closed"""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    @staticmethod
+    def make_key(text, model_id, policy):
+        """
+        Hash of the exact text the model receives, model id and truncation policy
+
+        text must already be truncated under policy (display_text), so two
+        inputs only share an entry when the model saw the same string.
+        """
+        payload = f"{model_id}\x1f{policy}\x1f{text}"
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def lookup_many(self, keys):
+        """
+        Fetch cached outputs and refresh their LRU timestamp
+
+        Returns:
+            dict: cache_key -> (raw_label, probability) for the keys that were found
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        now = time.time()
+        with self._connect() as conn:
+            # Stay below SQLite's bound parameter limit
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f'SELECT cache_key, raw_label, probability FROM sentiment_cache WHERE cache_key IN ({placeholders})',
+                    chunk
+                ).fetchall()
+                for key, raw_label, probability in rows:
+                    found[key] = (raw_label, probability)
+                conn.executemany(
+                    'UPDATE sentiment_cache SET last_access = ? WHERE cache_key = ?',
+                    [(now, row[0]) for row in rows]
+                )
+
+        hits = sum(1 for k in keys if k in found)
+        self.hits += hits
+        self.misses += len(keys) - hits
+        return found
+
+    def store_many(self, entries):
+        """
+        Insert model outputs and evict least recently used entries beyond max_entries
+
+        Args:
+            entries: Iterable of (cache_key, raw_label, probability)
+        """
+        now = time.time()
+        rows = [(key, raw_label, float(probability), now) for key, raw_label, probability in entries]
+        if not rows:
+            return
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO sentiment_cache (cache_key, raw_label, probability, last_access) '
+                'VALUES (?, ?, ?, ?)',
+                rows
+            )
+            self.stores += len(rows)
+
+            count = conn.execute('SELECT COUNT(*) FROM sentiment_cache').fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    'DELETE FROM sentiment_cache WHERE cache_key IN '
+                    '(SELECT cache_key FROM sentiment_cache ORDER BY last_access ASC LIMIT ?)',
+                    (overflow,)
+                )
+                self.evictions += overflow
+
+    def entry_count(self):
+        with self._connect() as conn:
+            return conn.execute('SELECT COUNT(*) FROM sentiment_cache').fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters for performance_summary.json"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'entries': self.entry_count(),
+            'max_entries': self.max_entries
+        }
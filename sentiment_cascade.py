@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lexicon first tier in front of the DistilBERT sentiment model
+Texts whose KEY_POSITIVE_WORDS / KEY_NEGATIVE_WORDS hits are clearly one-sided
+are labelled directly; everything else (mixed, negated or keyword-poor texts)
+goes to the transformer. A calibration mode measures how often the lexicon
+tier agrees with the full model and how much inference it skips.
+
+Usage (calibrate on a finished job without re-running the model):
+    python sentiment_cascade.py --results my_volume/sentiment_analysis/<job>/complete_results.csv
+"""
+
+import re
+import json
+import argparse
+
+from keyword_matcher import get_keyword_matcher
+
+# Negations flip keyword polarity ("not good", "wasn't bad"); leave those to the model
+NEGATION_PATTERN = re.compile(r"\b(?:not|no|never|nothing|hardly|without)\b|n't\b")
+
+CALIBRATION_MARGINS = (1, 2, 3, 4, 5, 6)
+
+
+class LexiconCascade:
+    """
+    Keyword-margin classifier that decides only high-margin texts
+
+    Args:
+        positive_words: KEY_POSITIVE_WORDS
+        negative_words: KEY_NEGATIVE_WORDS
+        margin: Minimum difference between positive and negative keyword hits
+        max_opposing: Maximum hits of the opposite polarity still accepted
+        confidence: Confidence reported for lexicon decisions
+    """
+
+    def __init__(self, positive_words, negative_words, margin=3, max_opposing=0, confidence=0.9):
+        self.positive = get_keyword_matcher(positive_words)
+        self.negative = get_keyword_matcher(negative_words)
+        self.margin = margin
+        self.max_opposing = max_opposing
+        self.confidence = confidence
+        self.seen = 0
+        self.decided = {'POSITIVE': 0, 'NEGATIVE': 0}
+        self.calibration = None
+        self.calibration_texts = 0
+
+    def score(self, text):
+        """Return (positive_hits, negative_hits, negated) for one text"""
+        lowered = text.lower()
+        return self.positive.count(lowered), self.negative.count(lowered), bool(NEGATION_PATTERN.search(lowered))
+
+    def label_for(self, positive_hits, negative_hits, negated, margin=None):
+        """Lexicon label or None when the model has to decide"""
+        margin = self.margin if margin is None else margin
+        if negated:
+            return None
+        if positive_hits - negative_hits >= margin and negative_hits <= self.max_opposing:
+            return 'POSITIVE'
+        if negative_hits - positive_hits >= margin and positive_hits <= self.max_opposing:
+            return 'NEGATIVE'
+        return None
+
+    def decide(self, text):
+        """First-tier decision for one text (None = ask the model)"""
+        label = self.label_for(*self.score(text))
+        self.seen += 1
+        if label is not None:
+            self.decided[label] += 1
+        return label
+
+    def decide_many(self, texts):
+        """
+        First-tier decisions for a list of texts
+
+        Returns:
+            Tuple (decisions, scores): decisions maps text index -> label for the
+            texts the lexicon is sure about; scores holds every text's score
+        """
+        scores = [self.score(text) for text in texts]
+        decisions = {}
+        for i, (positive_hits, negative_hits, negated) in enumerate(scores):
+            label = self.label_for(positive_hits, negative_hits, negated)
+            if label is not None:
+                decisions[i] = label
+        self.seen += len(texts)
+        for label in decisions.values():
+            self.decided[label] += 1
+        return decisions, scores
+
+    def result(self, text, label):
+        """Result dict in the format of classify_texts_batched"""
+        return {
+            'text': text,
+            'sentiment': label,
+            'confidence': self.confidence,
+            'raw_label': label,
+            'decided_by': 'lexicon'
+        }
+
+    def record_calibration(self, scores, model_results):
+        """
+        Compare lexicon decisions with full-model results of the same texts
+
+        Args:
+            scores: Scores from decide_many
+            model_results: Model result dicts in the same order
+        """
+        if self.calibration is None:
+            self.calibration = {m: {'decided': 0, 'agree': 0, 'agree_raw': 0} for m in CALIBRATION_MARGINS}
+        self.calibration_texts += len(scores)
+
+        for (positive_hits, negative_hits, negated), model in zip(scores, model_results):
+            for margin in CALIBRATION_MARGINS:
+                label = self.label_for(positive_hits, negative_hits, negated, margin)
+                if label is None:
+                    continue
+                bucket = self.calibration[margin]
+                bucket['decided'] += 1
+                bucket['agree'] += int(model['sentiment'] == label)
+                bucket['agree_raw'] += int(model['raw_label'] == label)
+
+    def stats(self):
+        """Skip rate and, after calibration, agreement per margin"""
+        skipped = sum(self.decided.values())
+        stats = {
+            'margin': self.margin,
+            'max_opposing': self.max_opposing,
+            'texts': self.seen,
+            'decided_by_lexicon': dict(self.decided),
+            'inference_skipped_fraction': skipped / self.seen if self.seen else 0.0
+        }
+        if self.calibration is not None:
+            stats['calibration'] = calibration_table(self.calibration, self.calibration_texts)
+        return stats
+
+
+def calibration_table(calibration, total):
+    """Per-margin skip fraction and agreement with the full model"""
+    return [
+        {
+            'margin': margin,
+            'skipped_fraction': bucket['decided'] / total if total else 0.0,
+            'agreement': bucket['agree'] / bucket['decided'] if bucket['decided'] else None,
+            'raw_label_agreement': bucket['agree_raw'] / bucket['decided'] if bucket['decided'] else None,
+            'decided': bucket['decided']
+        }
+        for margin, bucket in sorted(calibration.items())
+    ]
+
+
+def calibrate_from_results(results_csv, positive_words, negative_words, max_opposing=0, report_path=None):
+    """
+    Calibrate the lexicon tier against a finished job's model labels
+
+    Args:
+        results_csv: complete_results.csv of a job analyzed without the cascade
+        positive_words, negative_words: Keyword lists from the key config
+        report_path: Optional JSON output path
+
+    Returns:
+        List of per-margin calibration rows
+    """
+    import csv
+
+    cascade = LexiconCascade(positive_words, negative_words, max_opposing=max_opposing)
+    with open(results_csv, 'r', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+
+    scores = [cascade.score(row['text']) for row in rows]
+    cascade.record_calibration(scores, rows)
+    table = calibration_table(cascade.calibration, len(rows))
+
+    print(f"\n📊 Lexicon cascade calibration ({len(rows):,} texts)")
+    for row in table:
+        agreement = f"{row['agreement']*100:5.1f}%" if row['agreement'] is not None else "  n/a"
+        print(f"   margin {row['margin']}: skips {row['skipped_fraction']*100:5.1f}% | agreement {agreement}")
+
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump({'texts': len(rows), 'max_opposing': max_opposing, 'margins': table}, f, indent=2)
+        print(f"💾 Report saved to: {report_path}")
+    return table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Calibrate the lexicon sentiment cascade")
+    parser.add_argument('--results', required=True, help='complete_results.csv of a job without the cascade')
+    parser.add_argument('--max-opposing', type=int, default=0)
+    parser.add_argument('--report', default='cascade_calibration.json')
+    args = parser.parse_args()
+
+    from config.config import load_all_configs
+    config_data = load_all_configs()
+    calibrate_from_results(args.results, config_data['KEY_POSITIVE_WORDS'], config_data['KEY_NEGATIVE_WORDS'],
+                           max_opposing=args.max_opposing, report_path=args.report)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Batched DistilBERT inference for the sentiment analysis stage
+Texts are bucketed by length, tokenized together with padding and scored
+with one forward pass per batch instead of one pipeline() call per text
+"""
+
+import time
+
+import numpy as np
+import torch
+
+
+def simulate_3_class_label(raw_label, confidence, confidence_threshold=0.8):
+    """
+    Map a binary SST-2 prediction to POSITIVE / NEGATIVE / NEUTRAL
+
+    Predictions whose confidence does not exceed the threshold are NEUTRAL.
+    """
+    if confidence > confidence_threshold:
+        return "POSITIVE" if raw_label == "POSITIVE" else "NEGATIVE"
+    return "NEUTRAL"
+
+
+def positive_probabilities(raw_labels, confidences):
+    """
+    P(POSITIVE) of binary predictions, the threshold-independent model output
+
+    Args:
+        raw_labels: Array-like of raw labels ('POSITIVE' / 'NEGATIVE')
+        confidences: Array-like of confidences of those labels
+    """
+    confidences = np.asarray(confidences, dtype=float)
+    return np.where(np.asarray(raw_labels) == 'POSITIVE', confidences, 1.0 - confidences)
+
+
+def labels_from_positive_probabilities(positive_probs, confidence_threshold=0.8):
+    """
+    Re-derive raw_label, confidence and the 3-class sentiment from P(POSITIVE)
+
+    Returns:
+        Tuple of arrays (sentiment, confidence, raw_label)
+    """
+    positive_probs = np.asarray(positive_probs, dtype=float)
+    raw_labels = np.where(positive_probs >= 0.5, 'POSITIVE', 'NEGATIVE')
+    confidences = np.maximum(positive_probs, 1.0 - positive_probs)
+    sentiments = np.where(confidences > confidence_threshold, raw_labels, 'NEUTRAL')
+    return sentiments, confidences, raw_labels
+
+
+def truncate_text(text, max_chars=400):
+    """Character truncation used by the original single-text path"""
+    if len(text) > max_chars:
+        return text[:max_chars] + "..."
+    return text
+
+
+def truncation_policy_id(truncation='chars', max_chars=400, window_tokens=510,
+                         window_overlap=64, window_reducer='mean'):
+    """Stable description of the truncation policy (part of result cache keys)"""
+    if truncation == 'chars':
+        return f"chars:{max_chars}"
+    return f"tokens:{window_tokens}:{window_overlap}:{window_reducer}"
+
+
+def display_text(text, truncation='chars', max_chars=400):
+    """Text stored with a result under the given truncation policy"""
+    return truncate_text(text, max_chars) if truncation == 'chars' else text
+
+
+def length_sorted_batches(lengths, batch_size):
+    """
+    Split indices into batches of similar length
+
+    Args:
+        lengths: Sequence of text lengths
+        batch_size: Maximum number of items per batch
+
+    Returns:
+        List of index arrays, shortest texts first
+    """
+    order = np.argsort(np.asarray(lengths), kind='stable')
+    return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+WINDOW_REDUCERS = ('mean', 'max_confidence', 'length_weighted')
+
+
+def split_token_windows(token_ids, window_tokens=510, window_overlap=64):
+    """
+    Split a token id sequence into overlapping windows
+
+    Args:
+        token_ids: Token ids without special tokens
+        window_tokens: Maximum tokens per window (excluding special tokens)
+        window_overlap: Tokens shared by consecutive windows
+
+    Returns:
+        List of token id lists covering the whole sequence
+    """
+    if len(token_ids) <= window_tokens:
+        return [token_ids]
+
+    step = max(1, window_tokens - window_overlap)
+    windows = []
+    for start in range(0, len(token_ids), step):
+        windows.append(token_ids[start:start + window_tokens])
+        if start + window_tokens >= len(token_ids):
+            break
+    return windows
+
+
+def reduce_window_probabilities(probs, lengths, reducer='mean'):
+    """
+    Aggregate per-window class probabilities into one review score
+
+    Args:
+        probs: Array (n_windows, num_labels) of window probabilities
+        lengths: Token count of each window
+        reducer: 'mean', 'max_confidence' or 'length_weighted'
+
+    Returns:
+        Array (num_labels,) of aggregated probabilities
+    """
+    if len(probs) == 1:
+        return probs[0]
+    if reducer == 'mean':
+        return probs.mean(axis=0)
+    if reducer == 'max_confidence':
+        return probs[probs.max(axis=1).argmax()]
+    if reducer == 'length_weighted':
+        weights = np.asarray(lengths, dtype=float)
+        return (probs * weights[:, None]).sum(axis=0) / weights.sum()
+    raise ValueError(f"Unknown window reducer: {reducer} (expected one of {WINDOW_REDUCERS})")
+
+
+def predict_probabilities(input_ids, tokenizer, model):
+    """
+    Run one padded forward pass over a batch of encoded sequences
+
+    Args:
+        input_ids: List of token id lists (with special tokens)
+
+    Returns:
+        numpy array of shape (len(input_ids), num_labels) with softmax probabilities
+    """
+    if hasattr(model, 'predict_proba'):
+        # ONNX Runtime backend works on numpy arrays
+        encoded = tokenizer.pad({'input_ids': list(input_ids)}, padding=True, return_tensors='np')
+        return model.predict_proba(encoded['input_ids'], encoded['attention_mask'])
+
+    encoded = tokenizer.pad({'input_ids': list(input_ids)}, padding=True, return_tensors='pt')
+    device = next(model.parameters()).device
+    encoded = {k: v.to(device) for k, v in encoded.items()}
+    with torch.inference_mode():
+        logits = model(**encoded).logits
+    return torch.softmax(logits, dim=-1).cpu().numpy()
+
+
+def encode_windows(texts, tokenizer, truncation='chars', max_chars=400, max_length=512,
+                   window_tokens=510, window_overlap=64):
+    """
+    Turn texts into model inputs according to the truncation policy
+
+    Args:
+        texts: List of input texts
+        truncation: 'chars' (cut at max_chars) or 'tokens' (overlapping token windows)
+
+    Returns:
+        Tuple (display_texts, windows, owners): the text stored with each result,
+        the encoded windows and the index of the text each window belongs to
+    """
+    if truncation == 'chars':
+        display_texts = [display_text(t, truncation, max_chars) for t in texts]
+        windows = tokenizer(display_texts, truncation=True, max_length=max_length)['input_ids']
+        return display_texts, windows, list(range(len(texts)))
+
+    if truncation != 'tokens':
+        raise ValueError(f"Unknown truncation mode: {truncation} (expected 'chars' or 'tokens')")
+
+    window_tokens = min(window_tokens, max_length - tokenizer.num_special_tokens_to_add())
+    token_ids = tokenizer(list(texts), add_special_tokens=False, verbose=False)['input_ids']
+    windows, owners = [], []
+    for i, ids in enumerate(token_ids):
+        for window in split_token_windows(ids, window_tokens, window_overlap):
+            windows.append(tokenizer.build_inputs_with_special_tokens(window))
+            owners.append(i)
+    return list(texts), windows, owners
+
+
+def classify_texts_batched(texts, tokenizer, model, confidence_threshold=0.8,
+                           batch_size=32, max_chars=400, truncation='chars',
+                           window_tokens=510, window_overlap=64, window_reducer='mean',
+                           on_batch=None):
+    """
+    Classify texts in length-bucketed batches
+
+    Args:
+        texts: List of input texts
+        tokenizer: HuggingFace tokenizer of the sentiment model
+        model: HuggingFace sequence classification model
+        confidence_threshold: Threshold for the 3-class simulation
+        batch_size: Number of model inputs (texts or windows) per forward pass
+        max_chars: Character truncation used when truncation='chars'
+        truncation: 'chars' or 'tokens' (sliding token windows over long texts)
+        window_tokens: Tokens per window when truncation='tokens'
+        window_overlap: Overlap between consecutive windows
+        window_reducer: How window scores are combined ('mean', 'max_confidence', 'length_weighted')
+        on_batch: Optional callback(done, total, batch_seconds) for progress
+
+    Returns:
+        List of dicts with text, sentiment, confidence and raw_label,
+        in the same order as the input texts
+    """
+    id2label = model.config.id2label
+    display_texts, windows, owners = encode_windows(
+        texts, tokenizer, truncation, max_chars,
+        window_tokens=window_tokens, window_overlap=window_overlap
+    )
+
+    # Windows from all texts share forward passes, so batch sizing stays predictable
+    window_probs = [None] * len(windows)
+    done = 0
+    for batch_idx in length_sorted_batches([len(w) for w in windows], batch_size):
+        batch_start = time.time()
+        probs = predict_probabilities([windows[i] for i in batch_idx], tokenizer, model)
+        for row, i in enumerate(batch_idx):
+            window_probs[i] = probs[row]
+
+        done += len(batch_idx)
+        if on_batch is not None:
+            on_batch(done, len(windows), time.time() - batch_start)
+
+    grouped = [[] for _ in display_texts]
+    for i, owner in enumerate(owners):
+        grouped[owner].append(i)
+
+    results = []
+    for text_idx, window_ids in enumerate(grouped):
+        probs = reduce_window_probabilities(
+            np.stack([window_probs[i] for i in window_ids]),
+            [len(windows[i]) for i in window_ids],
+            window_reducer
+        )
+        label_id = int(probs.argmax())
+        raw_label = id2label[label_id]
+        confidence = float(probs[label_id])
+        results.append({
+            'text': display_texts[text_idx],
+            'sentiment': simulate_3_class_label(raw_label, confidence, confidence_threshold),
+            'confidence': confidence,
+            'raw_label': raw_label
+        })
+
+    return results
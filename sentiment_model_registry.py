@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Process-wide registry of warm sentiment models
+Loads each DistilBERT pipeline once (normally at API startup) and lets every
+analysis job borrow the already-deserialized tokenizer and model
+"""
+
+import os
+import time
+import hashlib
+import threading
+import logging
+from datetime import datetime
+
+from transformers import pipeline
+
+from inference_scheduler import retire_inference_scheduler
+from sharded_inference import shutdown_sharded_classifiers
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+
+
+def _current_rss_mb():
+    """Return resident set size of this process in MB (None if unavailable)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is a peak value (KB on Linux), better than nothing
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+    except Exception:
+        return None
+
+
+def _parameter_mb(model):
+    """Size of model parameters and buffers in MB"""
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        total += sum(b.numel() * b.element_size() for b in model.buffers())
+        return total / (1024.0 * 1024.0)
+    except Exception:
+        return None
+
+
+# Files whose size/mtime identify a checkpoint (config, tokenizer, weights, ONNX export)
+CHECKPOINT_SUFFIXES = ('.json', '.txt', '.model', '.bin', '.safetensors', '.onnx')
+
+
+def checkpoint_fingerprint(directory):
+    """Hash of the names, sizes and mtimes of a checkpoint's files (None if not a directory)"""
+    if not directory or not os.path.isdir(directory):
+        return None
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(CHECKPOINT_SUFFIXES) and os.path.isfile(path):
+            stat = os.stat(path)
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def model_cache_id(source, backend, model, onnx_dir=None):
+    """
+    Identity of a loaded checkpoint for the persistent result cache
+
+    Built from the resolved model path (or hub id), a fingerprint of the
+    checkpoint files (or the hub commit) and the backend including int8
+    quantization, so retrained or reloaded checkpoints never share entries.
+    """
+    if os.path.isdir(source):
+        identity = f"{os.path.abspath(source)}@{checkpoint_fingerprint(source)}"
+    else:
+        config = getattr(model, 'config', None)
+        identity = f"{source}@{getattr(config, '_commit_hash', None) or 'hub'}"
+    if onnx_dir is not None:
+        identity += f"+onnx@{checkpoint_fingerprint(onnx_dir)}"
+    return f"{identity}:{backend}"
+
+
+class SentimentModelRegistry:
+    """
+    Registry of loaded sentiment models keyed by (model path, device, backend)
+
+    Jobs call get() and receive the shared entry; only the first call (or an
+    explicit reload()) pays model deserialization.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Serializes reloads; the lock above is only held for dict access
+        self._reload_lock = threading.Lock()
+        # One lock per key, so a cold load only blocks callers of that same model
+        self._load_locks = {}
+
+    @staticmethod
+    def _key(model_path, device, backend='pytorch', quantize=False, threads=None):
+        # ONNX Runtime sessions carry their own thread pool size; torch threads are per process
+        onnx = backend == 'onnx'
+        return (os.path.normpath(model_path), device, backend, bool(quantize) if onnx else False,
+                threads if onnx else None)
+
+    @staticmethod
+    def _resolve_source(model_path):
+        """Local model directory if it is usable, otherwise a HuggingFace model id"""
+        if os.path.exists(os.path.join(model_path, "config.json")):
+            return model_path
+        if os.path.isdir(model_path) or model_path.startswith(('.', '/')):
+            return DEFAULT_SENTIMENT_MODEL
+        # Treat as a HuggingFace hub model id
+        return model_path
+
+    def _load(self, model_path, device, cache_dir=None, backend='pytorch', quantize=False, onnx_dir=None,
+              threads=None):
+        """Load a sentiment model, preferring the local model path"""
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            os.environ["TRANSFORMERS_CACHE"] = cache_dir
+            os.environ["HF_HOME"] = cache_dir
+
+        rss_before = _current_rss_mb()
+        start = time.time()
+
+        source = self._resolve_source(model_path)
+        pipe = None
+        if backend == 'onnx':
+            from onnx_sentiment_backend import load_onnx_backend, default_onnx_dir
+            if onnx_dir is None:
+                onnx_dir = default_onnx_dir(source, cache_dir)
+            print(f"📦 Using ONNX Runtime backend{' (int8)' if quantize else ''}: {onnx_dir}")
+            tokenizer, model = load_onnx_backend(source, onnx_dir, quantize=quantize, intra_op_threads=threads)
+        elif backend == 'pytorch':
+            if source == model_path and os.path.isdir(model_path):
+                print("📂 Using existing DistilBERT model from local path...")
+                try:
+                    pipe = pipeline("sentiment-analysis", model=model_path, device=device)
+                except Exception as e:
+                    print(f"❌ Error loading local model: {e}")
+                    print("🔄 Downloading model from HuggingFace...")
+                    source = DEFAULT_SENTIMENT_MODEL
+            elif source == DEFAULT_SENTIMENT_MODEL:
+                print("📥 Downloading DistilBERT model from HuggingFace...")
+            if pipe is None:
+                pipe = pipeline("sentiment-analysis", model=source, device=device)
+            tokenizer, model = pipe.tokenizer, pipe.model
+        else:
+            raise ValueError(f"Unknown inference backend: {backend} (expected 'pytorch' or 'onnx')")
+
+        load_time = time.time() - start
+
+        # The local model folder holds a copy of the SST-2 checkpoint
+        model_name = DEFAULT_SENTIMENT_MODEL if os.path.isdir(source) else source
+        backend_label = backend if backend != 'onnx' or not quantize else 'onnx_int8'
+        rss_after = _current_rss_mb()
+
+        entry = {
+            'pipe': pipe,
+            'tokenizer': tokenizer,
+            'model': model,
+            'model_name': model_name,
+            'model_path': model_path,
+            'source': source,
+            'device': device,
+            'backend': backend_label,
+            'model_id': model_cache_id(source, backend_label, model, onnx_dir if backend == 'onnx' else None),
+            'quantize': quantize,
+            'onnx_dir': onnx_dir,
+            'load_time_seconds': load_time,
+            'rss_delta_mb': (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+            'parameter_mb': model.size_mb() if backend == 'onnx' else _parameter_mb(model),
+            'loaded_at': datetime.now().isoformat(),
+            'borrow_count': 0
+        }
+
+        logger.info(f"Sentiment model '{entry['model_name']}' ({entry['backend']}) loaded in {load_time:.2f}s "
+                    f"(RSS +{entry['rss_delta_mb'] or 0:.1f} MB, params {entry['parameter_mb'] or 0:.1f} MB)")
+        return entry
+
+    def register(self, model_path, device=-1, cache_dir=None, backend='pytorch', quantize=False, onnx_dir=None,
+                 threads=None):
+        """
+        Load a model into the registry if it is not loaded yet
+
+        Args:
+            model_path: Local model directory or HuggingFace model id
+            device: Device index for transformers (-1 = CPU)
+            cache_dir: HuggingFace cache directory
+            backend: 'pytorch' or 'onnx' (ONNX Runtime, CPU)
+            quantize: Serve the dynamically int8-quantized ONNX model
+            onnx_dir: Where the ONNX export is stored (default: under cache_dir)
+            threads: ONNX Runtime intra-op threads (None = all cores)
+
+        Returns:
+            dict: Registry entry with tokenizer, model (and pipe for pytorch) and load metrics
+        """
+        key = self._key(model_path, device, backend, quantize, threads)
+        with self._lock:
+            if key in self._entries:
+                return self._entries[key]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock; warm models stay borrowable meanwhile
+        with load_lock:
+            with self._lock:
+                if key in self._entries:
+                    return self._entries[key]
+            entry = self._load(model_path, device, cache_dir, backend, quantize, onnx_dir, threads)
+            entry['registry_key'] = key
+            with self._lock:
+                self._entries[key] = entry
+            return entry
+
+    def get(self, model_path, device=-1, cache_dir=None, backend='pytorch', quantize=False, onnx_dir=None,
+            threads=None):
+        """Borrow a loaded model, loading it on first use"""
+        entry = self.register(model_path, device, cache_dir, backend, quantize, onnx_dir, threads)
+        with self._lock:
+            entry['borrow_count'] += 1
+        return entry
+
+    def reload(self, model_path=None, device=None, cache_dir=None):
+        """
+        Reload registered models (e.g. after the model files were updated)
+
+        The new model is loaded without holding the registry lock, so jobs keep
+        borrowing the old entry until the new one is swapped in.
+
+        Args:
+            model_path: Only reload this model (None = all registered models)
+            device: Only reload entries on this device (None = any device)
+            cache_dir: HuggingFace cache directory
+
+        Returns:
+            list: Stats of the reloaded entries
+
+        Raises:
+            KeyError: model_path is not registered
+        """
+        with self._reload_lock:
+            with self._lock:
+                old_entries = {
+                    key: entry for key, entry in self._entries.items()
+                    if (model_path is None or key[0] == os.path.normpath(model_path))
+                    and (device is None or key[1] == device)
+                }
+            if not old_entries and model_path is not None:
+                raise KeyError(f"Model not registered: {model_path}")
+
+            reloaded = []
+            for key, old in old_entries.items():
+                entry = self._load(old['model_path'], key[1], cache_dir, key[2], key[3], old['onnx_dir'], key[4])
+                entry['registry_key'] = key
+                with self._lock:
+                    entry['borrow_count'] = self._entries.get(key, old)['borrow_count']
+                    self._entries[key] = entry
+                # Queued texts still finish on the old model; new jobs get a fresh scheduler and shard pool
+                retire_inference_scheduler(key)
+                shutdown_sharded_classifiers(old['model_path'])
+                reloaded.append(self._entry_stats(entry))
+            return reloaded
+
+    @staticmethod
+    def _entry_stats(entry):
+        return {
+            'model_name': entry['model_name'],
+            'model_path': entry['model_path'],
+            'device': entry['device'],
+            'backend': entry['backend'],
+            'load_time_seconds': round(entry['load_time_seconds'], 3),
+            'rss_delta_mb': round(entry['rss_delta_mb'], 1) if entry['rss_delta_mb'] is not None else None,
+            'parameter_mb': round(entry['parameter_mb'], 1) if entry['parameter_mb'] is not None else None,
+            'loaded_at': entry['loaded_at'],
+            'borrow_count': entry['borrow_count']
+        }
+
+    def stats(self):
+        """Load time and resident memory for every registered model"""
+        with self._lock:
+            return {
+                'models': [self._entry_stats(e) for e in self._entries.values()],
+                'process_rss_mb': _current_rss_mb()
+            }
+
+
+_registry = SentimentModelRegistry()
+
+
+def get_model_registry():
+    """Return the process-wide sentiment model registry"""
+    return _registry
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Data-parallel sentiment inference across a process pool
+The texts of one job are split into contiguous shards that are classified by
+worker processes, each holding its own copy of the model with a pinned
+torch thread budget. Shard results are merged back in input order.
+Pools are process-wide per (model, layout) and reused by every job, so the
+workers spawn and load the model once rather than once per job.
+"""
+
+import os
+import math
+import time
+import atexit
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+# Per-process model handle, set by _init_worker
+_worker_model = {}
+
+
+def available_cores():
+    """CPU cores this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def resolve_worker_layout(inference_workers=1, threads_per_worker='auto', cores=None):
+    """
+    Turn the configured worker/thread settings into concrete numbers
+
+    Args:
+        inference_workers: Number of worker processes or 'auto'
+        threads_per_worker: torch intra-op threads per worker or 'auto'
+        cores: Available cores (detected if None)
+
+    Returns:
+        Tuple (workers, threads_per_worker); workers == 1 means no pool
+    """
+    cores = cores or available_cores()
+
+    if inference_workers == 'auto':
+        threads = 2 if threads_per_worker == 'auto' else int(threads_per_worker)
+        workers = max(1, cores // max(1, threads))
+    else:
+        workers = max(1, int(inference_workers))
+        threads = max(1, cores // workers) if threads_per_worker == 'auto' else int(threads_per_worker)
+
+    return workers, max(1, threads)
+
+
+def _init_worker(model_path, device, cache_dir, backend, quantize, onnx_dir, threads):
+    """Pool initializer: pin the thread budget and load the model once per worker"""
+    # Override thread settings inherited from the parent before torch starts its pool
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+    from sentiment_model_registry import get_model_registry
+    # ONNX Runtime sizes its own thread pool; without a budget every worker uses all cores
+    entry = get_model_registry().get(
+        model_path, device=device, cache_dir=cache_dir,
+        backend=backend, quantize=quantize, onnx_dir=onnx_dir, threads=threads
+    )
+    _worker_model['tokenizer'] = entry['tokenizer']
+    _worker_model['model'] = entry['model']
+
+
+def _classify_shard(texts, options):
+    """Classify one shard in a worker; returns (results, seconds)"""
+    from sentiment_inference import classify_texts_batched
+
+    start = time.time()
+    results = classify_texts_batched(texts, _worker_model['tokenizer'], _worker_model['model'], **options)
+    return results, time.time() - start
+
+
+class ShardedClassifier:
+    """
+    Process pool of sentiment model replicas
+
+    Args:
+        workers: Number of worker processes
+        threads_per_worker: torch.set_num_threads budget of every worker
+        model_path, device, cache_dir, backend, quantize, onnx_dir: Model registry key
+        shards_per_worker: Shards per worker per call (smooths uneven text lengths)
+    """
+
+    def __init__(self, workers, threads_per_worker, model_path, device=-1, cache_dir=None,
+                 backend='pytorch', quantize=False, onnx_dir=None, shards_per_worker=4):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.shards_per_worker = shards_per_worker
+        self.broken = False
+        # spawn: forking a parent that already initialized torch/OpenMP threads can deadlock
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(model_path, device, cache_dir, backend, quantize, onnx_dir, threads_per_worker)
+        )
+
+    def classify(self, texts, on_shard=None, **options):
+        """
+        Classify texts across the pool
+
+        Args:
+            texts: List of input texts
+            on_shard: Optional callback(done, total, shard_seconds) per finished shard
+            **options: Keyword arguments for classify_texts_batched (no on_batch)
+
+        Returns:
+            List of result dicts in input order
+        """
+        if not texts:
+            return []
+
+        n_shards = min(len(texts), self.workers * self.shards_per_worker)
+        shard_size = math.ceil(len(texts) / n_shards)
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+
+        results = []
+        # map() yields in submission order, so the merge keeps the input order
+        try:
+            for shard_results, seconds in self.executor.map(_classify_shard, shards, [options] * len(shards)):
+                results.extend(shard_results)
+                if on_shard is not None:
+                    on_shard(len(results), len(texts), seconds)
+        except BrokenProcessPool:
+            # A worker died; the next job gets a fresh pool
+            self.broken = True
+            raise
+        return results
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+
+_classifiers = {}
+_classifiers_lock = threading.Lock()
+
+
+def get_sharded_classifier(workers, threads_per_worker, model_path, device=-1, cache_dir=None,
+                           backend='pytorch', quantize=False, onnx_dir=None):
+    """
+    Process-wide ShardedClassifier for a model and worker layout (created on first use)
+
+    Concurrent jobs with the same settings share the pool; a pool whose
+    worker died is replaced.
+    """
+    key = (os.path.normpath(model_path), device, backend, bool(quantize), onnx_dir,
+           workers, threads_per_worker)
+    with _classifiers_lock:
+        classifier = _classifiers.get(key)
+        if classifier is not None and classifier.broken:
+            classifier.shutdown(wait=False)
+            classifier = None
+        if classifier is None:
+            classifier = ShardedClassifier(workers, threads_per_worker, model_path, device=device,
+                                           cache_dir=cache_dir, backend=backend, quantize=quantize,
+                                           onnx_dir=onnx_dir)
+            _classifiers[key] = classifier
+        return classifier
+
+
+def shutdown_sharded_classifiers(model_path=None):
+    """
+    Stop process-wide shard pools (at app shutdown, or after a model reload)
+
+    Args:
+        model_path: Only stop pools serving this model (None = all pools)
+    """
+    with _classifiers_lock:
+        keys = [key for key in _classifiers
+                if model_path is None or key[0] == os.path.normpath(model_path)]
+        classifiers = [_classifiers.pop(key) for key in keys]
+    for classifier in classifiers:
+        # Shards already submitted by running jobs still complete
+        classifier.shutdown(wait=model_path is None)
+
+
+atexit.register(shutdown_sharded_classifiers)
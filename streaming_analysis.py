@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Building blocks for the bounded-memory streaming analysis mode
+Results are appended chunk by chunk to an on-disk spill file (Parquet when
+pyarrow is installed, CSV otherwise) while counts, trends and score ranges
+are maintained incrementally. Only fixed-size per-sentiment samples are kept
+in memory for charts and representative-comment clustering.
+"""
+
+import os
+import json
+
+import numpy as np
+import pandas as pd
+
+# Optional dependency - columnar spill file
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+SENTIMENTS = ['POSITIVE', 'NEGATIVE', 'NEUTRAL']
+
+SPILL_COLUMNS = ['text', 'sentiment', 'confidence', 'raw_label', 'original_length',
+                 'is_candidate', 'visit_date', 'original_score', 'positive_probability', 'decided_by']
+
+
+class ResultSpill:
+    """
+    Append-only on-disk store of per-review results
+
+    Args:
+        path_base: Spill file path without extension
+    """
+
+    def __init__(self, path_base):
+        self.path = path_base + ('.parquet' if PYARROW_AVAILABLE else '.csv')
+        self.rows = 0
+        self._writer = None
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def append(self, frame):
+        frame = frame[SPILL_COLUMNS]
+        if PYARROW_AVAILABLE:
+            # visit_date is mostly None; keep a stable string schema across chunks
+            frame = frame.astype({'visit_date': object, 'is_candidate': 'int64', 'original_length': 'int64'})
+            table = pa.Table.from_pandas(frame, schema=self._schema(), preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(self.path, mode='a', header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    @staticmethod
+    def _schema():
+        return pa.schema([
+            ('text', pa.string()), ('sentiment', pa.string()), ('confidence', pa.float64()),
+            ('raw_label', pa.string()), ('original_length', pa.int64()), ('is_candidate', pa.int64()),
+            ('visit_date', pa.string()), ('original_score', pa.float64()),
+            ('positive_probability', pa.float64()), ('decided_by', pa.string())
+        ])
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def iter_chunks(self, chunk_rows):
+        """Read the spill file back in chunks of at most chunk_rows"""
+        self.close()
+        if self.rows == 0:
+            return
+        if PYARROW_AVAILABLE:
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=chunk_rows):
+                yield batch.to_pandas()
+        else:
+            for chunk in pd.read_csv(self.path, chunksize=chunk_rows, keep_default_na=False,
+                                     na_values={'visit_date': ['']}):
+                chunk['visit_date'] = chunk['visit_date'].astype(object).where(chunk['visit_date'].notna(), None)
+                yield chunk
+
+    def remove(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class StreamingAggregates:
+    """
+    Incrementally maintained statistics over all classified reviews
+
+    First pass (update): counts, trends and the raw original_score range per
+    sentiment. Second pass (update_normalized): statistics of the normalized
+    scores, which need the complete range.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.counts = {s: 0 for s in SENTIMENTS}
+        self.score_min = {}
+        self.score_max = {}
+        self.trends = {}
+        self.candidates = 0
+        self.confidence_sum = 0.0
+        self.confidence_sumsq = 0.0
+        self.confidence_min = None
+        self.confidence_max = {s: None for s in SENTIMENTS}
+        self.normalized_score_sum = 0.0
+
+    def update(self, frame):
+        self.total += len(frame)
+        self.candidates += int(frame['is_candidate'].astype(bool).sum())
+
+        confidence = frame['confidence'].to_numpy(dtype=float)
+        self.confidence_sum += float(confidence.sum())
+        self.confidence_sumsq += float((confidence ** 2).sum())
+        chunk_min = float(confidence.min())
+        self.confidence_min = chunk_min if self.confidence_min is None else min(self.confidence_min, chunk_min)
+
+        for sentiment, group in frame.groupby('sentiment'):
+            self.counts[sentiment] = self.counts.get(sentiment, 0) + len(group)
+            lo, hi = float(group['original_score'].min()), float(group['original_score'].max())
+            self.score_min[sentiment] = min(self.score_min.get(sentiment, lo), lo)
+            self.score_max[sentiment] = max(self.score_max.get(sentiment, hi), hi)
+            top = float(group['confidence'].max())
+            current = self.confidence_max.get(sentiment)
+            self.confidence_max[sentiment] = top if current is None else max(current, top)
+
+        dated = frame[frame['visit_date'].notna()]
+        for (date, sentiment), n in dated.groupby(['visit_date', 'sentiment']).size().items():
+            day = self.trends.setdefault(date, {s: 0 for s in SENTIMENTS})
+            day[sentiment] = day.get(sentiment, 0) + int(n)
+
+    def normalize_scores(self, frame):
+        """Same per-sentiment min-max scaling as normalize_scores_by_sentiment"""
+        scores = frame['original_score'].to_numpy(dtype=float).copy()
+        sentiments = frame['sentiment'].to_numpy()
+        for sentiment in SENTIMENTS:
+            mask = sentiments == sentiment
+            if not mask.any():
+                continue
+            lo, hi = self.score_min[sentiment], self.score_max[sentiment]
+            scores[mask] = (scores[mask] - lo) / (hi - lo) if hi > lo else 0.5
+        return scores
+
+    def update_normalized(self, frame):
+        self.normalized_score_sum += float(frame['original_score'].sum())
+
+    def trends_list(self):
+        """Trends in the format of build_sentiment_trends"""
+        return [
+            {
+                'date': date,
+                'positive': day['POSITIVE'],
+                'negative': day['NEGATIVE'],
+                'neutral': day['NEUTRAL'],
+                'total': day['POSITIVE'] + day['NEGATIVE'] + day['NEUTRAL']
+            }
+            for date, day in sorted(self.trends.items())
+        ]
+
+    def summary_overrides(self, total_time):
+        """Exact corpus-wide values for performance_summary.json"""
+        mean = self.confidence_sum / self.total if self.total else 0.0
+        variance = (self.confidence_sumsq - self.total * mean ** 2) / (self.total - 1) if self.total > 1 else 0.0
+        return {
+            'total_samples': self.total,
+            'avg_time_per_sample': total_time / self.total if self.total else 0.0,
+            'score_distribution': {
+                'avg_original_score': self.normalized_score_sum / self.total if self.total else 0.0,
+                'avg_sentiment_confidence': mean,
+                'candidates_count': self.candidates
+            },
+            'confidence_stats': {
+                'mean': mean,
+                'std': float(np.sqrt(max(variance, 0.0))),
+                'min': self.confidence_min,
+                'max': max((v for v in self.confidence_max.values() if v is not None), default=None)
+            }
+        }
+
+
+class SentimentSampler:
+    """
+    Uniform fixed-size sample per sentiment (bottom-k of random keys)
+
+    Args:
+        sample_rows: Maximum rows kept per sentiment
+        seed: Random seed
+    """
+
+    def __init__(self, sample_rows, seed=42):
+        self.sample_rows = sample_rows
+        self.rng = np.random.RandomState(seed)
+        self.samples = {}
+
+    def add(self, frame):
+        frame = frame.assign(_sample_key=self.rng.random_sample(len(frame)))
+        for sentiment, group in frame.groupby('sentiment'):
+            kept = self.samples.get(sentiment)
+            combined = group if kept is None else pd.concat([kept, group], ignore_index=True)
+            self.samples[sentiment] = combined.nsmallest(self.sample_rows, '_sample_key')
+
+    def frame(self, sentiment=None):
+        parts = [self.samples[s] for s in SENTIMENTS if s in self.samples and (sentiment is None or s == sentiment)]
+        if not parts:
+            return pd.DataFrame(columns=SPILL_COLUMNS)
+        return pd.concat(parts, ignore_index=True).drop(columns='_sample_key')
+
+
+class JsonArrayWriter:
+    """Writes a JSON array of records incrementally (same content as json.dump of the full list)"""
+
+    def __init__(self, path):
+        self.path = path
+        # Opened on the first record, so a sentiment without reviews gets no file
+        self.file = None
+        self.count = 0
+
+    def write_records(self, records):
+        for record in records:
+            if self.file is None:
+                self.file = open(self.path, 'w', encoding='utf-8')
+                self.file.write('[')
+            self.file.write(',\n' if self.count else '\n')
+            self.file.write(json.dumps(record, ensure_ascii=False))
+            self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.write('\n]')
+            self.file.close()
+            self.file = None
@@ -9,6 +9,10 @@ from wordcloud import WordCloud
 from collections import Counter
 import re
 
+import numpy as np
+
+from review_vectors import term_weights
+
 
 
 
@@ -23,7 +27,19 @@ def vizualization(sentiment_counts,
                   total_time,
                   OUTPUT_BASE_DIR,
                   representative_results,
-                  trends=None):
+                  trends=None,
+                  performance_extras=None,
+                  total_samples=None,
+                  write_results_csv=True,
+                  word_counts=None):
+    
+    # Streaming mode passes a bounded sample as results_df/df_sample plus the true total
+    if total_samples is None:
+        total_samples = len(df_sample)
+    
+    # Word clouds and top words read the persisted word counts when they cover results_df
+    if word_counts is not None and word_counts['matrix'].shape[0] != len(results_df):
+        word_counts = None
     
     # Print trends variable content for debugging
     print("\n" + "=" * 80)
@@ -215,14 +231,23 @@ def vizualization(sentiment_counts,
 
     fig, axes = plt.subplots(1, 3, figsize=(18, 6))
 
+    def sentiment_term_weights(sentiment):
+        """Word counts of a sentiment's reviews from the vector store"""
+        return term_weights(word_counts, np.flatnonzero(results_df['sentiment'].values == sentiment))
+
     for i, sentiment in enumerate(['POSITIVE', 'NEGATIVE', 'NEUTRAL']):
         sentiment_data = results_df[results_df['sentiment'] == sentiment]
         
         if len(sentiment_data) > 0:
-            # Combine all texts
-            all_text = ' '.join([clean_text_for_wordcloud(text) for text in sentiment_data['text']])
+            if word_counts is not None:
+                weights = sentiment_term_weights(sentiment)
+                all_text = None
+            else:
+                weights = None
+                # Combine all texts
+                all_text = ' '.join([clean_text_for_wordcloud(text) for text in sentiment_data['text']])
             
-            if all_text.strip():  # Check if we have text after cleaning
+            if weights or (all_text and all_text.strip()):  # Check if we have words to draw
                 wordcloud = WordCloud(
                     width=400, height=300, 
                     background_color='white',
@@ -230,7 +255,11 @@ def vizualization(sentiment_counts,
                     max_words=WORDCLOUD_MAX_WORDS,
                     relative_scaling=0.5,
                     random_state=42
-                ).generate(all_text)
+                )
+                if weights:
+                    wordcloud.generate_from_frequencies(weights)
+                else:
+                    wordcloud.generate(all_text)
                 
                 axes[i].imshow(wordcloud, interpolation='bilinear')
                 axes[i].set_title(f'{sentiment} Words', fontsize=14, fontweight='bold')
@@ -260,13 +289,24 @@ def vizualization(sentiment_counts,
         words = [word for word in words if word.lower() not in stop_words and len(word) > 2]
         return Counter(words).most_common(n_words)
 
+    def get_top_terms(sentiment, n_words=None):
+        """Get top words of a sentiment from the stored word counts"""
+        if n_words is None:
+            n_words = TOP_WORDS_COUNT
+        counts = sentiment_term_weights(sentiment)
+        words = [(term, int(count)) for term, count in counts.items()]
+        return sorted(words, key=lambda item: (-item[1], item[0]))[:n_words]
+
     plt.figure(figsize=(15, 10))
 
     for i, sentiment in enumerate(['POSITIVE', 'NEGATIVE', 'NEUTRAL'], 1):
         sentiment_data = results_df[results_df['sentiment'] == sentiment]
         
         if len(sentiment_data) > 0:
-            top_words = get_top_words(sentiment_data['text'])
+            if word_counts is not None:
+                top_words = get_top_terms(sentiment)
+            else:
+                top_words = get_top_words(sentiment_data['text'])
             
             if top_words:
                 words, counts = zip(*top_words)
@@ -306,9 +346,9 @@ def vizualization(sentiment_counts,
 
     # Performance summary
     performance_summary = {
-        'total_samples': len(df_sample),
+        'total_samples': total_samples,
         'processing_time_minutes': total_time / 60,
-        'avg_time_per_sample': total_time / len(df_sample),
+        'avg_time_per_sample': total_time / total_samples,
         'sentiment_distribution': sentiment_counts,
         'score_distribution': {
             'avg_original_score': float(results_df['original_score'].mean()) if 'original_score' in results_df.columns else 0,
@@ -323,12 +363,17 @@ def vizualization(sentiment_counts,
         }
     }
 
+    # Stage metrics collected by the analyzer (e.g. result cache hits/misses)
+    if performance_extras:
+        performance_summary.update(performance_extras)
+
     # Save performance summary
     with open(os.path.join(OUTPUT_BASE_DIR, 'performance_summary.json'), 'w') as f:
         json.dump(performance_summary, f, indent=2)
 
-    # Save full results
-    results_df.to_csv(os.path.join(OUTPUT_BASE_DIR, 'complete_results.csv'), index=False)
+    # Save full results (already written chunk by chunk in streaming mode)
+    if write_results_csv:
+        results_df.to_csv(os.path.join(OUTPUT_BASE_DIR, 'complete_results.csv'), index=False)
 
     # Save representative comments summary
     representatives_summary = {}
@@ -362,7 +407,7 @@ def vizualization(sentiment_counts,
 
     print(f"""
     📊 Analysis Summary:
-       • Processed: {len(df_sample):,} samples
+       • Processed: {total_samples:,} samples
        • Processing time: {total_time/60:.1f} minutes
        • Average original quality score: {performance_summary['score_distribution']['avg_original_score']:.3f}
        • Average sentiment confidence: {performance_summary['score_distribution']['avg_sentiment_confidence']:.3f}
@@ -378,7 +423,7 @@ def vizualization(sentiment_counts,
     🎯 Key Insights:
        • Most confident positive: {results_df[results_df['sentiment']=='POSITIVE']['confidence'].max():.3f}
        • Most confident negative: {results_df[results_df['sentiment']=='NEGATIVE']['confidence'].max():.3f}
-       • Neutral classifications: {sentiment_counts['NEUTRAL']} ({sentiment_counts['NEUTRAL']/len(results_df)*100:.1f}%)
+       • Neutral classifications: {sentiment_counts['NEUTRAL']} ({sentiment_counts['NEUTRAL']/total_samples*100:.1f}%)
        • High-quality candidates: {performance_summary['score_distribution']['candidates_count']}
     """)
 